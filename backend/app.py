@@ -1,22 +1,38 @@
+import asyncio
 import logging
+import math
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 import os
 
 # Import services
 from services.limiter import limiter
-from config import FRONTEND_URLS, PORT
+from services.compression import CompressionMiddleware
+from config import ENABLE_LOOP_WATCHDOG, ENABLE_WARMUP, FRONTEND_URLS, PORT
+from services.firebase import close_firebase, init_firebase
+from services.health import health_monitor
+from services.http import close_http_client
+from services.jobs import job_manager
+from services.logs import init_logging, shutdown_logging
+from services.metrics import MetricsMiddleware
+from services.resilience import DependencyUnavailable
+from services.storage import init_storage, shutdown_encode_pool
+from services.tracing import TracingMiddleware, tracer
+from services.warmup import warmup
+from services.watchdog import LoopWatchdogMiddleware, loop_watchdog
 
 # Import route routers
 from routes.recipes import router as recipes_router
 from routes.favorites import router as favorites_router
 from routes.health import router as health_router
 from routes.images import router as images_router
+from routes.jobs import router as jobs_router
+from routes.metrics import router as metrics_router
 from routes.preferences import router as preferences_router
 from routes.share import router as share_router
 
@@ -25,10 +41,34 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    # Logging goes through a queue so formatting and output never run on the event loop
+    init_logging()
     logger.info("Starting RecipeLab backend...")
+    # Clients are created here rather than at import time; heavy SDKs (litellm, genai, PIL) load on first use
+    init_firebase()
+    init_storage()
+    # Warm-up runs in the background; /api/health reports not ready until it has finished
+    warmup_task = asyncio.create_task(warmup.run()) if ENABLE_WARMUP else None
+    # Dependency checks run on an interval so health probes only read cached results
+    health_monitor.start()
+    tracer.start()
+    job_manager.start()
+    if ENABLE_LOOP_WATCHDOG:
+        loop_watchdog.start()
     yield
     # Shutdown
     logger.info("Shutting down RecipeLab backend...")
+    # Let background jobs finish (or record their cancellation) while their clients are still open
+    await job_manager.drain()
+    await loop_watchdog.stop()
+    await health_monitor.stop()
+    await tracer.shutdown()
+    if warmup_task and not warmup_task.done():
+        warmup_task.cancel()
+    shutdown_encode_pool()
+    await close_http_client()
+    await close_firebase()
+    shutdown_logging()
 
 
 app = FastAPI(
@@ -36,12 +76,16 @@ app = FastAPI(
     description="AI-powered recipe generation backend",
     version="0.1.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Add rate limiter to app state
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+# Compress response bodies (added first so it is innermost and metrics see the uncompressed handler time)
+app.add_middleware(CompressionMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -49,15 +93,25 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID"],
 )
 
+# Map request tasks to routes so the loop watchdog can name the route that blocked
+app.add_middleware(LoopWatchdogMiddleware)
+# Record request latency per route, inside the request's root span
+app.add_middleware(MetricsMiddleware)
+# Assign request IDs and open root spans (added last so it wraps every other middleware)
+app.add_middleware(TracingMiddleware)
+
 # Include routers
 app.include_router(recipes_router)
 app.include_router(favorites_router)
 app.include_router(images_router)
+app.include_router(jobs_router)
 app.include_router(health_router)
 app.include_router(preferences_router)
 app.include_router(share_router)
+app.include_router(metrics_router)
 
 @app.get("/")
 async def root():
@@ -69,15 +123,24 @@ async def not_found_handler(request: Request, exc):
     return JSONResponse(status_code=404, content={"error": "Resource not found"})
 
 
+@app.exception_handler(DependencyUnavailable)
+async def dependency_unavailable_handler(request: Request, exc: DependencyUnavailable):
+    # Fail fast with a hint of when the dependency's breaker will let calls through again
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Service temporarily unavailable"},
+        headers={"Retry-After": str(max(math.ceil(exc.retry_after), 1))},
+    )
+
+
 @app.exception_handler(500)
 async def server_error_handler(request: Request, exc):
-    logger.error(f"Server error: {str(exc)}")
+    logger.error("Server error: %s", exc)
     return JSONResponse(status_code=500, content={"error": "Internal server error"})
 
 
 if __name__ == "__main__":
     import uvicorn
 
-    # Use a production ASGI server in production!
-    # For development only:
+    # For development only; production runs serve.py (gunicorn with uvicorn workers)
     uvicorn.run("app:app", host="0.0.0.0", port=PORT, reload=True)
@@ -5,6 +5,8 @@ from fastapi import Header, HTTPException
 from firebase_admin import auth as firebase_auth
 
 from services.cache import token_cache
+from services.firebase import get_firebase_app
+from services.metrics import timed
 
 logger = logging.getLogger(__name__)
 
@@ -12,17 +14,19 @@ logger = logging.getLogger(__name__)
 def get_uid_from_token(token: str) -> str | None:
     """Validate Firebase token and return user UID."""
     # Check cache first
-    if token in token_cache:
-        return token_cache[token]
+    uid = token_cache.get(token)
+    if uid is not None:
+        return uid
 
     try:
-        decoded_token = firebase_auth.verify_id_token(token)
+        with timed("auth.verify_token"):
+            decoded_token = firebase_auth.verify_id_token(token, app=get_firebase_app())
         uid = decoded_token["uid"]
         # Store in cache
         token_cache[token] = uid
         return uid
     except Exception as e:
-        logger.warning(f"Invalid token: {str(e)}")
+        logger.warning("Invalid token: %s", e)
         return None
 
 
@@ -0,0 +1,367 @@
+"""In-process stand-ins for Firestore and Firebase Auth used by the benchmark harness.
+
+The fakes implement the subset of the async Firestore API the routes use, with every round trip delayed by a
+configurable LatencyModel, so the real ASGI app can be driven without network access or credentials.
+"""
+
+import copy
+import datetime
+import random
+import string
+import time
+from types import SimpleNamespace
+
+from google.cloud.firestore_v1.transforms import DELETE_FIELD, ArrayRemove, ArrayUnion
+
+from services.mock import LatencyModel
+
+_ID_ALPHABET = string.ascii_letters + string.digits
+
+
+def new_document_id() -> str:
+    """Generate a 20-character auto ID like Firestore's."""
+    return "".join(random.choices(_ID_ALPHABET, k=20))
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def _get_field(data: dict, field_path: str):
+    value = data
+    for part in field_path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def _project(data: dict, field_paths: list[str] | None) -> dict:
+    if field_paths is None:
+        return copy.deepcopy(data)
+    projected: dict = {}
+    for field_path in field_paths:
+        value = _get_field(data, field_path)
+        if value is None:
+            continue
+        target = projected
+        parts = field_path.split(".")
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = copy.deepcopy(value)
+    return projected
+
+
+def _assign(target: dict, key: str, value) -> None:
+    """Set a field, applying the Firestore transforms the routes use."""
+    if value is DELETE_FIELD:
+        target.pop(key, None)
+    elif isinstance(value, ArrayUnion):
+        current = target.get(key) if isinstance(target.get(key), list) else []
+        target[key] = current + [item for item in value.values if item not in current]
+    elif isinstance(value, ArrayRemove):
+        current = target.get(key) if isinstance(target.get(key), list) else []
+        target[key] = [item for item in current if item not in value.values]
+    else:
+        target[key] = copy.deepcopy(value)
+
+
+def _merge(target: dict, updates: dict) -> None:
+    for key, value in updates.items():
+        if isinstance(value, dict):
+            if not isinstance(target.get(key), dict):
+                target[key] = {}
+            _merge(target[key], value)
+        else:
+            _assign(target, key, value)
+
+
+class FakeDocumentSnapshot:
+    def __init__(self, reference: "FakeDocumentReference", data: dict | None, update_time=None):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+        self.update_time = update_time
+        self.create_time = update_time
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> dict | None:
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field_path: str):
+        return _get_field(self._data or {}, field_path)
+
+
+class FakeDocumentReference:
+    def __init__(self, store: "FakeFirestore", collection: str, document_id: str):
+        self._store = store
+        self._collection = collection
+        self.id = document_id
+        self.path = f"{collection}/{document_id}"
+
+    def collection(self, name: str) -> "FakeCollectionReference":
+        return FakeCollectionReference(self._store, f"{self.path}/{name}")
+
+    def _snapshot(self, field_paths: list[str] | None = None) -> FakeDocumentSnapshot:
+        entry = self._store._documents.get(self.path)
+        if entry is None:
+            return FakeDocumentSnapshot(self, None)
+        data, update_time = entry
+        return FakeDocumentSnapshot(self, _project(data, field_paths), update_time)
+
+    def _write(self, data: dict, merge: bool = False) -> None:
+        existing = self._store._documents.get(self.path)
+        merged = copy.deepcopy(existing[0]) if merge and existing is not None else {}
+        _merge(merged, data)
+        self._store._documents[self.path] = (merged, _now())
+
+    def _update(self, updates: dict) -> None:
+        entry = self._store._documents.get(self.path)
+        if entry is None:
+            raise KeyError(f"No document to update: {self.path}")
+        data = copy.deepcopy(entry[0])
+        for field_path, value in updates.items():
+            target = data
+            parts = field_path.split(".")
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            _assign(target, parts[-1], value)
+        self._store._documents[self.path] = (data, _now())
+
+    async def get(self, field_paths: list[str] | None = None) -> FakeDocumentSnapshot:
+        await self._store.latency.wait()
+        return self._snapshot(field_paths)
+
+    async def set(self, data: dict, merge: bool = False) -> None:
+        await self._store.latency.wait()
+        self._write(data, merge=merge)
+
+    async def update(self, updates: dict, option=None) -> None:
+        await self._store.latency.wait()
+        entry = self._store._documents.get(self.path)
+        if option is not None and entry is not None and entry[1] != option.last_update_time:
+            raise ValueError(f"Precondition failed: {self.path} was modified")
+        self._update(updates)
+
+    async def delete(self) -> None:
+        await self._store.latency.wait()
+        self._store._documents.pop(self.path, None)
+
+
+class FakeQuery:
+    def __init__(self, store: "FakeFirestore", collection: str):
+        self._store = store
+        self._collection = collection
+        self._filters: list[tuple[str, str, object]] = []
+        self._orders: list[tuple[str, str]] = []
+        self._limit: int | None = None
+        self._offset = 0
+        self._field_paths: list[str] | None = None
+        self._start_after: dict | None = None
+
+    def _copy(self) -> "FakeQuery":
+        query = copy.copy(self)
+        query._filters = list(self._filters)
+        query._orders = list(self._orders)
+        return query
+
+    def where(self, field_path: str | None = None, op_string: str | None = None, value=None, *, filter=None):
+        query = self._copy()
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        query._filters.append((field_path, op_string, value))
+        return query
+
+    def order_by(self, field_path: str, direction: str = "ASCENDING") -> "FakeQuery":
+        query = self._copy()
+        query._orders.append((field_path, direction))
+        return query
+
+    def limit(self, count: int) -> "FakeQuery":
+        query = self._copy()
+        query._limit = count
+        return query
+
+    def offset(self, count: int) -> "FakeQuery":
+        query = self._copy()
+        query._offset = count
+        return query
+
+    def select(self, field_paths: list[str]) -> "FakeQuery":
+        query = self._copy()
+        query._field_paths = list(field_paths)
+        return query
+
+    def start_after(self, values: dict) -> "FakeQuery":
+        query = self._copy()
+        query._start_after = values
+        return query
+
+    def _matches(self, document_id: str, data: dict) -> bool:
+        for field_path, op_string, value in self._filters:
+            actual = document_id if field_path == "__name__" else _get_field(data, field_path)
+            if op_string == "==" and actual != value:
+                return False
+            if op_string == "<" and not (actual is not None and actual < value):
+                return False
+            if op_string == ">" and not (actual is not None and actual > value):
+                return False
+            if op_string == "array_contains" and value not in (actual or []):
+                return False
+        return True
+
+    @staticmethod
+    def _field_value(item: tuple[str, dict], field: str):
+        document_id, data = item
+        return document_id if field == "__name__" else _get_field(data, field)
+
+    def _sort_key(self, item: tuple[str, dict]) -> tuple:
+        return tuple(self._field_value(item, field) for field, _ in self._orders)
+
+    def _results(self) -> list[FakeDocumentSnapshot]:
+        prefix = f"{self._collection}/"
+        matches = [
+            (path[len(prefix) :], data)
+            for path, (data, _) in self._store._documents.items()
+            if path.startswith(prefix) and "/" not in path[len(prefix) :]
+        ]
+        matches = [(document_id, data) for document_id, data in matches if self._matches(document_id, data)]
+        for field, direction in reversed(self._orders):
+            # Stable sorts applied from the last order to the first give a multi-field ordering; missing fields sort last
+            matches.sort(
+                key=lambda item, field=field: (self._field_value(item, field) is None, self._field_value(item, field)),
+                reverse=direction == "DESCENDING",
+            )
+        if self._start_after is not None:
+            cursor = tuple(self._start_after.get(field) for field, _ in self._orders)
+            matches = [item for item in matches if self._after_cursor(item, cursor)]
+        matches = matches[self._offset :]
+        if self._limit is not None:
+            matches = matches[: self._limit]
+        collection = FakeCollectionReference(self._store, self._collection)
+        return [collection.document(document_id)._snapshot(self._field_paths) for document_id, _ in matches]
+
+    def _after_cursor(self, item, cursor: tuple) -> bool:
+        key = self._sort_key(item)
+        for (_, direction), value, bound in zip(self._orders, key, cursor, strict=True):
+            if value == bound:
+                continue
+            return value < bound if direction == "DESCENDING" else value > bound
+        return False
+
+    async def stream(self):
+        await self._store.latency.wait()
+        for snapshot in self._results():
+            yield snapshot
+
+    async def get(self) -> list[FakeDocumentSnapshot]:
+        await self._store.latency.wait()
+        return self._results()
+
+
+class FakeCollectionReference(FakeQuery):
+    def document(self, document_id: str | None = None) -> FakeDocumentReference:
+        return FakeDocumentReference(self._store, self._collection, document_id or new_document_id())
+
+    async def add(self, data: dict) -> tuple[datetime.datetime, FakeDocumentReference]:
+        doc_ref = self.document()
+        await doc_ref.set(data)
+        return _now(), doc_ref
+
+
+class FakeWriteBatch:
+    def __init__(self, store: "FakeFirestore"):
+        self._store = store
+        self._writes: list = []
+
+    def set(self, doc_ref: FakeDocumentReference, data: dict, merge: bool = False) -> None:
+        self._writes.append(lambda: doc_ref._write(data, merge=merge))
+
+    def update(self, doc_ref: FakeDocumentReference, updates: dict) -> None:
+        self._writes.append(lambda: doc_ref._update(updates))
+
+    def delete(self, doc_ref: FakeDocumentReference) -> None:
+        self._writes.append(lambda: self._store._documents.pop(doc_ref.path, None))
+
+    async def commit(self) -> None:
+        await self._store.latency.wait()
+        for write in self._writes:
+            write()
+
+
+class FakeBulkWriter:
+    """Stand-in for Firestore's BulkWriter: queued writes are applied on flush() or close()."""
+
+    def __init__(self, store: "FakeFirestore", options=None):
+        self._store = store
+        self.options = options
+        self._deletes: list[str] = []
+
+    def on_write_error(self, callback) -> None:
+        pass
+
+    def delete(self, reference: FakeDocumentReference) -> None:
+        self._deletes.append(reference.path)
+
+    def flush(self) -> None:
+        for path in self._deletes:
+            self._store._documents.pop(path, None)
+        self._deletes.clear()
+
+    def close(self) -> None:
+        self.flush()
+
+
+class FakeFirestore:
+    """Dictionary-backed stand-in for the async Firestore client."""
+
+    def __init__(self, latency: LatencyModel | None = None):
+        self.latency = latency or LatencyModel(0)
+        # Format: {"collection/doc_id": (data, update_time)}
+        self._documents: dict[str, tuple[dict, datetime.datetime]] = {}
+
+    def collection(self, name: str) -> FakeCollectionReference:
+        return FakeCollectionReference(self, name)
+
+    def batch(self) -> FakeWriteBatch:
+        return FakeWriteBatch(self)
+
+    def bulk_writer(self, options=None) -> FakeBulkWriter:
+        return FakeBulkWriter(self, options)
+
+    def write_option(self, last_update_time=None) -> SimpleNamespace:
+        return SimpleNamespace(last_update_time=last_update_time)
+
+    async def get_all(self, references, field_paths: list[str] | None = None):
+        await self.latency.wait()
+        for reference in references:
+            yield reference._snapshot(field_paths)
+
+
+class FakeAuth:
+    """Stand-in for firebase_admin.auth: tokens of the form "user-<uid>" verify to that uid."""
+
+    def __init__(self, latency: LatencyModel | None = None):
+        self.latency = latency or LatencyModel(0)
+
+    def _block(self) -> None:
+        # firebase_admin calls are synchronous, so the fake blocks the calling thread like the real SDK
+        time.sleep(self.latency.sample())
+
+    def verify_id_token(self, token: str, app=None, check_revoked: bool = False) -> dict:
+        self._block()
+        if not token.startswith("user-"):
+            raise ValueError("Invalid token")
+        return {"uid": token[len("user-") :]}
+
+    def get_user(self, uid: str, app=None):
+        self._block()
+        return SimpleNamespace(uid=uid, display_name=f"Benchmark {uid}")
+
+    def get_users(self, identifiers, app=None):
+        self._block()
+        users = [SimpleNamespace(uid=identifier.uid, display_name=f"Benchmark {identifier.uid}") for identifier in identifiers]
+        return SimpleNamespace(users=users, not_found=[])
@@ -0,0 +1,305 @@
+"""Load-testing harness for the real ASGI app.
+
+Runs the app in-process with MOCK_MODE (LLM and Gemini latencies drawn from MOCK_*_LATENCY models) against fake
+Firestore and Firebase Auth with their own latency models. Drives a mixed workload at a target request rate and
+reports latency percentiles per operation, throughput and event-loop lag. Run from the backend directory:
+
+    uv run python -m benchmarks.load --rps 20 --duration 30
+    uv run python -m benchmarks.load --save baseline.json
+    uv run python -m benchmarks.load --baseline baseline.json --max-regression 0.15   # exits 1 on regression
+
+Latency specs are "median_ms[:p95_ms[:error_rate]]".
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import logging
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from unittest.mock import patch
+
+DEFAULT_MIX = "generate=1,update=1,view=10,share=3,favorites=4,history=3,search=2"
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def parse_mix(spec: str) -> dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, weight = part.split("=")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+class Workload:
+    """Seeded users and recipes plus one coroutine per operation in the mix."""
+
+    def __init__(self, client, store, users: int, recipes_per_user: int):
+        self.client = client
+        self.store = store
+        self.users = [f"bench{i}" for i in range(users)]
+        self.recipes: dict[str, list[str]] = defaultdict(list)
+        self.recipes_per_user = recipes_per_user
+
+    def headers(self, uid: str) -> dict[str, str]:
+        return {"Authorization": f"Bearer user-{uid}"}
+
+    async def seed(self) -> None:
+        from services.llm import generate_recipe_from_prompt
+        from services.mock import LatencyModel, mock_llm_latency
+        from services.recipe_store import encode_recipe
+
+        # Seed with the mock recipe, skipping its simulated latency and injected failures
+        with patch.object(mock_llm_latency, "wait", LatencyModel(0).wait):
+            recipe, _ = await generate_recipe_from_prompt("seed")
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        for uid in self.users:
+            for i in range(self.recipes_per_user):
+                doc_ref = self.store.collection("recipes").document()
+                doc_ref._write(
+                    {
+                        "uid": uid,
+                        "prompt": f"seed recipe {i}",
+                        "complexity": "standard",
+                        "diet": "standard",
+                        "time": "any",
+                        "servings": "standard",
+                        **encode_recipe(recipe.model_dump()),
+                        "timestamp": now - datetime.timedelta(minutes=i),
+                        "archived": False,
+                    }
+                )
+                self.recipes[uid].append(doc_ref.id)
+            favorites = [
+                {"id": recipe_id, "title": recipe.title, "timestamp": now.isoformat()}
+                for recipe_id in self.recipes[uid][: self.recipes_per_user // 2]
+            ]
+            self.store.collection("users").document(uid)._write({"favorites": favorites})
+
+    async def generate(self, uid: str):
+        response = await self.client.post(
+            "/api/generate-recipe", json={"prompt": "weeknight pasta"}, headers=self.headers(uid)
+        )
+        if response.status_code == 200:
+            self.recipes[uid].append(response.json()["id"])
+        return response
+
+    async def update(self, uid: str):
+        recipe_id = random.choice(self.recipes[uid])
+        view = await self.client.get(f"/api/recipe/{recipe_id}", headers=self.headers(uid))
+        return await self.client.post(
+            "/api/update-recipe",
+            json={"id": recipe_id, "original_recipe": view.json()["recipe"], "modifications": "make it spicier"},
+            headers=self.headers(uid),
+        )
+
+    async def view(self, uid: str):
+        owner = random.choice(self.users)
+        return await self.client.get(f"/api/recipe/{random.choice(self.recipes[owner])}", headers=self.headers(uid))
+
+    async def share(self, uid: str):
+        owner = random.choice(self.users)
+        return await self.client.get(f"/api/share/recipe/{random.choice(self.recipes[owner])}")
+
+    async def favorites(self, uid: str):
+        return await self.client.get("/api/favorites", headers=self.headers(uid))
+
+    async def history(self, uid: str):
+        return await self.client.get("/api/recipe-history?limit=20", headers=self.headers(uid))
+
+    async def search(self, uid: str):
+        query = random.choice(["carb", "pasta egg", "pecorino", "guanciale pepper"])
+        return await self.client.get("/api/recipes/search", params={"q": query}, headers=self.headers(uid))
+
+
+async def sample_loop_lag(samples: list[float], stop: asyncio.Event, interval: float = 0.01) -> None:
+    """Measure how late the event loop wakes a sleeping task."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - start - interval))
+
+
+async def run(args) -> dict:
+    import firebase_admin
+    from firebase_admin import auth as firebase_auth
+    from httpx import ASGITransport, AsyncClient
+
+    from app import app
+    from benchmarks.fakes import FakeAuth, FakeFirestore
+    from services import firebase
+    from services.limiter import limiter
+    from services.mock import LatencyModel
+
+    # Route Firestore and Firebase Auth to the in-process fakes
+    store = FakeFirestore(LatencyModel.from_spec(args.firestore_latency))
+    fake_auth = FakeAuth(LatencyModel.from_spec(args.auth_latency))
+    firebase._db_async = store
+    try:
+        firebase_admin.get_app()
+    except ValueError:
+        firebase_admin.initialize_app(options={"projectId": "recipelab-benchmark"})
+    firebase_auth.verify_id_token = fake_auth.verify_id_token
+    firebase_auth.get_user = fake_auth.get_user
+    firebase_auth.get_users = fake_auth.get_users
+    limiter.enabled = False
+    # Per-request INFO logs would dominate the output and the measurement
+    logging.getLogger().setLevel(logging.WARNING)
+
+    mix = parse_mix(args.mix)
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    lag_samples: list[float] = []
+
+    transport = ASGITransport(app=app, client=("10.0.0.1", 40000))
+    async with AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        workload = Workload(client, store, args.users, args.recipes_per_user)
+        await workload.seed()
+
+        async def run_op(name: str) -> None:
+            uid = random.choice(workload.users)
+            start = time.perf_counter()
+            try:
+                response = await getattr(workload, name)(uid)
+                ok = response.status_code < 400
+            except Exception:
+                ok = False
+            latencies[name].append(time.perf_counter() - start)
+            if not ok:
+                errors[name] += 1
+
+        stop = asyncio.Event()
+        lag_task = asyncio.create_task(sample_loop_lag(lag_samples, stop))
+        names, weights = list(mix), list(mix.values())
+        tasks = []
+        start = time.perf_counter()
+        # Open-loop arrivals: requests start on schedule regardless of how many are still in flight
+        for i in range(int(args.rps * args.duration)):
+            delay = start + i / args.rps - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(run_op(random.choices(names, weights)[0])))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await lag_task
+
+    operations = {
+        name: {
+            "count": len(values),
+            "errors": errors[name],
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+        }
+        for name, values in sorted(latencies.items())
+    }
+    completed = sum(len(values) for values in latencies.values())
+    return {
+        "config": {
+            "rps": args.rps,
+            "duration_s": args.duration,
+            "mix": args.mix,
+            "firestore_latency": args.firestore_latency,
+            "auth_latency": args.auth_latency,
+            "llm_latency": args.llm_latency,
+        },
+        "operations": operations,
+        "throughput_rps": round(completed / elapsed, 2),
+        "error_rate": round(sum(errors.values()) / completed, 4) if completed else 0.0,
+        "loop_lag_ms": {
+            "p50": round(percentile(lag_samples, 50) * 1000, 2),
+            "p99": round(percentile(lag_samples, 99) * 1000, 2),
+            "max": round(max(lag_samples, default=0.0) * 1000, 2),
+        },
+    }
+
+
+def compare(report: dict, baseline: dict, max_regression: float) -> list[str]:
+    """Return the regressions of a report against a baseline report."""
+    failures = []
+    for name, stats in report["operations"].items():
+        base = baseline["operations"].get(name)
+        if not base:
+            continue
+        for key in ("p95_ms", "p99_ms"):
+            if base[key] and stats[key] > base[key] * (1 + max_regression):
+                failures.append(f"{name} {key}: {stats[key]} ms vs baseline {base[key]} ms")
+    if report["throughput_rps"] < baseline["throughput_rps"] * (1 - max_regression):
+        failures.append(f"throughput: {report['throughput_rps']} rps vs baseline {baseline['throughput_rps']} rps")
+    if report["error_rate"] > baseline["error_rate"] + 0.01:
+        failures.append(f"error rate: {report['error_rate']} vs baseline {baseline['error_rate']}")
+    return failures
+
+
+def print_report(report: dict) -> None:
+    print(f"{'operation':<12} {'count':>7} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, stats in report["operations"].items():
+        print(
+            f"{name:<12} {stats['count']:>7} {stats['errors']:>7} "
+            f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}"
+        )
+    lag = report["loop_lag_ms"]
+    print(f"\nthroughput: {report['throughput_rps']} rps, error rate: {report['error_rate']:.2%}")
+    print(f"event-loop lag: p50 {lag['p50']} ms, p99 {lag['p99']} ms, max {lag['max']} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rps", type=float, default=20, help="Target request rate")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of load")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Operation weights, e.g. view=10,generate=1")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--recipes-per-user", type=int, default=10)
+    parser.add_argument("--firestore-latency", default="8:40", help="Firestore round trip latency spec")
+    parser.add_argument("--auth-latency", default="30:120", help="Firebase Auth call latency spec")
+    parser.add_argument("--llm-latency", default="8000:20000:0.01", help="Mock LLM latency spec")
+    parser.add_argument("--image-latency", default="12000:20000", help="Mock Gemini latency spec")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible runs")
+    parser.add_argument("--save", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Compare against a saved report and exit 1 on regression")
+    parser.add_argument("--max-regression", type=float, default=0.15, help="Allowed relative slowdown")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    # Configure mock mode before config.py is imported by the app
+    os.environ["MOCK_MODE"] = "true"
+    os.environ["MOCK_LLM_LATENCY"] = args.llm_latency
+    os.environ["MOCK_IMAGE_LATENCY"] = args.image_latency
+
+    report = asyncio.run(run(args))
+    print_report(report)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        failures = compare(report, baseline, args.max_regression)
+        if failures:
+            print("\nREGRESSIONS:")
+            for failure in failures:
+                print(f"  {failure}")
+            sys.exit(1)
+        print("\nNo regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Response serialization benchmark.
+
+Measures the cost of turning a handler's return value into response bytes for the JSON endpoints, with a typical and
+a large recipe, along three paths:
+
+- fastapi: plain dicts validated against the route's response_model and rendered with the stdlib JSON encoder
+- orjson: the same validation, rendered with ORJSONResponse (the app's default response class)
+- model: an already validated model returned as a ModelResponse, skipping validation entirely
+
+Run from the backend directory:
+
+    uv run python -m benchmarks.serialization [--iterations 2000] [--json]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from models import (
+    BatchGetRecipeResult,
+    BatchGetRecipesResponse,
+    FavoritesResponse,
+    GenerateRecipeResponse,
+    GetRecipeResponse,
+    Recipe,
+)
+from services.responses import ModelResponse
+
+BATCH_SIZE = 20
+FAVORITES = 200
+
+# (ingredient groups, items per group, instructions, notes, words per instruction)
+RECIPE_SIZES = {
+    "typical": (2, 6, 8, 3, 25),
+    "large": (8, 15, 40, 12, 60),
+}
+
+
+def make_recipe(size: str) -> dict:
+    groups, items, steps, notes, words = RECIPE_SIZES[size]
+    sentence = " ".join(["Stir the <b>sauce</b> gently over medium heat"] * (words // 8 + 1))
+    return {
+        "title": "Spaghetti Carbonara with Crispy Guanciale",
+        "description": "A classic Roman pasta dish made with eggs, hard cheese, cured pork, and black pepper.",
+        "prep_time": "15 minutes",
+        "cook_time": "20 minutes",
+        "servings": "4 servings",
+        "macros": {"calories": 650, "protein": 28, "carbs": 72, "fat": 26},
+        "ingredients": [
+            {"group_name": f"Group {g}", "items": [f"{i + 1} cups <b>ingredient {g}.{i}</b>, diced" for i in range(items)]}
+            for g in range(groups)
+        ],
+        "instructions": [f"{sentence} ({step + 1})." for step in range(steps)],
+        "notes": [f"Note {n}: {sentence}." for n in range(notes)],
+    }
+
+
+def recipe_view(recipe: dict) -> dict:
+    return {
+        "recipe": recipe,
+        "image_url": "https://storage.googleapis.com/bucket/recipe-images/abc123/1024.webp",
+        "image_variants": {"webp": {"480": "https://example.com/480.webp", "1024": "https://example.com/1024.webp"}},
+        "timestamp": "2026-01-01T12:00:00+00:00",
+        "uid": "user123",
+        "displayName": "Test User",
+        "prompt": "carbonara",
+    }
+
+
+def endpoint_payloads(recipe: dict) -> dict[str, tuple[str, dict, object]]:
+    """Per endpoint: (route path, dict payload as a handler would build it, equivalent validated model)."""
+    model = Recipe.model_validate(recipe)
+    view = recipe_view(recipe)
+    view_model = GetRecipeResponse.model_construct(**{**view, "recipe": model})
+    favorites = {
+        "favorites": [{"id": f"r{i}", "title": f"Recipe {i}", "timestamp": "2026-01-01"} for i in range(FAVORITES)],
+        "favoriteIds": [f"r{i}" for i in range(FAVORITES)],
+    }
+    return {
+        "get_recipe": ("/api/recipe/{recipe_id}", view, view_model),
+        "generate": ("/api/generate-recipe", {"recipe": recipe, "id": "abc123"},
+                     GenerateRecipeResponse.model_construct(recipe=model, id="abc123")),
+        "batch_get": (
+            "/api/recipes:batchGet",
+            {"results": [{"id": f"r{i}", "recipe": view} for i in range(BATCH_SIZE)]},
+            BatchGetRecipesResponse.model_construct(
+                results=[BatchGetRecipeResult.model_construct(id=f"r{i}", recipe=view_model) for i in range(BATCH_SIZE)]
+            ),
+        ),
+        "favorites": ("/api/favorites", favorites, FavoritesResponse.model_validate(favorites)),
+    }
+
+
+def route_fields(app) -> dict:
+    return {route.path: route.response_field for route in app.routes if isinstance(route, APIRoute)}
+
+
+async def time_path(path: str, iterations: int, field, payload: dict, model) -> tuple[float, int]:
+    """Mean microseconds per response and body size for one serialization path."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        if path == "model":
+            body = ModelResponse(model).body
+        else:
+            content = await serialize_response(field=field, response_content=payload)
+            body = (JSONResponse if path == "fastapi" else ORJSONResponse)(content).body
+    return (time.perf_counter() - start) / iterations * 1e6, len(body)
+
+
+async def run(iterations: int) -> dict:
+    from app import app
+
+    fields = route_fields(app)
+    report = {}
+    for size in RECIPE_SIZES:
+        for endpoint, (route, payload, model) in endpoint_payloads(make_recipe(size)).items():
+            results = {}
+            for path in ("fastapi", "orjson", "model"):
+                us, nbytes = await time_path(path, iterations, fields[route], payload, model)
+                results[path] = round(us, 1)
+            report[f"{endpoint}/{size}"] = {"bytes": nbytes, "us": results}
+    return report
+
+
+def print_report(report: dict) -> None:
+    print(f"{'endpoint':<22} {'bytes':>8} {'fastapi us':>11} {'orjson us':>10} {'model us':>9} {'speedup':>8}")
+    for name, row in report.items():
+        us = row["us"]
+        speedup = us["fastapi"] / us["model"] if us["model"] else 0.0
+        print(f"{name:<22} {row['bytes']:>8} {us['fastapi']:>11} {us['orjson']:>10} {us['model']:>9} {speedup:>7.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000, help="Responses serialized per endpoint and path")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.iterations))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
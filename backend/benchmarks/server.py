@@ -0,0 +1,219 @@
+"""Server throughput benchmark: the production launcher (serve.py) against the development server (app.py).
+
+Starts each server configuration in turn on a local port, serving the app with MOCK_MODE and fake Firestore and
+Firebase Auth (benchmarks/server_app.py), and drives it over real TCP connections with a closed loop: each of
+--concurrency connections sends its next request as soon as the last one is answered, from --clients load generator
+processes. Reports requests per second and latency percentiles per configuration. Run from the backend directory:
+
+    uv run python -m benchmarks.server [--duration 20] [--concurrency 64] [--workers 4] [--json]
+
+The load generators share the machine with the server, so compare configurations within one run rather than reading
+the numbers as capacity; give the benchmark a machine with more CPUs than --workers plus --clients.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from benchmarks.load import parse_mix, percentile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = "benchmarks.server_app:app"
+
+# Read-only traffic: every request is answered by the server alone, so throughput measures the server
+DEFAULT_MIX = "view=10,share=3,favorites=4,history=3,search=2"
+SEARCH_QUERIES = ["carb", "pasta egg", "pecorino", "guanciale pepper"]
+
+DEV_SCRIPT = """
+import uvicorn
+uvicorn.run({app!r}, host="127.0.0.1", port={port}, reload=True, log_level="warning")
+"""
+
+PROD_SCRIPT = """
+from serve import Server, server_options
+Server({app!r}, server_options(bind="127.0.0.1:{port}", workers={workers})).run()
+"""
+
+
+def user_ids(users: int) -> list[str]:
+    return [f"bench{i}" for i in range(users)]
+
+
+def recipe_id(uid: str, index: int) -> str:
+    return f"{uid}recipe{index}"
+
+
+def request_for(operation: str, rng: random.Random, users: list[str], recipes_per_user: int) -> tuple[str, dict]:
+    """Path and headers of one request of the given operation, by a random user."""
+    uid = rng.choice(users)
+    headers = {"Authorization": f"Bearer user-{uid}"}
+    recipe = recipe_id(rng.choice(users), rng.randrange(recipes_per_user))
+    if operation == "view":
+        return f"/api/recipe/{recipe}", headers
+    if operation == "share":
+        return f"/api/share/recipe/{recipe}", {}
+    if operation == "favorites":
+        return "/api/favorites", headers
+    if operation == "history":
+        return "/api/recipe-history?limit=20", headers
+    if operation == "search":
+        return f"/api/recipes/search?q={rng.choice(SEARCH_QUERIES)}", headers
+    raise ValueError(f"Unknown operation: {operation}")
+
+
+async def _drive(url: str, args: argparse.Namespace, connections: int, duration: float, seed: int) -> dict:
+    from httpx import AsyncClient, HTTPError, Limits
+
+    rng = random.Random(seed)
+    mix = parse_mix(args.mix)
+    names, weights = list(mix), list(mix.values())
+    users = user_ids(args.users)
+    latencies: list[float] = []
+    errors = 0
+    limits = Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        deadline = time.perf_counter() + duration
+
+        async def connection() -> None:
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                path, headers = request_for(rng.choices(names, weights)[0], rng, users, args.recipes_per_user)
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path, headers=headers)
+                    ok = response.status_code < 400
+                except HTTPError:
+                    ok = False
+                latencies.append(time.perf_counter() - start)
+                errors += not ok
+
+        await asyncio.gather(*(connection() for _ in range(connections)))
+    return {"latencies": latencies, "errors": errors}
+
+
+def drive(url: str, args: argparse.Namespace, connections: int, duration: float, seed: int) -> dict:
+    """One load generator process: `connections` closed-loop connections for `duration` seconds."""
+    return asyncio.run(_drive(url, args, connections, duration, seed))
+
+
+def wait_until_serving(url: str, process: subprocess.Popen, timeout: float = 60) -> None:
+    from httpx import get
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            # The fake data is seeded in the lifespan, before the first request is accepted
+            if get(f"{url}/api/health/live", timeout=1).status_code == 200:
+                return
+        except Exception:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("Server did not start")
+
+
+def run_config(script: str, args: argparse.Namespace, port: int) -> dict:
+    url = f"http://127.0.0.1:{port}"
+    env = {
+        **os.environ,
+        "MOCK_MODE": "true",
+        "LOG_LEVEL": "WARNING",
+        # Dependency checks would only add background work to the measurement
+        "HEALTH_CHECK_INTERVAL_SECONDS": "3600",
+        "BENCH_USERS": str(args.users),
+        "BENCH_RECIPES_PER_USER": str(args.recipes_per_user),
+        "BENCH_FIRESTORE_LATENCY": args.firestore_latency,
+        "BENCH_AUTH_LATENCY": args.auth_latency,
+    }
+    # A new session, so the server and everything it forks are stopped together
+    process = subprocess.Popen(
+        [sys.executable, "-c", script.format(app=APP, port=port, workers=args.workers)],
+        cwd=BACKEND_DIR,
+        env=env,
+        start_new_session=True,
+    )
+    try:
+        wait_until_serving(url, process)
+        clients = args.clients
+        connections = [max(1, args.concurrency // clients)] * clients
+        with ProcessPoolExecutor(clients, mp_context=get_context("spawn")) as pool:
+            # Warm-up: the first requests fill caches and open connections in every worker
+            list(pool.map(drive, [url] * clients, [args] * clients, connections, [args.warmup] * clients, range(clients)))
+            start = time.perf_counter()
+            results = list(
+                pool.map(drive, [url] * clients, [args] * clients, connections, [args.duration] * clients, range(clients))
+            )
+            elapsed = time.perf_counter() - start
+    finally:
+        os.killpg(process.pid, signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+            process.wait()
+
+    latencies = [latency for result in results for latency in result["latencies"]]
+    errors = sum(result["errors"] for result in results)
+    return {
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "error_rate": round(errors / len(latencies), 4) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def print_report(report: dict) -> None:
+    print(f"{'server':<8} {'requests':>9} {'rps':>9} {'errors':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, row in report["servers"].items():
+        print(
+            f"{name:<8} {row['requests']:>9} {row['throughput_rps']:>9.1f} {row['error_rate']:>8.2%} "
+            f"{row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f}"
+        )
+    if "speedup" in report:
+        print(f"\nprod/dev throughput: {report['speedup']:.2f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--servers", default="dev,prod", help="Configurations to run: dev, prod or both")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds of measured load per server")
+    parser.add_argument("--warmup", type=float, default=3, help="Seconds of unmeasured load before measuring")
+    parser.add_argument("--concurrency", type=int, default=64, help="Open connections, split across the clients")
+    parser.add_argument("--clients", type=int, default=2, help="Load generator processes")
+    parser.add_argument("--workers", type=int, default=0, help="Production workers (0: sized by serve.py)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Operation weights, e.g. view=10,search=2")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--recipes-per-user", type=int, default=10)
+    parser.add_argument("--firestore-latency", default="2:10", help="Fake Firestore latency spec")
+    parser.add_argument("--auth-latency", default="2:10", help="Fake Firebase Auth latency spec")
+    parser.add_argument("--port", type=int, default=5101)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    scripts = {"dev": DEV_SCRIPT, "prod": PROD_SCRIPT}
+    servers = {}
+    for offset, name in enumerate(args.servers.split(",")):
+        servers[name] = run_config(scripts[name], args, args.port + offset)
+    report = {"servers": servers}
+    if "dev" in servers and "prod" in servers and servers["dev"]["throughput_rps"]:
+        report["speedup"] = round(servers["prod"]["throughput_rps"] / servers["dev"]["throughput_rps"], 2)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""The app as benchmarks.server serves it: MOCK_MODE, in-process fake Firestore and Firebase Auth, and the same
+seeded users and recipes in every worker (each worker seeds its own store in its lifespan)."""
+
+import datetime
+import os
+from contextlib import asynccontextmanager
+from unittest.mock import patch
+
+import firebase_admin
+from firebase_admin import auth as firebase_auth
+
+import app as app_module
+from benchmarks.fakes import FakeAuth, FakeFirestore
+from benchmarks.server import recipe_id, user_ids
+from services import firebase
+from services.limiter import limiter
+from services.llm import generate_recipe_from_prompt
+from services.mock import LatencyModel, mock_llm_latency
+from services.recipe_store import encode_recipe
+
+USERS = int(os.environ["BENCH_USERS"])
+RECIPES_PER_USER = int(os.environ["BENCH_RECIPES_PER_USER"])
+
+store = FakeFirestore(LatencyModel.from_spec(os.environ["BENCH_FIRESTORE_LATENCY"]))
+fake_auth = FakeAuth(LatencyModel.from_spec(os.environ["BENCH_AUTH_LATENCY"]))
+firebase._db_async = store
+try:
+    firebase_admin.get_app()
+except ValueError:
+    firebase_admin.initialize_app(options={"projectId": "recipelab-benchmark"})
+firebase_auth.verify_id_token = fake_auth.verify_id_token
+firebase_auth.get_user = fake_auth.get_user
+firebase_auth.get_users = fake_auth.get_users
+limiter.enabled = False
+
+
+async def _close_firebase() -> None:
+    # The fake has no gRPC channel to close
+    pass
+
+
+app_module.close_firebase = _close_firebase
+
+
+async def seed() -> None:
+    with patch.object(mock_llm_latency, "wait", LatencyModel(0).wait):
+        recipe, _ = await generate_recipe_from_prompt("seed")
+    document = encode_recipe(recipe.model_dump())
+    now = datetime.datetime.now(datetime.timezone.utc)
+    for uid in user_ids(USERS):
+        for i in range(RECIPES_PER_USER):
+            store.collection("recipes").document(recipe_id(uid, i))._write(
+                {
+                    "uid": uid,
+                    "prompt": f"seed recipe {i}",
+                    "complexity": "standard",
+                    "diet": "standard",
+                    "time": "any",
+                    "servings": "standard",
+                    **document,
+                    "timestamp": now - datetime.timedelta(minutes=i),
+                    "archived": False,
+                }
+            )
+        favorites = [
+            {"id": recipe_id(uid, i), "title": recipe.title, "timestamp": now.isoformat()}
+            for i in range(RECIPES_PER_USER // 2)
+        ]
+        store.collection("users").document(uid)._write({"favorites": favorites})
+
+
+lifespan = app_module.app.router.lifespan_context
+
+
+@asynccontextmanager
+async def seeded_lifespan(app):
+    async with lifespan(app) as state:
+        await seed()
+        yield state
+
+
+app_module.app.router.lifespan_context = seeded_lifespan
+app = app_module.app
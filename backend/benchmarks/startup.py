@@ -0,0 +1,115 @@
+"""Startup-time benchmark.
+
+Imports the app in a fresh interpreter with ``-X importtime`` and reports where import time goes, then
+measures how long the lifespan startup takes. Run from the backend directory:
+
+    uv run python -m benchmarks.startup [--top 20] [--json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Project modules reported individually; everything else is grouped by top-level package
+PROJECT_MODULES = ("app", "auth", "config", "models", "routes", "services")
+
+LIFESPAN_SCRIPT = """
+import asyncio, json, time
+t0 = time.perf_counter()
+from app import app
+t1 = time.perf_counter()
+
+async def main():
+    async with app.router.lifespan_context(app):
+        t2 = time.perf_counter()
+    return t2
+
+t2 = asyncio.run(main())
+print(json.dumps({"import_s": t1 - t0, "lifespan_startup_s": t2 - t1}))
+"""
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """Parse ``-X importtime`` output into (module, self_us, cumulative_us) rows."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:") :].split("|", 2)
+        rows.append((module.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def summarize(rows: list[tuple[str, int, int]]) -> dict:
+    """Group self time by top-level package and report cumulative time for project modules."""
+    by_package: dict[str, int] = defaultdict(int)
+    project: dict[str, int] = {}
+    for module, self_us, cumulative_us in rows:
+        top = module.split(".")[0]
+        by_package[top] += self_us
+        if top in PROJECT_MODULES:
+            project[module] = cumulative_us
+    return {
+        "total_s": sum(self_us for _, self_us, _ in rows) / 1e6,
+        "packages": {name: us / 1e6 for name, us in sorted(by_package.items(), key=lambda kv: -kv[1])},
+        "project_modules": {name: us / 1e6 for name, us in sorted(project.items(), key=lambda kv: -kv[1])},
+    }
+
+
+def run_importtime() -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return summarize(parse_importtime(proc.stderr))
+
+
+def run_lifespan() -> dict:
+    proc = subprocess.run([sys.executable, "-c", LIFESPAN_SCRIPT], cwd=BACKEND_DIR, capture_output=True, text=True)
+    if proc.returncode != 0:
+        # Typically missing credentials (serviceAccountKey.json) outside a configured environment
+        return {"error": proc.stderr.strip().splitlines()[-1]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top", type=int, default=20, help="Number of packages to list")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    parser.add_argument("--skip-lifespan", action="store_true", help="Only measure imports")
+    args = parser.parse_args()
+
+    report = run_importtime()
+    if not args.skip_lifespan:
+        report["lifespan"] = run_lifespan()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"Total import time: {report['total_s'] * 1000:.0f} ms\n")
+    print("Self import time by package:")
+    for name, seconds in list(report["packages"].items())[: args.top]:
+        print(f"  {name:<30} {seconds * 1000:8.1f} ms")
+    print("\nCumulative import time of project modules:")
+    for name, seconds in report["project_modules"].items():
+        print(f"  {name:<30} {seconds * 1000:8.1f} ms")
+    if "lifespan" in report:
+        lifespan = report["lifespan"]
+        if "error" in lifespan:
+            print(f"\nlifespan startup failed: {lifespan['error']}")
+            return
+        print(f"\nimport app: {lifespan['import_s'] * 1000:.0f} ms")
+        print(f"lifespan startup: {lifespan['lifespan_startup_s'] * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Adaptive output budget report.
+
+Replays recipe generations and updates through services/token_budget.py in arrival order and compares the output
+tokens requested (max_tokens) with always requesting LLM_MAX_TOKENS. A call whose completion is longer than its
+budget counts as truncated: in production it costs a continuation (services/json_repair.py) instead of a failure.
+
+Usage comes from the backend's logs ("Token usage (<profile>) - ..." lines, text or JSON format) with --log, or is
+simulated from per-complexity completion lengths otherwise.
+
+Run from the backend directory:
+
+    uv run python -m benchmarks.token_budget [--log backend.log] [--requests 5000] [--json]
+"""
+
+import argparse
+import collections
+import json
+import random
+import re
+
+from config import LLM_MAX_TOKENS
+from services.token_budget import TokenBudget
+
+# "Token usage (generate/simple/standard/any/standard) - Prompt: 412, Completion: 733, Total: 1145"
+USAGE_LINE = re.compile(
+    r"(?:Token usage \((?P<profile>[\w /]+)\)|Update token usage) - Prompt: \d+, Completion: (?P<tokens>\d+)"
+)
+
+# Simulated traffic: median completion tokens per complexity, and the spread of completion lengths
+MEDIAN_TOKENS = {"simple": 650, "standard": 1000, "fancy": 1400}
+SIGMA = 0.2
+DIETS = ["standard", "standard", "standard", "high protein", "low calorie", "low carb"]
+TIMES = ["any", "any", "quick", "medium", "slow"]
+SERVINGS = {"standard": 1.0, "single": 0.9, "pair": 0.95, "party": 1.15}
+UPDATE_SHARE = 0.2
+
+
+def read_log(path: str) -> list[tuple[tuple[str, ...], int]]:
+    calls = []
+    with open(path, encoding="utf-8") as log:
+        for line in log:
+            match = USAGE_LINE.search(line)
+            if match:
+                profile = tuple(match["profile"].split("/")) if match["profile"] else ("update",)
+                calls.append((profile, int(match["tokens"])))
+    return calls
+
+
+def simulate(requests: int, seed: int = 1) -> list[tuple[tuple[str, ...], int]]:
+    rng = random.Random(seed)
+    calls = []
+    for _ in range(requests):
+        if rng.random() < UPDATE_SHARE:
+            calls.append((("update",), round(rng.lognormvariate(0, SIGMA) * MEDIAN_TOKENS["standard"])))
+            continue
+        complexity = rng.choices(list(MEDIAN_TOKENS), weights=[3, 5, 2])[0]
+        servings = rng.choice(list(SERVINGS))
+        profile = ("generate", complexity, rng.choice(DIETS), rng.choice(TIMES), servings)
+        median = MEDIAN_TOKENS[complexity] * SERVINGS[servings]
+        calls.append((profile, round(rng.lognormvariate(0, SIGMA) * median)))
+    return calls
+
+
+def run(calls: list[tuple[tuple[str, ...], int]]) -> dict:
+    budget = TokenBudget()
+    # Format: {group: {"calls", "truncated", "requested", "fixed_truncated"}}, grouped by operation and complexity
+    groups: dict[str, collections.Counter] = collections.defaultdict(collections.Counter)
+    for profile, tokens in calls:
+        max_tokens = budget.max_tokens(profile)
+        truncated = tokens > max_tokens
+        budget.record(profile, max_tokens, tokens, truncated)
+        for group in ("/".join(profile[:2]), "total"):
+            groups[group].update(
+                calls=1, truncated=truncated, requested=max_tokens, fixed_truncated=tokens > LLM_MAX_TOKENS
+            )
+
+    report = {}
+    for group, totals in sorted(groups.items(), key=lambda item: item[0] == "total"):
+        fixed = LLM_MAX_TOKENS * totals["calls"]
+        report[group] = {
+            "calls": totals["calls"],
+            "requested_tokens": totals["requested"],
+            "saved_pct": round(100 * (fixed - totals["requested"]) / fixed, 1),
+            "truncation_rate": round(totals["truncated"] / totals["calls"], 4),
+            "fixed_truncation_rate": round(totals["fixed_truncated"] / totals["calls"], 4),
+        }
+    return report
+
+
+def print_report(report: dict) -> None:
+    print(f"{'profile':<20} {'calls':>7} {'requested':>11} {'saved':>7} {'truncated':>10} {'fixed trunc':>12}")
+    for name, row in report.items():
+        print(
+            f"{name:<20} {row['calls']:>7} {row['requested_tokens']:>11} {row['saved_pct']:>6.1f}% "
+            f"{row['truncation_rate']:>10.2%} {row['fixed_truncation_rate']:>12.2%}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--log", help="Replay the token usage lines of a backend log instead of simulated traffic")
+    parser.add_argument("--requests", type=int, default=5000, help="Simulated calls")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = run(read_log(args.log) if args.log else simulate(args.requests))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
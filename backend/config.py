@@ -1,4 +1,3 @@
-import logging
 import os
 
 from dotenv import load_dotenv
@@ -7,16 +6,36 @@ from dotenv import load_dotenv
 load_dotenv(".env.local", override=True)
 load_dotenv(".env")
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-)
-logger = logging.getLogger(__name__)
+# Logging (configured in the app lifespan by services/logs.py)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# "json" for structured output, "text" for human-readable local logs
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+# Fraction of requests whose INFO logs are kept, per route template: "/api/recipe/{recipe_id}=0.1,/api/favorites=0.5"
+LOG_INFO_SAMPLE_RATIOS = os.getenv("LOG_INFO_SAMPLE_RATIOS", "")
 
 # LLM configuration
 LLM_MODEL = os.getenv("LLM_MODEL", "claude-sonnet-4-5")
+# Optional provider base URL override (used to pre-open connections during warm-up)
+LLM_API_BASE = os.getenv("LLM_API_BASE", "")
+# Alternate models (comma-separated, e.g. "gpt-4.1,gemini/gemini-2.5-pro") used for hedged requests and failover
+LLM_FALLBACK_MODELS = [model.strip() for model in os.getenv("LLM_FALLBACK_MODELS", "").split(",") if model.strip()]
+# Time allowed for a whole LLM call, across every model tried
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", 60))
+# A second model is asked once the first has run longer than this quantile of its recent latencies (or the default
+# delay until enough calls have been seen), for at most LLM_HEDGE_MAX_RATE of calls
+LLM_HEDGE_QUANTILE = float(os.getenv("LLM_HEDGE_QUANTILE", 0.95))
+LLM_HEDGE_DEFAULT_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY_SECONDS", 20))
+LLM_HEDGE_MAX_RATE = float(os.getenv("LLM_HEDGE_MAX_RATE", 0.1))
+# Completion token limit for a recipe; output cut off at the limit is continued (up to LLM_MAX_CONTINUATIONS times,
+# LLM_CONTINUATION_MAX_TOKENS each) instead of regenerated
+LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS", 2000))
+LLM_MAX_CONTINUATIONS = int(os.getenv("LLM_MAX_CONTINUATIONS", 1))
+LLM_CONTINUATION_MAX_TOKENS = int(os.getenv("LLM_CONTINUATION_MAX_TOKENS", 1000))
+# Adaptive output budgets: max_tokens is this quantile of recent completion tokens for the same request profile, plus
+# headroom, and never below LLM_MIN_TOKEN_BUDGET (LLM_MAX_TOKENS is the upper bound and the default)
+LLM_TOKEN_BUDGET_QUANTILE = float(os.getenv("LLM_TOKEN_BUDGET_QUANTILE", 0.98))
+LLM_TOKEN_BUDGET_HEADROOM = float(os.getenv("LLM_TOKEN_BUDGET_HEADROOM", 0.1))
+LLM_MIN_TOKEN_BUDGET = int(os.getenv("LLM_MIN_TOKEN_BUDGET", 600))
 
 # Gemini configuration (for image generation)
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
@@ -25,9 +44,98 @@ GEMINI_IMAGE_MODEL = os.getenv("GEMINI_IMAGE_MODEL", "gemini-2.5-flash-image")
 # Cloud Storage configuration
 GCS_BUCKET_NAME = os.getenv("GCS_BUCKET_NAME", "")
 
+# Outbound HTTP connection pool (shared by the LLM provider and Gemini clients)
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 100))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 30))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 120))
+
+# Connection pool size for Cloud Storage uploads
+GCS_POOL_MAXSIZE = int(os.getenv("GCS_POOL_MAXSIZE", 16))
+
+# Image processing configuration (worker processes used to encode image variants)
+IMAGE_ENCODE_WORKERS = int(os.getenv("IMAGE_ENCODE_WORKERS", 2))
+
 # Feature flags
 ENABLE_IMAGE_GENERATION = os.getenv("ENABLE_IMAGE_GENERATION", "false").lower() == "true"
 MOCK_MODE = os.getenv("MOCK_MODE", "false").lower() == "true"
+# MOCK_MODE latency models: "median_ms[:p95_ms[:error_rate]]"
+MOCK_LLM_LATENCY = os.getenv("MOCK_LLM_LATENCY", "1500")
+MOCK_IMAGE_LATENCY = os.getenv("MOCK_IMAGE_LATENCY", "2000")
+
+# Startup warm-up (pre-connects to dependencies before readiness is reported)
+ENABLE_WARMUP = os.getenv("ENABLE_WARMUP", "false").lower() == "true"
+WARMUP_STEP_BUDGET_SECONDS = float(os.getenv("WARMUP_STEP_BUDGET_SECONDS", 10))
+
+# Background dependency health checks
+HEALTH_CHECK_INTERVAL_SECONDS = float(os.getenv("HEALTH_CHECK_INTERVAL_SECONDS", 30))
+HEALTH_CHECK_TIMEOUT_SECONDS = float(os.getenv("HEALTH_CHECK_TIMEOUT_SECONDS", 5))
+
+# Tracing ("" disables, "otlp" posts OTLP/JSON to TRACE_OTLP_ENDPOINT, "file" appends to TRACE_EXPORT_FILE)
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "").lower()
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318")
+TRACE_EXPORT_FILE = os.getenv("TRACE_EXPORT_FILE", "traces.jsonl")
+TRACE_SAMPLE_RATIO = float(os.getenv("TRACE_SAMPLE_RATIO", 0.1))
+TRACE_EXPORT_INTERVAL_SECONDS = float(os.getenv("TRACE_EXPORT_INTERVAL_SECONDS", 5))
+
+# Event-loop watchdog (reports coroutines that block the loop; meant for development and staging)
+ENABLE_LOOP_WATCHDOG = os.getenv("ENABLE_LOOP_WATCHDOG", "false").lower() == "true"
+LOOP_WATCHDOG_INTERVAL_MS = float(os.getenv("LOOP_WATCHDOG_INTERVAL_MS", 50))
+LOOP_WATCHDOG_THRESHOLD_MS = float(os.getenv("LOOP_WATCHDOG_THRESHOLD_MS", 100))
+
+# Background jobs (in-process worker pool; state is mirrored to the Firestore "jobs" collection)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 4))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", 100))
+JOB_DRAIN_SECONDS = float(os.getenv("JOB_DRAIN_SECONDS", 8))
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", 1))
+IMAGE_JOB_TIMEOUT_SECONDS = float(os.getenv("IMAGE_JOB_TIMEOUT_SECONDS", 90))
+
+# Dependency resilience: a breaker opens after this many consecutive transient failures and allows a trial call
+# after BREAKER_RESET_SECONDS; idempotent calls are retried with jittered exponential backoff
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", 5))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", 30))
+RETRY_ATTEMPTS = int(os.getenv("RETRY_ATTEMPTS", 3))
+RETRY_BASE_DELAY_SECONDS = float(os.getenv("RETRY_BASE_DELAY_SECONDS", 0.1))
+RETRY_MAX_DELAY_SECONDS = float(os.getenv("RETRY_MAX_DELAY_SECONDS", 2))
+# How long a call waits for a free slot in its dependency's bulkhead before failing fast
+BULKHEAD_WAIT_SECONDS = float(os.getenv("BULKHEAD_WAIT_SECONDS", 1))
+# Per-call timeouts and concurrent calls allowed per dependency
+FIRESTORE_TIMEOUT_SECONDS = float(os.getenv("FIRESTORE_TIMEOUT_SECONDS", 10))
+FIRESTORE_MAX_CONCURRENCY = int(os.getenv("FIRESTORE_MAX_CONCURRENCY", 64))
+AUTH_TIMEOUT_SECONDS = float(os.getenv("AUTH_TIMEOUT_SECONDS", 5))
+AUTH_MAX_CONCURRENCY = int(os.getenv("AUTH_MAX_CONCURRENCY", 16))
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", 60))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", 4))
+GCS_TIMEOUT_SECONDS = float(os.getenv("GCS_TIMEOUT_SECONDS", 30))
+
+# Response compression (smaller bodies are sent uncompressed) and HTTP caching of recipe views
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", 6))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", 4))
+RECIPE_PUBLIC_MAX_AGE = int(os.getenv("RECIPE_PUBLIC_MAX_AGE", 60))
+SHARE_PAGE_MAX_AGE = int(os.getenv("SHARE_PAGE_MAX_AGE", 300))
+
+# Batch recipe generation (recipes generated at once per batch, and the time allowed for the whole batch)
+RECIPE_BATCH_CONCURRENCY = int(os.getenv("RECIPE_BATCH_CONCURRENCY", 4))
+RECIPE_BATCH_TIMEOUT_SECONDS = float(os.getenv("RECIPE_BATCH_TIMEOUT_SECONDS", 180))
+
+# Recipe library export (documents read per Firestore query, and bytes of NDJSON sent per response chunk)
+EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", 200))
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 64 * 1024))
+
+# Purge of archived recipes (python -m services.maintenance): age after archiving, Firestore deletes per second,
+# documents read per page and recipes whose images are deleted at once
+PURGE_ARCHIVED_AFTER_DAYS = int(os.getenv("PURGE_ARCHIVED_AFTER_DAYS", 30))
+PURGE_MAX_OPS_PER_SECOND = int(os.getenv("PURGE_MAX_OPS_PER_SECOND", 50))
+PURGE_PAGE_SIZE = int(os.getenv("PURGE_PAGE_SIZE", 100))
+PURGE_IMAGE_CONCURRENCY = int(os.getenv("PURGE_IMAGE_CONCURRENCY", 4))
+
+# Local macro computation (ingredient nutrition table, and the share of quantified ingredient lines that must match
+# it before computed macros replace the LLM's estimate)
+NUTRITION_TABLE_PATH = os.getenv(
+    "NUTRITION_TABLE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "nutrition.csv")
+)
+NUTRITION_MIN_COVERAGE = float(os.getenv("NUTRITION_MIN_COVERAGE", 0.75))
 
 # Flask configuration
 PORT = int(os.getenv("PORT", 5001))
@@ -35,5 +143,17 @@ FLASK_ENV = os.getenv("FLASK_ENV")
 LOCAL_DEV = os.getenv("LOCAL_DEV", "false").lower() == "true"
 IS_LOCAL = FLASK_ENV == "development" or LOCAL_DEV
 
+# Production server (serve.py): worker processes (0 sizes them from the CPUs and memory available), the memory each
+# worker may grow to, idle keep-alive (longer than the load balancer's, so it never reuses a connection the server
+# closed), listen backlog, requests served before a worker is replaced (plus up to the jitter, so workers do not all
+# restart at once) and how long a stopping worker may finish in-flight requests
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", 0))
+SERVER_WORKER_MEMORY_MB = int(os.getenv("SERVER_WORKER_MEMORY_MB", 512))
+SERVER_KEEPALIVE_SECONDS = int(os.getenv("SERVER_KEEPALIVE_SECONDS", 75))
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", 2048))
+SERVER_MAX_REQUESTS = int(os.getenv("SERVER_MAX_REQUESTS", 20000))
+SERVER_MAX_REQUESTS_JITTER = int(os.getenv("SERVER_MAX_REQUESTS_JITTER", 2000))
+SERVER_GRACEFUL_TIMEOUT_SECONDS = int(os.getenv("SERVER_GRACEFUL_TIMEOUT_SECONDS", LLM_DEADLINE_SECONDS + 10))
+
 # CORS configuration
 FRONTEND_URLS = os.getenv("FRONTEND_URLS", "http://localhost:5173").split(",")
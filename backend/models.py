@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -63,6 +63,15 @@ class GenerateImageRequest(BaseModel):
     recipe_id: str = ""
 
 
+class BatchGetRecipesRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=100)
+
+
+class BatchGenerateRecipesRequest(BaseModel):
+    # A week of meals with a few to spare; each one counts against the per-minute generation rate limit
+    requests: List[RecipeRequest] = Field(..., min_length=1, max_length=10)
+
+
 class AddFavoriteRequest(BaseModel):
     title: str = ""
 
@@ -86,16 +95,37 @@ class UpdateRecipeResponse(BaseModel):
 class GetRecipeResponse(BaseModel):
     recipe: Recipe
     image_url: str = ""
+    image_variants: Dict[str, Dict[str, str]] = Field(default_factory=dict)
     timestamp: str = ""
     uid: str
     displayName: str = ""
     prompt: Optional[str] = None
 
 
+class BatchGetRecipeResult(BaseModel):
+    id: str
+    recipe: Optional[GetRecipeResponse] = None
+    error: Optional[str] = None
+
+
+class BatchGenerateRecipeResult(BaseModel):
+    # Position of the request in the batch; each result has either the recipe and its ID or an error
+    index: int
+    id: Optional[str] = None
+    recipe: Optional[Recipe] = None
+    error: Optional[str] = None
+
+
+class BatchGetRecipesResponse(BaseModel):
+    # In request order; each result has either the recipe or an error
+    results: List[BatchGetRecipeResult]
+
+
 class RecipeHistoryItem(BaseModel):
     id: str
     title: str
     timestamp: str = ""
+    macros: Optional[Macros] = None
 
 
 class RecipeHistoryResponse(BaseModel):
@@ -104,6 +134,11 @@ class RecipeHistoryResponse(BaseModel):
     limit: int
 
 
+class RecipeSearchResponse(BaseModel):
+    results: List[RecipeHistoryItem]
+    query: str
+
+
 class MessageResponse(BaseModel):
     message: str
 
@@ -113,6 +148,29 @@ class MessageResponse(BaseModel):
 
 class GenerateImageResponse(BaseModel):
     image_url: str
+    # Responsive variants keyed by size ("thumb", "medium", "full") then format ("avif", "webp", "jpeg")
+    image_variants: Dict[str, Dict[str, str]] = Field(default_factory=dict)
+
+
+# Job Models
+
+
+class CreateJobRequest(BaseModel):
+    kind: str = Field(..., min_length=1, max_length=50)
+    # Kind-specific parameters, e.g. a GenerateImageRequest body for "generate-image"
+    params: Dict[str, Any] = Field(default_factory=dict)
+
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    status: str = Field(description="queued, running, succeeded, failed or cancelled")
+    progress: float = 0.0
+    stage: str = ""
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: str = ""
+    updated_at: str = ""
 
 
 # Favorites Models
@@ -147,8 +205,29 @@ class ServicesStatus(BaseModel):
     app: str = "ok"
     firebase: str = "ok"
     gemini: str = "ok"
+    llm: str = "ok"
+    storage: str = "ok"
 
 
 class HealthResponse(BaseModel):
     status: str
     services: ServicesStatus
+
+
+class LivenessResponse(BaseModel):
+    status: str
+
+
+class DependencyStatus(BaseModel):
+    status: str
+    latency_ms: Optional[float] = None
+    error: str = ""
+
+
+class ReadinessResponse(BaseModel):
+    status: str
+    checked_at: str = ""
+    dependencies: Dict[str, DependencyStatus]
+    # Circuit breaker state per dependency: "closed", "half_open" or "open"
+    breakers: Dict[str, str] = Field(default_factory=dict)
+    warmup: Dict[str, dict] = Field(default_factory=dict)
@@ -7,7 +7,9 @@ from fastapi import APIRouter, Depends, HTTPException
 
 from auth import get_current_user
 from models import AddFavoriteRequest, FavoriteItem, FavoritesResponse
-from services.firebase import db_async
+from services.firebase import get_db
+from services.resilience import DependencyUnavailable, guarded
+from services.responses import ModelResponse
 
 logger = logging.getLogger(__name__)
 
@@ -22,8 +24,9 @@ async def get_favorites(uid: Annotated[str, Depends(get_current_user)]):
     Also returns a list of just IDs for backward compatibility.
     """
     try:
-        user_ref = db_async.collection("users").document(uid)
-        user_doc = await user_ref.get()
+        user_ref = get_db().collection("users").document(uid)
+        async with guarded("firestore.get"):
+            user_doc = await user_ref.get()
 
         if user_doc.exists:
             data = user_doc.to_dict()
@@ -45,9 +48,11 @@ async def get_favorites(uid: Annotated[str, Depends(get_current_user)]):
             for f in favorites
         ]
 
-        return FavoritesResponse(favorites=favorite_items, favoriteIds=favorite_ids)
+        return ModelResponse(FavoritesResponse(favorites=favorite_items, favoriteIds=favorite_ids))
+    except DependencyUnavailable:
+        raise
     except Exception as e:
-        logger.error(f"Error getting favorites for user {uid}: {str(e)}")
+        logger.error("Error getting favorites for user %s: %s", uid, e)
         raise HTTPException(status_code=500, detail="Error retrieving favorites") from e
 
 
@@ -65,8 +70,9 @@ async def add_favorite(
     title = data.title
 
     try:
-        user_ref = db_async.collection("users").document(uid)
-        user_doc = await user_ref.get()
+        user_ref = get_db().collection("users").document(uid)
+        async with guarded("firestore.get"):
+            user_doc = await user_ref.get()
 
         if user_doc.exists:
             favorites = user_doc.to_dict().get("favorites", [])
@@ -80,7 +86,8 @@ async def add_favorite(
                 raise HTTPException(status_code=400, detail="Maximum 500 favorites allowed")
             timestamp = datetime.now(timezone.utc).isoformat()
             favorites.append({"id": recipe_id, "title": title, "timestamp": timestamp})
-            await user_ref.set({"favorites": favorites}, merge=True)
+            async with guarded("firestore.set"):
+                await user_ref.set({"favorites": favorites}, merge=True)
 
         favorite_ids = [f["id"] if isinstance(f, dict) else f for f in favorites]
         favorite_items = [
@@ -89,12 +96,12 @@ async def add_favorite(
             else FavoriteItem(id=f)
             for f in favorites
         ]
-        logger.info(f"Added favorite {recipe_id} for user {uid}")
-        return FavoritesResponse(favorites=favorite_items, favoriteIds=favorite_ids)
-    except HTTPException:
+        logger.info("Added favorite %s for user %s", recipe_id, uid)
+        return ModelResponse(FavoritesResponse(favorites=favorite_items, favoriteIds=favorite_ids))
+    except (HTTPException, DependencyUnavailable):
         raise
     except Exception as e:
-        logger.error(f"Error adding favorite for user {uid}: {str(e)}")
+        logger.error("Error adding favorite for user %s: %s", uid, e)
         raise HTTPException(status_code=500, detail="Error adding favorite") from e
 
 
@@ -109,14 +116,16 @@ async def remove_favorite(
         raise HTTPException(status_code=400, detail="Invalid recipe ID format")
 
     try:
-        user_ref = db_async.collection("users").document(uid)
-        user_doc = await user_ref.get()
+        user_ref = get_db().collection("users").document(uid)
+        async with guarded("firestore.get"):
+            user_doc = await user_ref.get()
 
         if user_doc.exists:
             favorites = user_doc.to_dict().get("favorites", [])
             # Handle both old format (string) and new format (dict)
             favorites = [f for f in favorites if (f["id"] if isinstance(f, dict) else f) != recipe_id]
-            await user_ref.set({"favorites": favorites}, merge=True)
+            async with guarded("firestore.set"):
+                await user_ref.set({"favorites": favorites}, merge=True)
         else:
             favorites = []
 
@@ -127,8 +136,10 @@ async def remove_favorite(
             else FavoriteItem(id=f)
             for f in favorites
         ]
-        logger.info(f"Removed favorite {recipe_id} for user {uid}")
-        return FavoritesResponse(favorites=favorite_items, favoriteIds=favorite_ids)
+        logger.info("Removed favorite %s for user %s", recipe_id, uid)
+        return ModelResponse(FavoritesResponse(favorites=favorite_items, favoriteIds=favorite_ids))
+    except DependencyUnavailable:
+        raise
     except Exception as e:
-        logger.error(f"Error removing favorite for user {uid}: {str(e)}")
+        logger.error("Error removing favorite for user %s: %s", uid, e)
         raise HTTPException(status_code=500, detail="Error removing favorite") from e
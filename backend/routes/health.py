@@ -1,32 +1,64 @@
 import logging
 
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Request, Response
 from services.limiter import limiter
-from models import HealthResponse, ServicesStatus
-from services.firebase import db_async
+from models import DependencyStatus, HealthResponse, LivenessResponse, ReadinessResponse, ServicesStatus
+from services.health import health_monitor
+from services.resilience import breaker_states
+from services.warmup import warmup
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api", tags=["health"])
 
 
+@router.get("/health/live", response_model=LivenessResponse)
+async def liveness():
+    """Liveness probe: the process is up and serving requests. Performs no I/O."""
+    return LivenessResponse(status="ok")
+
+
+@router.get("/health/ready", response_model=ReadinessResponse)
+async def readiness(response: Response):
+    """Readiness probe backed by the cached results of the background dependency checks."""
+    if not warmup.ready:
+        response.status_code = 503
+        return ReadinessResponse(status="warming_up", dependencies={}, warmup=warmup.report)
+
+    results = await health_monitor.get_results()
+    if not health_monitor.is_ready():
+        response.status_code = 503
+        overall_status = "unavailable"
+    else:
+        overall_status = "ok" if health_monitor.is_healthy() else "degraded"
+
+    return ReadinessResponse(
+        status=overall_status,
+        checked_at=health_monitor.checked_at.isoformat() if health_monitor.checked_at else "",
+        dependencies={name: DependencyStatus(**result) for name, result in results.items()},
+        breakers=breaker_states(),
+        warmup=warmup.report,
+    )
+
+
 @router.get("/health", response_model=HealthResponse)
 @limiter.limit("30/minute")
-async def health(request: Request):
-    """Simple health check to verify services are up."""
+async def health(request: Request, response: Response):
+    """Simple health check to verify services are up (served from the cached dependency checks)."""
     services_status = ServicesStatus()
 
-    # Check Firebase connection
-    try:
-        query = db_async.collection("recipes").limit(1)
-        async for _ in query.stream():
-            break
-    except Exception as e:
-        services_status.firebase = "error"
-        logger.error(f"Firebase health check failed: {str(e)}")
+    # Not ready until the startup warm-up has finished
+    if not warmup.ready:
+        response.status_code = 503
+        return HealthResponse(status="warming_up", services=services_status)
+
+    results = await health_monitor.get_results()
+    services_status.firebase = results["firestore"]["status"]
+    services_status.llm = results["llm"]["status"]
+    services_status.gemini = results["gemini"]["status"]
+    services_status.storage = results["storage"]["status"]
 
     # Overall status
-    status_values = [services_status.app, services_status.firebase, services_status.gemini]
-    overall_status = "ok" if all(v == "ok" for v in status_values) else "degraded"
+    overall_status = "ok" if health_monitor.is_healthy() else "degraded"
 
     return HealthResponse(status=overall_status, services=services_status)
@@ -0,0 +1,73 @@
+import logging
+from typing import Annotated
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from auth import get_current_user
+from models import CreateJobRequest, JobResponse
+from services.jobs import JobQueueFull, job_manager
+from services.limiter import limiter
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api", tags=["jobs"])
+
+
+def _job_response(job_id: str, data: dict) -> dict:
+    return {"id": job_id, **{field: data.get(field) for field in JobResponse.model_fields if field in data}}
+
+
+async def _owned_job(job_id: str, uid: str) -> dict:
+    data = await job_manager.get(job_id)
+    # Report other users' jobs as missing so job IDs cannot be probed
+    if data is None or data.get("uid") != uid:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return data
+
+
+@router.post("/jobs", response_model=JobResponse, status_code=202)
+@limiter.limit("5/minute")
+async def create_job(
+    request: Request,
+    data: CreateJobRequest,
+    uid: Annotated[str, Depends(get_current_user)],
+):
+    """Queue a background job. Poll GET /api/jobs/{id} (or stream it) for progress and the result."""
+    try:
+        job = await job_manager.submit(uid, data.kind, data.params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail="Too many jobs in progress, try again later") from e
+    return _job_response(job.id, job.data)
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(
+    request: Request,
+    job_id: str,
+    uid: Annotated[str, Depends(get_current_user)],
+):
+    """Return a job's status. With "Accept: text/event-stream", stream every change as an SSE event until it ends."""
+    data = await _owned_job(job_id, uid)
+
+    if "text/event-stream" not in request.headers.get("accept", ""):
+        return _job_response(job_id, data)
+
+    async def events():
+        async for data in job_manager.watch(job_id):
+            yield b"data: " + orjson.dumps(_job_response(job_id, data)) + b"\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@router.post("/jobs/{job_id}:cancel", response_model=JobResponse)
+async def cancel_job(
+    job_id: str,
+    uid: Annotated[str, Depends(get_current_user)],
+):
+    """Cancel a queued or running job. Finished jobs are returned unchanged."""
+    await _owned_job(job_id, uid)
+    return _job_response(job_id, await job_manager.cancel(job_id))
@@ -5,7 +5,8 @@ from fastapi import APIRouter, Depends, HTTPException
 
 from auth import get_current_user
 from models import Preferences, PreferencesResponse, PreferencesUpdate
-from services.firebase import db_async
+from services.firebase import get_db
+from services.resilience import DependencyUnavailable, guarded
 
 logger = logging.getLogger(__name__)
 
@@ -16,8 +17,9 @@ router = APIRouter(prefix="/api", tags=["preferences"])
 async def get_preferences(uid: Annotated[str, Depends(get_current_user)]):
     """Get the user's preferences."""
     try:
-        user_ref = db_async.collection("users").document(uid)
-        user_doc = await user_ref.get()
+        user_ref = get_db().collection("users").document(uid)
+        async with guarded("firestore.get"):
+            user_doc = await user_ref.get()
 
         if user_doc.exists:
             data = user_doc.to_dict()
@@ -27,8 +29,10 @@ async def get_preferences(uid: Annotated[str, Depends(get_current_user)]):
             preferences = Preferences()
 
         return PreferencesResponse(preferences=preferences)
+    except DependencyUnavailable:
+        raise
     except Exception as e:
-        logger.error(f"Error getting preferences for user {uid}: {str(e)}")
+        logger.error("Error getting preferences for user %s: %s", uid, e)
         raise HTTPException(status_code=500, detail="Error retrieving preferences") from e
 
 
@@ -39,16 +43,19 @@ async def update_preferences(
 ):
     """Update the user's preferences."""
     try:
-        user_ref = db_async.collection("users").document(uid)
+        user_ref = get_db().collection("users").document(uid)
 
         preferences = Preferences(
             imageGenerationEnabled=data.imageGenerationEnabled,
         )
 
-        await user_ref.set({"preferences": preferences.model_dump()}, merge=True)
+        async with guarded("firestore.set"):
+            await user_ref.set({"preferences": preferences.model_dump()}, merge=True)
 
-        logger.info(f"Updated preferences for user {uid}")
+        logger.info("Updated preferences for user %s", uid)
         return PreferencesResponse(preferences=preferences)
+    except DependencyUnavailable:
+        raise
     except Exception as e:
-        logger.error(f"Error updating preferences for user {uid}: {str(e)}")
+        logger.error("Error updating preferences for user %s: %s", uid, e)
         raise HTTPException(status_code=500, detail="Error updating preferences") from e
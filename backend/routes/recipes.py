@@ -3,91 +3,180 @@ import logging
 import re
 from typing import Annotated
 
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
-from firebase_admin import auth as firebase_auth
+from fastapi.responses import StreamingResponse
 from firebase_admin import firestore
 from google.cloud.firestore_v1.base_query import FieldFilter
+from pydantic_core import to_json
 from services.limiter import limiter
 
 from auth import get_current_user, get_current_user_optional
+from config import RECIPE_PUBLIC_MAX_AGE
 from models import (
+    BatchGenerateRecipesRequest,
+    BatchGetRecipeResult,
+    BatchGetRecipesRequest,
+    BatchGetRecipesResponse,
     GenerateRecipeResponse,
     GetRecipeResponse,
+    Macros,
     MessageResponse,
+    Recipe,
     RecipeHistoryItem,
     RecipeHistoryResponse,
     RecipeRequest,
+    RecipeSearchResponse,
     UpdateRecipeRequest,
     UpdateRecipeResponse,
 )
-from services.cache import recipe_cache
-from services.firebase import db_async
-from services.llm import generate_recipe_from_prompt, update_recipe_with_modifications
+from services.cache import RECIPE_CACHE_FIELDS, cache_recipe_document, recipe_cache, recipe_cache_entry
+from services.export import export_recipes, gzip_chunks
+from services.firebase import get_db, get_display_names
+from services.generation import (
+    add_recipe_document,
+    generate_recipe_batch,
+    generate_recipe_from_request,
+    new_recipe_document,
+)
+from services.llm import update_recipe_with_modifications
+from services.metrics import RECIPE_UPDATES, timed
+from services.nutrition import compute_macros_batch, recompute_macros
+from services.recipe_store import (
+    BODY_PROJECTION,
+    TITLE_PROJECTION,
+    decode_recipe,
+    read_document,
+    recipe_summary,
+    recipe_update_fields,
+    upgrade_in_background,
+)
+from services.resilience import DependencyUnavailable, guarded
+from services.responses import ModelResponse, conditional_response
+from services.scaling import apply_quick_edit, parse_modification
+from services.search import index_recipe, search_recipes, unindex_recipe
 from services.usage import usage_tracker
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api", tags=["recipes"])
 
+# Fields read for a full recipe view: the cached document fields plus the stored recipe body
+RECIPE_VIEW_PROJECTION = list(dict.fromkeys([*RECIPE_CACHE_FIELDS, *BODY_PROJECTION]))
+# Fields read for a history page with macros: titles come from the summary or the full recipe read with the body
+HISTORY_MACROS_PROJECTION = list(dict.fromkeys([*BODY_PROJECTION, "summary.title", "timestamp"]))
+
+
+# Recipe generations share one budget across the single and batch endpoints, charged per generated recipe
+GENERATION_RATE_LIMIT = "10/minute"
+
+
+def _generation_cost(request: Request) -> int:
+    return getattr(request.state, "generation_count", 1)
+
+
+def _counted_batch(request: Request, data: BatchGenerateRecipesRequest) -> BatchGenerateRecipesRequest:
+    """Parse a batch request and record its size, which the rate limit charges before the endpoint runs."""
+    request.state.generation_count = len(data.requests)
+    return data
+
 
 @router.post("/generate-recipe", response_model=GenerateRecipeResponse)
-@limiter.limit("10/minute")
+@limiter.shared_limit(GENERATION_RATE_LIMIT, scope="generation", cost=_generation_cost)
 async def generate_recipe(
     request: Request,
     data: RecipeRequest,
     uid: Annotated[str | None, Depends(get_current_user_optional)] = None,
 ):
-    logger.info(f"Generate recipe request from user {uid if uid else 'guest'}")
+    logger.info("Generate recipe request from user %s", uid if uid else "guest")
 
     if not uid:
         # Check guest limit
         client_ip = request.client.host
         if not usage_tracker.check_limit(client_ip, limit=1):
-             logger.warning(f"Guest limit exceeded for IP {client_ip}")
+             logger.warning("Guest limit exceeded for IP %s", client_ip)
              raise HTTPException(status_code=403, detail="Guest recipe limit reached. Please sign up to continue.")
         
         # Increment usage
         usage_tracker.increment_usage(client_ip)
 
     try:
-        recipe, _ = await generate_recipe_from_prompt(
-            data.prompt,
-            complexity=data.complexity,
-            diet=data.diet,
-            time=data.time,
-            servings=data.servings,
-        )
-        recipe_dict = recipe.model_dump()
-        
+        recipe = await generate_recipe_from_request(data)
         recipe_id = "guest_" + str(datetime.datetime.now().timestamp())
 
         if uid:
-            # Save the generated recipe into Firestore only for logged-in users
-            recipe_data = {
-                "uid": uid,
-                "prompt": data.prompt,
-                "complexity": data.complexity,
-                "diet": data.diet,
-                "time": data.time,
-                "servings": data.servings,
-                "recipe": recipe_dict,
-                "timestamp": datetime.datetime.now(datetime.timezone.utc),
-                "archived": False,
-            }
-
-            _, doc_ref = await db_async.collection("recipes").add(recipe_data)
+            # Save the generated recipe into Firestore only for logged-in users, with its search index entries
+            recipe_data = new_recipe_document(uid, data, recipe)
+            doc_ref = get_db().collection("recipes").document()
             recipe_id = doc_ref.id
+            batch = get_db().batch()
+            add_recipe_document(batch, doc_ref, recipe_data, recipe)
+            async with guarded("firestore.commit"):
+                await batch.commit()
 
             # Update cache
-            cache_key = f"recipe_{recipe_id}"
-            recipe_cache[cache_key] = recipe_dict
+            cache_recipe_document(recipe_id, {**recipe_data, "recipe": recipe})
 
-        return {"recipe": recipe_dict, "id": recipe_id}
+        # The recipe was validated when parsed from the LLM output, so skip response validation
+        return ModelResponse(GenerateRecipeResponse.model_construct(recipe=recipe, id=recipe_id))
+    except DependencyUnavailable:
+        raise
     except Exception as e:
-        logger.error(f"Error generating recipe: {str(e)}")
+        logger.error("Error generating recipe: %s", e)
         raise HTTPException(status_code=500, detail="Error generating recipe") from e
 
 
+@router.post("/generate-recipes:batch")
+@limiter.shared_limit(GENERATION_RATE_LIMIT, scope="generation", cost=_generation_cost)
+async def generate_recipes_batch(
+    request: Request,
+    data: Annotated[BatchGenerateRecipesRequest, Depends(_counted_batch)],
+    uid: Annotated[str, Depends(get_current_user)],
+):
+    """Generate several recipes at once (e.g. a weekly meal plan), streamed as NDJSON.
+
+    Each line is a BatchGenerateRecipeResult, in completion order. A final {"done": true, "saved": n} line confirms
+    the recipes were saved; if saving fails the last line is {"error": ...} instead and the IDs are not valid.
+    """
+    logger.info("Batch generate request for %d recipes from user %s", len(data.requests), uid)
+
+    async def results():
+        saved = 0
+        try:
+            async for result in generate_recipe_batch(uid, data.requests):
+                saved += result.id is not None
+                yield to_json(result) + b"\n"
+        except Exception as e:
+            logger.error("Error saving batch recipes for user %s: %s", uid, e)
+            yield orjson.dumps({"error": "Error saving recipes"}) + b"\n"
+            return
+        yield orjson.dumps({"done": True, "saved": saved}) + b"\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+
+@router.get("/recipes/export")
+@limiter.limit("5/minute")
+async def export_recipe_library(
+    request: Request,
+    uid: Annotated[str, Depends(get_current_user)],
+    cursor: Annotated[str | None, Query(pattern=r"^[a-zA-Z0-9]+$", max_length=100)] = None,
+    gzip: bool = False,
+):
+    """Stream all of the user's recipes as NDJSON (gzip-compressed with ?gzip=true), one document per line in ID
+    order, ending with {"done": true, "count": n}.
+
+    After a disconnect, pass the ID of the last line received as `cursor` to continue from the next recipe.
+    """
+    logger.info("Export request from user %s (cursor %s)", uid, cursor)
+    chunks = export_recipes(uid, cursor)
+    filename = "recipes.ndjson.gz" if gzip else "recipes.ndjson"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"}
+    if gzip:
+        return StreamingResponse(gzip_chunks(chunks), media_type="application/gzip", headers=headers)
+    return StreamingResponse(chunks, media_type="application/x-ndjson", headers=headers)
+
+
 @router.post("/update-recipe", response_model=UpdateRecipeResponse)
 @limiter.limit("10/minute")
 async def update_recipe(
@@ -98,10 +187,11 @@ async def update_recipe(
     recipe_id = data.id.strip()
     modifications = data.modifications.strip()
 
-    logger.info(f"Update recipe request for recipe {recipe_id} from user {uid}")
+    logger.info("Update recipe request for recipe %s from user %s", recipe_id, uid)
 
-    doc_ref = db_async.collection("recipes").document(recipe_id)
-    doc = await doc_ref.get()
+    doc_ref = get_db().collection("recipes").document(recipe_id)
+    async with guarded("firestore.get"):
+        doc = await doc_ref.get()
     if not doc.exists:
         raise HTTPException(status_code=404, detail="Recipe not found")
 
@@ -109,33 +199,69 @@ async def update_recipe(
 
     # Check if the recipe belongs to the current user
     if data_doc.get("uid") != uid:
-        logger.warning(f"Unauthorized access attempt to recipe {recipe_id} by user {uid}")
+        logger.warning("Unauthorized access attempt to recipe %s by user %s", recipe_id, uid)
         raise HTTPException(status_code=403, detail="Unauthorized access")
 
     try:
-        updated_recipe, _ = await update_recipe_with_modifications(data.original_recipe.model_dump(), modifications)
+        original_recipe = data.original_recipe.model_dump()
+        # Servings, scaling and unit conversion requests are applied locally; everything else goes to the LLM
+        quick_edit = parse_modification(modifications)
+        updated_recipe_dict = apply_quick_edit(original_recipe, quick_edit) if quick_edit else None
+        if updated_recipe_dict is not None:
+            RECIPE_UPDATES.inc(path="quick_edit")
+            updated_recipe = Recipe.model_validate(updated_recipe_dict)
+        else:
+            RECIPE_UPDATES.inc(path="llm")
+            updated_recipe, _ = await update_recipe_with_modifications(original_recipe, modifications)
+        # Keep the macros consistent with the updated ingredients
+        updated_recipe = recompute_macros(updated_recipe)
         updated_recipe_dict = updated_recipe.model_dump()
 
-        # Update the existing document in Firestore
-        await doc_ref.update(
-            {
-                "recipe": updated_recipe_dict,
-                "timestamp": datetime.datetime.now(datetime.timezone.utc),
-            }
-        )
+        # Update the existing document and its search index entries in Firestore
+        timestamp = datetime.datetime.now(datetime.timezone.utc)
+        batch = get_db().batch()
+        batch.update(doc_ref, {**recipe_update_fields(updated_recipe_dict), "timestamp": timestamp})
+        index_recipe(batch, uid, recipe_id, updated_recipe_dict, timestamp, previous=decode_recipe(data_doc))
+        async with guarded("firestore.commit"):
+            await batch.commit()
 
         # Update cache
-        cache_key = f"recipe_{recipe_id}"
-        recipe_cache[cache_key] = updated_recipe_dict
+        cache_recipe_document(recipe_id, {**data_doc, "recipe": updated_recipe, "timestamp": timestamp})
 
-        return {"recipe": updated_recipe_dict}
+        return ModelResponse(UpdateRecipeResponse.model_construct(recipe=updated_recipe))
+    except DependencyUnavailable:
+        raise
     except Exception as e:
-        logger.error(f"Error updating recipe {recipe_id}: {str(e)}")
+        logger.error("Error updating recipe %s: %s", recipe_id, e)
         raise HTTPException(status_code=500, detail="Error updating recipe") from e
 
 
+def _recipe_view(entry: dict, display_name: str, current_uid: str | None) -> GetRecipeResponse:
+    """Build the response for a cached recipe document entry (whose recipe is already validated)."""
+    uid = entry.get("uid", "")
+    return GetRecipeResponse.model_construct(
+        recipe=entry["recipe"],
+        image_url=entry.get("image_url", ""),
+        image_variants=entry.get("image_variants", {}),
+        timestamp=str(entry.get("timestamp", "")),
+        uid=uid,
+        displayName=display_name,
+        # Include prompt only if the current user is the recipe owner
+        prompt=entry.get("prompt", "") if current_uid and current_uid == uid else None,
+    )
+
+
+async def _display_names(uids: set[str]) -> dict[str, str]:
+    try:
+        return await get_display_names(uids)
+    except Exception as e:
+        logger.warning("Could not get user info for %s: %s", ", ".join(sorted(uids)), e)
+        return {}
+
+
 @router.get("/recipe/{recipe_id}", response_model=GetRecipeResponse)
 async def get_recipe(
+    request: Request,
     recipe_id: str,
     current_uid: Annotated[str | None, Depends(get_current_user_optional)] = None,
 ):
@@ -144,49 +270,81 @@ async def get_recipe(
         if not re.match(r"^[a-zA-Z0-9]+$", recipe_id):
             raise HTTPException(status_code=400, detail="Invalid recipe ID format")
 
-        doc_ref = db_async.collection("recipes").document(recipe_id)
-        doc = await doc_ref.get()
-        if not doc.exists:
-            raise HTTPException(status_code=404, detail="Recipe not found")
-
-        data = doc.to_dict()
-
         # Get recipe data from cache or Firestore
-        cache_key = f"recipe_{recipe_id}"
-        recipe = recipe_cache.get(cache_key, data.get("recipe", ""))
-        if recipe != data.get("recipe", ""):
-            recipe_cache[cache_key] = data.get("recipe", "")
-
-        uid = data.get("uid", "")
-        timestamp = data.get("timestamp", "")
-        image_url = data.get("image_url", "")
+        entry = recipe_cache.get(f"recipe_{recipe_id}")
+        if entry is None:
+            doc_ref = get_db().collection("recipes").document(recipe_id)
+            async with guarded("firestore.get"):
+                doc = await doc_ref.get(field_paths=RECIPE_VIEW_PROJECTION)
+            if not doc.exists:
+                raise HTTPException(status_code=404, detail="Recipe not found")
+            entry = cache_recipe_document(recipe_id, read_document(doc.to_dict()))
+            upgrade_in_background(doc)
+
+        uid = entry.get("uid", "")
+        display_names = await _display_names({uid})
+        response = ModelResponse(_recipe_view(entry, display_names.get(uid, ""), current_uid))
+        # The owner's view includes the prompt, so only theirs is private; revisits revalidate with If-None-Match
+        cache_control = "private, no-cache" if current_uid == uid else f"public, max-age={RECIPE_PUBLIC_MAX_AGE}"
+        return conditional_response(request, response, cache_control, vary="Authorization")
+    except (HTTPException, DependencyUnavailable):
+        raise
+    except Exception as e:
+        logger.exception("Error retrieving recipe %s: %s", recipe_id, e)
+        raise HTTPException(status_code=500, detail="Error retrieving recipe") from e
 
-        # Get user info once and cache it
-        user_info = {"displayName": ""}
-        try:
-            user = firebase_auth.get_user(uid)
-            user_info["displayName"] = user.display_name if user.display_name else ""
-        except Exception as e:
-            logger.warning(f"Could not get user info for {uid}: {str(e)}")
-
-        response = {
-            "recipe": recipe,
-            "image_url": image_url,
-            "timestamp": str(timestamp),
-            "uid": uid,
-            "displayName": user_info["displayName"],
-        }
 
-        # Include prompt only if the current user is the recipe owner
-        if current_uid and current_uid == uid:
-            response["prompt"] = data.get("prompt", "")
+@router.post("/recipes:batchGet", response_model=BatchGetRecipesResponse)
+async def batch_get_recipes(
+    data: BatchGetRecipesRequest,
+    current_uid: Annotated[str | None, Depends(get_current_user_optional)] = None,
+):
+    """Fetch up to 100 recipes in one request.
 
-        return response
-    except HTTPException:
+    Cached recipes are served from memory and the rest are read with a single Firestore get_all, without being added
+    to the cache; owners' display names come from one batched Auth lookup. Results are returned in request order,
+    each with either the recipe or an error.
+    """
+    try:
+        entries: dict[str, dict] = {}
+        missing_refs = []
+        for recipe_id in dict.fromkeys(data.ids):
+            if not re.match(r"^[a-zA-Z0-9]+$", recipe_id):
+                continue
+            entry = recipe_cache.get(f"recipe_{recipe_id}")
+            if entry is not None:
+                entries[recipe_id] = entry
+            else:
+                missing_refs.append(get_db().collection("recipes").document(recipe_id))
+
+        if missing_refs:
+            async with guarded("firestore.get_all") as span:
+                span.set_attribute("firestore.documents", len(missing_refs))
+                async for doc in get_db().get_all(missing_refs, field_paths=RECIPE_VIEW_PROJECTION):
+                    if doc.exists:
+                        # Not cached: a full batch would evict every hot single-recipe view from recipe_cache
+                        entries[doc.id] = recipe_cache_entry(read_document(doc.to_dict()))
+                        upgrade_in_background(doc)
+
+        display_names = await _display_names({entry.get("uid", "") for entry in entries.values()} - {""})
+
+        results = []
+        for recipe_id in data.ids:
+            entry = entries.get(recipe_id)
+            if entry is not None:
+                uid = entry.get("uid", "")
+                view = _recipe_view(entry, display_names.get(uid, ""), current_uid)
+                results.append(BatchGetRecipeResult.model_construct(id=recipe_id, recipe=view))
+            elif not re.match(r"^[a-zA-Z0-9]+$", recipe_id):
+                results.append(BatchGetRecipeResult.model_construct(id=recipe_id, error="Invalid recipe ID format"))
+            else:
+                results.append(BatchGetRecipeResult.model_construct(id=recipe_id, error="Recipe not found"))
+        return ModelResponse(BatchGetRecipesResponse.model_construct(results=results))
+    except DependencyUnavailable:
         raise
     except Exception as e:
-        logger.exception(f"Error retrieving recipe {recipe_id}: {str(e)}")
-        raise HTTPException(status_code=500, detail="Error retrieving recipe") from e
+        logger.exception("Error batch retrieving %s recipes: %s", len(data.ids), e)
+        raise HTTPException(status_code=500, detail="Error retrieving recipes") from e
 
 
 @router.get("/recipe-history", response_model=RecipeHistoryResponse)
@@ -194,40 +352,82 @@ async def get_recipe_history(
     uid: Annotated[str, Depends(get_current_user)],
     limit: Annotated[int, Query(le=50)] = 20,
     offset: int = 0,
+    include_macros: bool = False,
 ):
-    logger.info(f"Recipe history request from user {uid}")
+    logger.info("Recipe history request from user %s", uid)
 
     try:
         # Create an efficient query with pagination
         recipes_ref = (
-            db_async.collection("recipes")
+            get_db().collection("recipes")
             .where(filter=FieldFilter("uid", "==", uid))
             .where(filter=FieldFilter("archived", "==", False))
             .order_by("timestamp", direction=firestore.Query.DESCENDING)
             .limit(limit)
             .offset(offset)
+            # Macros need the ingredients, so only read the recipe bodies when they are requested
+            .select(HISTORY_MACROS_PROJECTION if include_macros else TITLE_PROJECTION)
         )
 
         docs = recipes_ref.stream()
         history = []
-
-        async for doc in docs:
-            data = doc.to_dict()
-            recipe = data.get("recipe", {})
-            history.append(
-                RecipeHistoryItem(
-                    id=doc.id,
-                    title=recipe.get("title", "") if isinstance(recipe, dict) else "",
-                    timestamp=str(data.get("timestamp", "")),
+        recipes = []
+
+        async with guarded("firestore.query"):
+            async for doc in docs:
+                data = doc.to_dict()
+                history.append(
+                    RecipeHistoryItem(
+                        id=doc.id,
+                        title=recipe_summary(data).get("title", ""),
+                        timestamp=str(data.get("timestamp", "")),
+                    )
                 )
-            )
+                if include_macros:
+                    recipes.append(decode_recipe(data))
+
+        if include_macros:
+            # One vectorized pass over the whole page, falling back to the stored estimates
+            with timed("nutrition.compute"):
+                computed = compute_macros_batch(recipes)
+            for item, recipe, macros in zip(history, recipes, computed, strict=True):
+                macros = macros or recipe.get("macros")
+                item.macros = Macros.model_validate(macros) if macros else None
 
         return {"history": history, "offset": offset, "limit": limit}
+    except DependencyUnavailable:
+        raise
     except Exception as e:
-        logger.error(f"Error retrieving recipe history for user {uid}: {str(e)}")
+        logger.error("Error retrieving recipe history for user %s: %s", uid, e)
         raise HTTPException(status_code=500, detail="Error retrieving recipe history") from e
 
 
+@router.get("/recipes/search", response_model=RecipeSearchResponse)
+async def search_recipe_library(
+    uid: Annotated[str, Depends(get_current_user)],
+    q: Annotated[str, Query(min_length=1, max_length=200)],
+    limit: Annotated[int, Query(ge=1, le=50)] = 20,
+):
+    """Search the titles, ingredients and notes of the user's non-archived recipes.
+
+    Every word of the query must match the start of a word in the recipe.
+    """
+    try:
+        results = await search_recipes(uid, q, limit=limit)
+        return {
+            "results": [
+                RecipeHistoryItem(id=result["id"], title=result["title"], timestamp=str(result["timestamp"]))
+                for result in results
+            ],
+            "query": q,
+        }
+    except DependencyUnavailable:
+        raise
+    except Exception as e:
+        logger.error("Error searching recipes for user %s: %s", uid, e)
+        raise HTTPException(status_code=500, detail="Error searching recipes") from e
+
+
 @router.patch("/recipe/{recipe_id}/archive", response_model=MessageResponse)
 async def archive_recipe(
     recipe_id: str,
@@ -237,34 +437,38 @@ async def archive_recipe(
     if not re.match(r"^[a-zA-Z0-9]+$", recipe_id):
         raise HTTPException(status_code=400, detail="Invalid recipe ID format")
 
-    logger.info(f"Archive recipe request for recipe {recipe_id} from user {uid}")
+    logger.info("Archive recipe request for recipe %s from user %s", recipe_id, uid)
 
     try:
-        doc_ref = db_async.collection("recipes").document(recipe_id)
-        doc = await doc_ref.get()
+        doc_ref = get_db().collection("recipes").document(recipe_id)
+        async with guarded("firestore.get"):
+            doc = await doc_ref.get(field_paths=["uid", *BODY_PROJECTION])
         if not doc.exists:
             raise HTTPException(status_code=404, detail="Recipe not found")
 
         data = doc.to_dict()
         if data.get("uid") != uid:
-            logger.warning(f"Unauthorized archive attempt for recipe {recipe_id} by user {uid}")
+            logger.warning("Unauthorized archive attempt for recipe %s by user %s", recipe_id, uid)
             raise HTTPException(status_code=403, detail="Unauthorized access")
 
-        await doc_ref.update(
+        batch = get_db().batch()
+        batch.update(
+            doc_ref,
             {
                 "archived": True,
                 "archivedAt": datetime.datetime.now(datetime.timezone.utc),
-            }
+            },
         )
+        unindex_recipe(batch, uid, recipe_id, decode_recipe(data))
+        async with guarded("firestore.commit"):
+            await batch.commit()
 
         # Remove from cache if present
-        cache_key = f"recipe_{recipe_id}"
-        if cache_key in recipe_cache:
-            del recipe_cache[cache_key]
+        recipe_cache.pop(f"recipe_{recipe_id}", None)
 
         return {"message": "Recipe archived successfully"}
-    except HTTPException:
+    except (HTTPException, DependencyUnavailable):
         raise
     except Exception as e:
-        logger.error(f"Error archiving recipe {recipe_id}: {str(e)}")
+        logger.error("Error archiving recipe %s: %s", recipe_id, e)
         raise HTTPException(status_code=500, detail="Error archiving recipe") from e
@@ -5,9 +5,12 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import HTMLResponse
 from services.limiter import limiter
-from config import FRONTEND_URLS, IS_LOCAL
+from config import FRONTEND_URLS, IS_LOCAL, SHARE_PAGE_MAX_AGE
 from services.cache import recipe_cache
-from services.firebase import db_async
+from services.firebase import get_db
+from services.resilience import guarded
+from services.recipe_store import SUMMARY_PROJECTION, recipe_summary
+from services.responses import conditional_response
 
 logger = logging.getLogger(__name__)
 
@@ -47,57 +50,42 @@ async def share_recipe_preview(request: Request, recipe_id: str, origin: str | N
         if origin in allowed_origins:
             frontend_url = origin
         else:
-            logger.warning(f"Invalid origin provided: {origin}. Falling back to default.")
+            logger.warning("Invalid origin provided: %s. Falling back to default.", origin)
 
     target_url = f"{frontend_url}/recipe/{recipe_id}"
     
     try:
         # Try to get recipe data from cache first
-        cache_key = f"recipe_{recipe_id}"
-        recipe_data = recipe_cache.get(cache_key)
-        
-        image_url = ""
+        entry = recipe_cache.get(f"recipe_{recipe_id}")
+
         title = "Check out this recipe on RecipeLab"
         description = "I found this amazing recipe using RecipeLab. Click to view the full recipe!"
-        
-        if not recipe_data:
-            # Fallback to Firestore if not in cache
-            doc_ref = db_async.collection("recipes").document(recipe_id)
-            doc = await doc_ref.get()
-            
-            if doc.exists:
-                data = doc.to_dict()
-                recipe_data = data.get("recipe", {})
-                image_url = data.get("image_url", "")
-                
-                # Update cache lightly if we found it (optional, but good for consistency)
-                # We won't fully hydrate the cache here to avoid complexity, 
-                # but we could if we wanted to match recipes.py logic exactly.
-        
-        if recipe_data:
-            if isinstance(recipe_data, dict):
-                recipe_title = recipe_data.get("title", "Recipe")
-                # Strip HTML tags from title if present
-                title = re.sub(r'<[^>]*>', '', recipe_title)
-                
-                recipe_desc = recipe_data.get("description", "")
-                # Strip HTML tags and truncate description
-                clean_desc = re.sub(r'<[^>]*>', '', recipe_desc)
-                if len(clean_desc) > 200:
-                    clean_desc = clean_desc[:197] + "..."
-                if clean_desc:
-                    description = clean_desc
 
-            # If we fetched from cache, we might not have the image URL directly in the recipe dict
-            # depending on how it's stored. In recipes.py, image_url is at the top level of the doc.
-            # If we only got recipe_data from cache (which is just the 'recipe' field), we might miss image_url.
-            # However, for the share preview, a missing image is acceptable but not ideal.
-            # Let's try to fetch the doc if image_url is missing and we really want it.
-            # For performance, we might skip the extra DB call if cache hits but has no image.
-            # But let's be robust:
-            if not image_url and not recipe_data: 
-                # We already tried DB above if not recipe_data.
-                pass
+        if entry is not None:
+            recipe = entry["recipe"]
+            recipe_data = {"title": recipe.title, "description": recipe.description}
+            image_url = entry.get("image_url", "")
+        else:
+            # Fallback to Firestore if not in cache, reading only the summary fields
+            doc_ref = get_db().collection("recipes").document(recipe_id)
+            async with guarded("firestore.get"):
+                doc = await doc_ref.get(field_paths=SUMMARY_PROJECTION)
+            data = doc.to_dict() if doc.exists else {}
+            recipe_data = recipe_summary(data)
+            image_url = data.get("image_url", "")
+
+        if recipe_data and isinstance(recipe_data, dict):
+            recipe_title = recipe_data.get("title", "Recipe")
+            # Strip HTML tags from title if present
+            title = re.sub(r'<[^>]*>', '', recipe_title)
+
+            recipe_desc = recipe_data.get("description", "")
+            # Strip HTML tags and truncate description
+            clean_desc = re.sub(r'<[^>]*>', '', recipe_desc)
+            if len(clean_desc) > 200:
+                clean_desc = clean_desc[:197] + "..."
+            if clean_desc:
+                description = clean_desc
 
         # Construct the HTML response
         html_content = f"""
@@ -168,10 +156,13 @@ async def share_recipe_preview(request: Request, recipe_id: str, origin: str | N
         </html>
         """
         
-        return HTMLResponse(content=html_content, status_code=200)
+        # The preview is the same for every visitor, so link unfurlers and CDNs may cache it
+        return conditional_response(
+            request, HTMLResponse(content=html_content, status_code=200), f"public, max-age={SHARE_PAGE_MAX_AGE}"
+        )
 
     except Exception as e:
-        logger.error(f"Error serving share page for {recipe_id}: {str(e)}")
+        logger.error("Error serving share page for %s: %s", recipe_id, e)
         # Even if error, try to redirect to frontend
         return HTMLResponse(
             content=f'<script>window.location.href = "{target_url}";</script>',
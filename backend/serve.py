@@ -0,0 +1,202 @@
+"""Production server: gunicorn supervising uvicorn workers on uvloop with the httptools parser.
+
+`python app.py` is for development (one process, auto-reload). In production run:
+
+    uv run python serve.py
+
+- Workers: one per available CPU (the container's CPU quota, not the host's core count), fewer if the memory limit
+  cannot hold SERVER_WORKER_MEMORY_MB per worker. WEB_CONCURRENCY overrides the computed count.
+- The app, and the SDKs it would otherwise import on first use, are imported once in the master and the workers are
+  forked from it, so imported modules are shared copy-on-write and a new worker serves at full speed at once.
+  Clients (Firestore, GCS, HTTP pool) are still created by each worker's lifespan: gRPC channels and connection
+  pools cannot be shared across a fork.
+- A worker is replaced after SERVER_MAX_REQUESTS requests (plus jitter), which bounds the growth of the in-process
+  caches. It stops accepting connections and closes its open ones as they finish their current request (see Worker).
+  On shutdown, workers have SERVER_GRACEFUL_TIMEOUT_SECONDS to finish what they are serving.
+"""
+
+import asyncio
+import gc
+import importlib
+import math
+import os
+import sys
+
+from gunicorn.app.base import BaseApplication
+from gunicorn.arbiter import Arbiter
+from gunicorn.util import import_app
+from uvicorn import Server as UvicornServer
+from uvicorn_worker import UvicornWorker
+
+from config import (
+    LOG_LEVEL,
+    PORT,
+    SERVER_BACKLOG,
+    SERVER_GRACEFUL_TIMEOUT_SECONDS,
+    SERVER_KEEPALIVE_SECONDS,
+    SERVER_MAX_REQUESTS,
+    SERVER_MAX_REQUESTS_JITTER,
+    SERVER_WORKER_MEMORY_MB,
+    WEB_CONCURRENCY,
+)
+
+# SDKs the app imports on first use rather than at startup. The master imports them before forking so workers share
+# one copy instead of each importing its own when it starts (litellm alone takes seconds of CPU and ~100 MB)
+PRELOAD_MODULES = ("litellm", "google.genai", "PIL.Image")
+
+# Longest a worker being recycled waits for its open connections to close before it exits
+RECYCLE_DRAIN_SECONDS = 5
+
+# cgroup v2 files, with their cgroup v1 equivalents
+CGROUP_CPU_MAX = "/sys/fs/cgroup/cpu.max"
+CGROUP_V1_CPU_QUOTA = "/sys/fs/cgroup/cpu/cpu.cfs_quota_us"
+CGROUP_V1_CPU_PERIOD = "/sys/fs/cgroup/cpu/cpu.cfs_period_us"
+CGROUP_MEMORY_MAX = "/sys/fs/cgroup/memory.max"
+CGROUP_V1_MEMORY_LIMIT = "/sys/fs/cgroup/memory/memory.limit_in_bytes"
+
+
+class Worker(UvicornWorker):
+    """Uvicorn worker pinned to uvloop and httptools (a missing extra fails at startup instead of silently falling
+    back to asyncio and h11), recycled without dropping requests.
+
+    Uvicorn's own request limit exits at once and closes keep-alive connections a client may already be sending on.
+    Instead, once this worker has served its max_requests it stops accepting connections (the other workers take
+    them), answers further requests on its open connections with "Connection: close" and exits once they are closed.
+    """
+
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools", "server_header": False}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.config.limit_max_requests = None
+        self.served = 0
+        self.server: UvicornServer | None = None
+        self._drain_task: asyncio.Task | None = None
+
+    def _recycling(self, app):
+        async def recycling_app(scope, receive, send):
+            if scope["type"] != "http":
+                return await app(scope, receive, send)
+            self.served += 1
+            if self.served < self.max_requests:
+                return await app(scope, receive, send)
+            if self._drain_task is None:
+                self.log.info("Served %d requests, recycling worker", self.served)
+                self._drain_task = asyncio.create_task(self._drain())
+
+            async def send_closing(message):
+                if message["type"] == "http.response.start":
+                    message = {**message, "headers": [*message.get("headers", ()), (b"connection", b"close")]}
+                await send(message)
+
+            return await app(scope, receive, send_closing)
+
+        return recycling_app
+
+    async def _drain(self) -> None:
+        for listener in self.server.servers:
+            listener.close()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + RECYCLE_DRAIN_SECONDS
+        while self.server.server_state.connections and loop.time() < deadline:
+            await asyncio.sleep(0.1)
+        self.server.should_exit = True
+
+    async def _serve(self) -> None:
+        # UvicornWorker._serve, keeping the server so _drain can stop it
+        self.config.app = self._recycling(self.wsgi)
+        self.server = UvicornServer(config=self.config)
+        self._install_sigquit_handler()
+        await self.server.serve(sockets=self.sockets)
+        if not self.server.started:
+            sys.exit(Arbiter.WORKER_BOOT_ERROR)
+
+
+def _read(path: str) -> str | None:
+    try:
+        with open(path, encoding="ascii") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def available_cpus() -> float:
+    """CPUs this process may use: its CPU affinity, capped by a cgroup CPU quota."""
+    cpus = float(len(os.sched_getaffinity(0)))
+    quota = _read(CGROUP_CPU_MAX)
+    if quota:
+        limit, period = quota.split()
+        if limit != "max":
+            cpus = min(cpus, int(limit) / int(period))
+    else:
+        limit, period = _read(CGROUP_V1_CPU_QUOTA), _read(CGROUP_V1_CPU_PERIOD)
+        if limit and period and int(limit) > 0:
+            cpus = min(cpus, int(limit) / int(period))
+    return cpus
+
+
+def available_memory() -> int:
+    """Bytes of memory this process may use: a cgroup memory limit, else the machine's physical memory."""
+    memory = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    # Without a limit, cgroup v2 reads "max" and cgroup v1 a value larger than physical memory
+    limit = _read(CGROUP_MEMORY_MAX) or _read(CGROUP_V1_MEMORY_LIMIT)
+    if limit and limit.isdigit():
+        memory = min(memory, int(limit))
+    return memory
+
+
+def worker_count(cpus: float, memory: int) -> int:
+    """One worker per CPU (the app is async, so a worker keeps its CPU busy), as many as fit in memory."""
+    if WEB_CONCURRENCY > 0:
+        return WEB_CONCURRENCY
+    by_cpu = math.ceil(cpus)
+    by_memory = memory // (SERVER_WORKER_MEMORY_MB * 1024 * 1024)
+    return max(1, min(by_cpu, by_memory))
+
+
+def _when_ready(server) -> None:
+    # The preloaded app's objects are never freed; moving them out of the collector's generations keeps collections
+    # in the workers from writing to (and so copying) the pages they share with the master
+    gc.collect()
+    gc.freeze()
+    server.log.info("Serving with %d workers", server.num_workers)
+
+
+def server_options(bind: str | None = None, workers: int | None = None) -> dict:
+    """Gunicorn settings for the production server."""
+    return {
+        "bind": bind or f"0.0.0.0:{PORT}",
+        "workers": workers or worker_count(available_cpus(), available_memory()),
+        "worker_class": Worker,
+        "preload_app": True,
+        "keepalive": SERVER_KEEPALIVE_SECONDS,
+        "backlog": SERVER_BACKLOG,
+        "max_requests": SERVER_MAX_REQUESTS,
+        "max_requests_jitter": SERVER_MAX_REQUESTS_JITTER,
+        "graceful_timeout": SERVER_GRACEFUL_TIMEOUT_SECONDS,
+        "loglevel": LOG_LEVEL.lower(),
+        "when_ready": _when_ready,
+    }
+
+
+class Server(BaseApplication):
+    """Gunicorn application serving an ASGI app given as "module:attribute"."""
+
+    def __init__(self, app: str = "app:app", options: dict | None = None):
+        self.app = app
+        self.options = server_options() if options is None else options
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        app = import_app(self.app)
+        for module in PRELOAD_MODULES:
+            importlib.import_module(module)
+        return app
+
+
+if __name__ == "__main__":
+    Server().run()
@@ -1,7 +1,52 @@
 from cachetools import TTLCache
 
+from models import Recipe
+from services.metrics import CACHE_REQUESTS
+from services.tracing import current_span
+
+
+class MeteredTTLCache(TTLCache):
+    """TTLCache that counts hits and misses of get() lookups and records the outcome on the current span."""
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self.name = name
+
+    def get(self, key, default=None):
+        try:
+            value = self[key]
+        except KeyError:
+            CACHE_REQUESTS.inc(cache=self.name, result="miss")
+            current_span().set_attribute(f"cache.{self.name}", "miss")
+            return default
+        CACHE_REQUESTS.inc(cache=self.name, result="hit")
+        current_span().set_attribute(f"cache.{self.name}", "hit")
+        return value
+
+
 # Cache for tokens (1 hour TTL)
-token_cache = TTLCache(maxsize=1000, ttl=3600)
+token_cache = MeteredTTLCache("token_cache", maxsize=1000, ttl=3600)
+
+# Cache for recipe documents (5 minutes TTL), keyed by f"recipe_{recipe_id}"
+recipe_cache = MeteredTTLCache("recipe_cache", maxsize=100, ttl=300)
+
+# Fields of a recipe document kept in recipe_cache: everything a recipe view needs except the owner's display name
+RECIPE_CACHE_FIELDS = ("uid", "recipe", "timestamp", "image_url", "image_variants", "prompt")
+
+
+def recipe_cache_entry(data: dict) -> dict:
+    """Build the cached fields of a recipe document without storing them.
+
+    The recipe is validated once here and kept as a Recipe model, so the entry can be served without validation.
+    """
+    entry = {field: data[field] for field in RECIPE_CACHE_FIELDS if field in data}
+    recipe = entry.get("recipe", {})
+    entry["recipe"] = recipe if isinstance(recipe, Recipe) else Recipe.model_validate(recipe)
+    return entry
+
 
-# Cache for recipe data (5 minutes TTL)
-recipe_cache = TTLCache(maxsize=100, ttl=300)
+def cache_recipe_document(recipe_id: str, data: dict) -> dict:
+    """Store the cached fields of a recipe document and return the cached entry."""
+    entry = recipe_cache_entry(data)
+    recipe_cache[f"recipe_{recipe_id}"] = entry
+    return entry
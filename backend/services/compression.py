@@ -0,0 +1,173 @@
+"""Response compression.
+
+CompressionMiddleware encodes compressible responses with brotli or gzip, whichever the client prefers (brotli on a
+tie). Bodies smaller than COMPRESSION_MIN_SIZE are sent as is. Streamed responses are compressed chunk by chunk and
+flushed after every chunk, so NDJSON and SSE consumers still receive each record as soon as it is sent.
+
+A strong ETag identifies one exact byte sequence, so the ETag of a compressed response gets the coding appended
+("<hash>-br"); strip_coding_suffix() recovers the ETag of the identity body when comparing If-None-Match. A 304
+gets the ETag and Vary of the representation the client revalidated, as the 200 for it had them.
+"""
+
+import zlib
+
+import brotli
+
+from config import COMPRESSION_BROTLI_QUALITY, COMPRESSION_GZIP_LEVEL, COMPRESSION_MIN_SIZE
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/html", "text/plain", "text/event-stream")
+CODINGS = ("br", "gzip")
+
+
+def choose_coding(accept_encoding: str) -> str | None:
+    """Return the supported content coding the client prefers, or None if it accepts neither."""
+    best, best_q = None, 0.0
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                continue
+        for candidate in (CODINGS if coding == "*" else (coding,)):
+            if candidate in CODINGS and q > 0 and (q > best_q or (q == best_q and candidate == "br")):
+                best, best_q = candidate, q
+    return best
+
+
+def strip_coding_suffix(etag: str) -> str:
+    """Map the ETag of a compressed representation back to the ETag of the identity body."""
+    for coding in CODINGS:
+        suffix = f'-{coding}"'
+        if etag.endswith(suffix):
+            return etag[: -len(suffix)] + '"'
+    return etag
+
+
+class _Encoder:
+    def __init__(self, coding: str):
+        if coding == "br":
+            self._compressor = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+        else:
+            # wbits=31 writes a gzip header and trailer
+            self._compressor = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+        self.coding = coding
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self.coding == "br":
+            out = self._compressor.process(data)
+            return out + (self._compressor.finish() if final else self._compressor.flush())
+        out = self._compressor.compress(data)
+        return out + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+def _compressible(headers: list[tuple[bytes, bytes]]) -> bool:
+    content_type = b""
+    for name, value in headers:
+        if name == b"content-encoding":
+            return False
+        if name == b"content-type":
+            content_type = value
+    return content_type.split(b";")[0].strip().decode("latin-1") in COMPRESSIBLE_TYPES
+
+
+def _revalidated_coding(headers: list[tuple[bytes, bytes]], if_none_match: bytes, preferred: str) -> str | None:
+    """Return the coding of the compressed representation a 304 confirms, or None if the client holds the identity
+    body (e.g. one too small to compress)."""
+    etag = dict(headers).get(b"etag", b"")
+    if not etag.endswith(b'"'):
+        return None
+    for coding in (preferred, *CODINGS):
+        if etag[:-1] + f'-{coding}"'.encode() in if_none_match:
+            return coding
+    return None
+
+
+def _with_encoding_headers(
+    headers: list[tuple[bytes, bytes]], coding: str, length: int | None, encoded: bool = True
+) -> list:
+    updated = []
+    vary = b"Accept-Encoding"
+    for name, value in headers:
+        if name == b"content-length":
+            continue
+        if name == b"vary":
+            vary = value + b", Accept-Encoding"
+            continue
+        if name == b"etag" and value.endswith(b'"'):
+            value = value[:-1] + f'-{coding}"'.encode()
+        updated.append((name, value))
+    if encoded:
+        updated.append((b"content-encoding", coding.encode()))
+    updated.append((b"vary", vary))
+    if length is not None:
+        updated.append((b"content-length", str(length).encode()))
+    return updated
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing response bodies according to the request's Accept-Encoding."""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = dict(scope["headers"])
+        accept_encoding = request_headers.get(b"accept-encoding", b"").decode("latin-1")
+        coding = choose_coding(accept_encoding)
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        encoder: _Encoder | None = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, encoder, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                headers = message.get("headers", [])
+                if message["status"] == 304:
+                    passthrough = True
+                    revalidated = _revalidated_coding(headers, request_headers.get(b"if-none-match", b""), coding)
+                    if revalidated is not None:
+                        # Same ETag and Vary as the compressed 200, but no body to encode
+                        message = {**message, "headers": _with_encoding_headers(headers, revalidated, None, False)}
+                    await send(message)
+                    return
+                passthrough = message["status"] == 204 or not _compressible(headers)
+                if passthrough:
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                encoder = _Encoder(coding)
+                compressed = encoder.compress(body, final=not more_body)
+                headers = start_message.get("headers", [])
+                # Streamed bodies have no known length; the server falls back to chunked transfer encoding
+                length = None if more_body else len(compressed)
+                await send({**start_message, "headers": _with_encoding_headers(headers, coding, length)})
+                await send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+                return
+            await send({"type": "http.response.body", "body": encoder.compress(body, final=not more_body),
+                        "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
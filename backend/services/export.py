@@ -0,0 +1,91 @@
+"""Export of a user's recipe library as NDJSON.
+
+Recipes are read in pages of EXPORT_PAGE_SIZE documents ordered by document ID, each page with its own streamed
+query that starts after the last ID sent. Memory therefore stays bounded by one page however large the library is,
+and an interrupted export can be resumed from the ID of the last complete line it received. Pages are only read as
+the response is consumed, so a slow client slows the export down rather than letting it buffer.
+"""
+
+import datetime
+import logging
+import zlib
+from typing import AsyncIterator
+
+import orjson
+from google.cloud.firestore_v1.base_query import FieldFilter
+
+from config import COMPRESSION_GZIP_LEVEL, EXPORT_CHUNK_SIZE, EXPORT_PAGE_SIZE
+from services.firebase import get_db
+from services.recipe_store import read_document
+from services.resilience import guarded
+
+logger = logging.getLogger(__name__)
+
+
+def _default(value):
+    # Firestore timestamps are datetime subclasses, which orjson does not serialize natively
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    raise TypeError
+
+
+def export_line(doc) -> bytes:
+    """One NDJSON line: the recipe document with its ID and decoded recipe."""
+    document = {"id": doc.id, **read_document(doc.to_dict())}
+    return orjson.dumps(document, default=_default, option=orjson.OPT_PASSTHROUGH_DATETIME) + b"\n"
+
+
+async def export_recipes(uid: str, cursor: str | None = None, page_size: int = EXPORT_PAGE_SIZE) -> AsyncIterator[bytes]:
+    """Yield chunks of NDJSON lines for a user's recipes (not archived) after the `cursor` ID, in ID order.
+
+    The last line is {"done": true, "count": n}. If a read fails part way, it is {"error": ..., "cursor": id}
+    instead, with the ID to resume from.
+    """
+    query = (
+        get_db()
+        .collection("recipes")
+        .where(filter=FieldFilter("uid", "==", uid))
+        .where(filter=FieldFilter("archived", "==", False))
+        .order_by("__name__")
+        .limit(page_size)
+    )
+    count = 0
+    while True:
+        page = query if cursor is None else query.start_after({"__name__": cursor})
+        lines = []
+        try:
+            # The page is read inside the guard and sent outside it, so a slow client never holds a Firestore call
+            async with guarded("firestore.query"):
+                async for doc in page.stream():
+                    lines.append(export_line(doc))
+                    last_id = doc.id
+        except Exception as e:
+            logger.error("Error exporting recipes for user %s after %s: %s", uid, cursor, e)
+            yield orjson.dumps({"error": "Error exporting recipes", "cursor": cursor}) + b"\n"
+            return
+
+        # Lines are sent in chunks of about EXPORT_CHUNK_SIZE, not one by one
+        chunk = bytearray()
+        for line in lines:
+            chunk += line
+            if len(chunk) >= EXPORT_CHUNK_SIZE:
+                yield bytes(chunk)
+                chunk.clear()
+        if chunk:
+            yield bytes(chunk)
+        count += len(lines)
+        if len(lines) < page_size:
+            break
+        cursor = last_id
+
+    logger.info("Exported %d recipes for user %s", count, uid)
+    yield orjson.dumps({"done": True, "count": count}) + b"\n"
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Compress a stream into a single gzip member, flushed after every chunk so a client can decompress everything
+    it received before a disconnect."""
+    compressor = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
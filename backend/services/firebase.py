@@ -1,16 +1,79 @@
+import asyncio
 import logging
+from collections.abc import Iterable
 
 import firebase_admin
-from firebase_admin import credentials, firestore, firestore_async
+from firebase_admin import auth as firebase_auth
+from firebase_admin import credentials, firestore_async
+from google.cloud.firestore_v1.async_client import AsyncClient
+
+from services.resilience import retrying
 
 logger = logging.getLogger(__name__)
 
-# Initialize Firebase Admin with service account key
-try:
-    cred = credentials.Certificate("serviceAccountKey.json")
-    firebase_admin.initialize_app(cred)
-    db = firestore.client()  # Sync client (for backwards compatibility)
-    db_async = firestore_async.client()  # Async client for async routes
-except Exception as e:
-    logger.error(f"Firebase initialization error: {e}")
-    raise
+SERVICE_ACCOUNT_KEY_PATH = "serviceAccountKey.json"
+
+# Maximum identifiers per firebase_auth.get_users call
+GET_USERS_BATCH_SIZE = 100
+
+# Async Firestore client, created by init_firebase() during app startup or on first use
+_db_async: AsyncClient | None = None
+
+
+def get_firebase_app() -> firebase_admin.App:
+    """Return the default Firebase Admin app, initializing it from the service account key on first use."""
+    try:
+        return firebase_admin.get_app()
+    except ValueError:
+        pass
+
+    try:
+        cred = credentials.Certificate(SERVICE_ACCOUNT_KEY_PATH)
+        return firebase_admin.initialize_app(cred)
+    except Exception as e:
+        logger.error("Firebase initialization error: %s", e)
+        raise
+
+
+def init_firebase() -> AsyncClient:
+    """Initialize Firebase Admin and the async Firestore client (idempotent)."""
+    global _db_async
+    if _db_async is None:
+        _db_async = firestore_async.client(get_firebase_app())
+        logger.info("Firestore client initialized")
+    return _db_async
+
+
+def get_db() -> AsyncClient:
+    """Return the async Firestore client for use in routes and services."""
+    if _db_async is None:
+        return init_firebase()
+    return _db_async
+
+
+async def get_display_names(uids: Iterable[str]) -> dict[str, str]:
+    """Look up the display names of a set of users with batched Auth calls, off the event loop.
+
+    Users that do not exist are left out of the result.
+    """
+    identifiers = [firebase_auth.UidIdentifier(uid) for uid in sorted(set(uids)) if uid]
+    names = {}
+    for start in range(0, len(identifiers), GET_USERS_BATCH_SIZE):
+        batch = identifiers[start : start + GET_USERS_BATCH_SIZE]
+        # Lookups are idempotent, so transient failures are retried
+        result = await retrying(
+            "auth.get_users", lambda batch=batch: asyncio.to_thread(firebase_auth.get_users, batch, app=get_firebase_app())
+        )
+        names.update({user.uid: user.display_name or "" for user in result.users})
+    return names
+
+
+async def close_firebase() -> None:
+    """Close the Firestore client's gRPC channel (called on app shutdown)."""
+    global _db_async
+    if _db_async is not None:
+        # The public close() only handles HTTP transports; the gRPC channel lives on the API transport
+        api = _db_async._firestore_api_internal
+        if api is not None:
+            await api.transport.close()
+        _db_async = None
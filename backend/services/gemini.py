@@ -0,0 +1,50 @@
+import logging
+
+from config import GEMINI_IMAGE_MODEL, GOOGLE_API_KEY
+from services.http import get_http_client
+from services.resilience import guarded
+
+logger = logging.getLogger(__name__)
+
+GEMINI_API_BASE = "https://generativelanguage.googleapis.com"
+
+# Gemini client (for image generation), created on first use so google.genai is not imported at startup
+_gemini_client = None
+
+
+def get_gemini_client():
+    """Return the Gemini client, sharing the process-wide HTTP connection pool."""
+    global _gemini_client
+    if _gemini_client is None:
+        from google import genai
+        from google.genai import types
+
+        _gemini_client = genai.Client(
+            api_key=GOOGLE_API_KEY,
+            http_options=types.HttpOptions(httpx_async_client=get_http_client()),
+        )
+    return _gemini_client
+
+
+async def generate_image(prompt: str, aspect_ratio: str = "16:9") -> bytes | None:
+    """Generate an image with Gemini. Returns the raw image bytes, or None if no image was produced."""
+    from google.genai import types
+
+    async with guarded("gemini.generate_image") as span:
+        span.set_attribute("gemini.model", GEMINI_IMAGE_MODEL)
+        response = await get_gemini_client().aio.models.generate_content(
+            model=GEMINI_IMAGE_MODEL,
+            contents=prompt,
+            config=types.GenerateContentConfig(
+                response_modalities=["IMAGE"],
+                image_config=types.ImageConfig(
+                    aspect_ratio=aspect_ratio,
+                ),
+            ),
+        )
+
+    # Extract image from response
+    for part in response.candidates[0].content.parts:
+        if part.inline_data is not None:
+            return part.inline_data.data
+    return None
@@ -0,0 +1,104 @@
+"""Recipe generation and storage of newly generated recipes, one at a time or as a batch (e.g. a weekly meal plan)."""
+
+import asyncio
+import datetime
+import logging
+from typing import AsyncIterator
+
+from config import RECIPE_BATCH_CONCURRENCY, RECIPE_BATCH_TIMEOUT_SECONDS
+from models import BatchGenerateRecipeResult, Recipe, RecipeRequest
+from services.cache import cache_recipe_document
+from services.firebase import get_db
+from services.llm import generate_recipe_from_prompt
+from services.nutrition import recompute_macros
+from services.recipe_store import encode_recipe
+from services.resilience import guarded
+from services.search import index_recipe
+
+logger = logging.getLogger(__name__)
+
+
+async def generate_recipe_from_request(request: RecipeRequest) -> Recipe:
+    """Generate a recipe for a request, with computed macros where the ingredients allow."""
+    recipe, _ = await generate_recipe_from_prompt(
+        request.prompt,
+        complexity=request.complexity,
+        diet=request.diet,
+        time=request.time,
+        servings=request.servings,
+    )
+    # Computed macros replace the model's estimate when the ingredients match the nutrition table
+    return recompute_macros(recipe)
+
+
+def new_recipe_document(uid: str, request: RecipeRequest, recipe: Recipe) -> dict:
+    """The Firestore document of a newly generated recipe."""
+    return {
+        "uid": uid,
+        **request.model_dump(),
+        **encode_recipe(recipe.model_dump()),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc),
+        "archived": False,
+    }
+
+
+def add_recipe_document(batch, doc_ref, data: dict, recipe: Recipe) -> None:
+    """Add a new recipe document and its search index entries to a write batch."""
+    batch.set(doc_ref, data)
+    index_recipe(batch, data["uid"], doc_ref.id, recipe.model_dump(), data["timestamp"])
+
+
+async def generate_recipe_batch(
+    uid: str, requests: list[RecipeRequest], concurrency: int = RECIPE_BATCH_CONCURRENCY
+) -> AsyncIterator[BatchGenerateRecipeResult]:
+    """Generate recipes concurrently, yielding each result as soon as it is ready.
+
+    At most `concurrency` generations run at once and the batch as a whole gets RECIPE_BATCH_TIMEOUT_SECONDS;
+    requests still running then are reported as timed out. Failures are reported per request. Document IDs are
+    allocated up front so results can be streamed with their final ID, and all generated recipes are saved with
+    one batched commit after the last result. If that commit fails it raises, and none of them are saved.
+    """
+    db = get_db()
+    doc_refs = [db.collection("recipes").document() for _ in requests]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(index: int) -> tuple[int, Recipe | None]:
+        async with semaphore:
+            try:
+                return index, await generate_recipe_from_request(requests[index])
+            except Exception as e:
+                logger.error("Error generating recipe %d of batch: %s", index, e)
+                return index, None
+
+    tasks = [asyncio.create_task(run(index)) for index in range(len(requests))]
+    pending = set(range(len(requests)))
+    documents = []
+    try:
+        for next_done in asyncio.as_completed(tasks, timeout=RECIPE_BATCH_TIMEOUT_SECONDS):
+            index, recipe = await next_done
+            pending.discard(index)
+            if recipe is None:
+                yield BatchGenerateRecipeResult(index=index, error="Error generating recipe")
+                continue
+            documents.append((doc_refs[index], new_recipe_document(uid, requests[index], recipe), recipe))
+            # The recipe was validated when parsed from the LLM output
+            yield BatchGenerateRecipeResult.model_construct(index=index, id=doc_refs[index].id, recipe=recipe)
+    except TimeoutError:
+        logger.warning("Recipe batch timed out with %d of %d recipes unfinished", len(pending), len(requests))
+        for index in sorted(pending):
+            yield BatchGenerateRecipeResult(index=index, error="Timed out")
+    finally:
+        # Stops the remaining generations on timeout, or if the client goes away mid-stream
+        for task in tasks:
+            task.cancel()
+
+    if not documents:
+        return
+    batch = db.batch()
+    for doc_ref, data, recipe in documents:
+        add_recipe_document(batch, doc_ref, data, recipe)
+    async with guarded("firestore.commit"):
+        await batch.commit()
+    for doc_ref, data, recipe in documents:
+        cache_recipe_document(doc_ref.id, {**data, "recipe": recipe})
+    logger.info("Saved %d of %d batch recipes for user %s", len(documents), len(requests), uid)
@@ -0,0 +1,153 @@
+import asyncio
+import datetime
+import logging
+import time
+from collections.abc import Awaitable, Callable
+
+from config import (
+    ENABLE_IMAGE_GENERATION,
+    GEMINI_IMAGE_MODEL,
+    HEALTH_CHECK_INTERVAL_SECONDS,
+    HEALTH_CHECK_TIMEOUT_SECONDS,
+)
+from services.firebase import get_db
+from services.gemini import get_gemini_client
+from services.http import get_http_client
+from services.llm import get_llm_api_base
+from services.resilience import OPEN, breaker_states
+from services.storage import get_storage_bucket
+
+logger = logging.getLogger(__name__)
+
+# Dependencies whose failure makes the instance not ready (others only degrade it)
+CRITICAL_DEPENDENCIES = {"firestore"}
+
+
+class DependencyDisabled(Exception):
+    """Raised by a check when the dependency is not configured for this deployment."""
+
+
+async def check_firestore() -> None:
+    query = get_db().collection("recipes").limit(1)
+    async for _ in query.stream():
+        break
+
+
+async def check_llm() -> None:
+    # First call imports litellm, so keep it off the event loop
+    api_base = await asyncio.to_thread(get_llm_api_base)
+    if not api_base:
+        raise DependencyDisabled()
+    # Reachability only: any non-5xx answer from the provider's API host counts as up
+    response = await get_http_client().head(api_base)
+    if response.status_code >= 500:
+        raise RuntimeError(f"HTTP {response.status_code}")
+
+
+async def check_gemini() -> None:
+    if not ENABLE_IMAGE_GENERATION:
+        raise DependencyDisabled()
+    client = await asyncio.to_thread(get_gemini_client)
+    await client.aio.models.get(model=GEMINI_IMAGE_MODEL)
+
+
+async def check_storage() -> None:
+    bucket = get_storage_bucket()
+    if bucket is None:
+        raise DependencyDisabled()
+    if not await asyncio.to_thread(bucket.exists):
+        raise RuntimeError("bucket not found")
+
+
+class HealthMonitor:
+    """Runs dependency checks on an interval in the background and caches the latest results.
+
+    Probes read the cached snapshot, so they never perform I/O themselves.
+    """
+
+    def __init__(self, interval: float = HEALTH_CHECK_INTERVAL_SECONDS, timeout: float = HEALTH_CHECK_TIMEOUT_SECONDS):
+        self.interval = interval
+        self.timeout = timeout
+        self.checks: dict[str, Callable[[], Awaitable[None]]] = {}
+        # Format: {dependency: {"status": "ok" | "error" | "disabled", "latency_ms": float, "error": str}}
+        self.results: dict[str, dict] = {}
+        self.checked_at: datetime.datetime | None = None
+        self._task: asyncio.Task | None = None
+        self._refresh_lock = asyncio.Lock()
+
+    def register(self, name: str, check: Callable[[], Awaitable[None]]) -> None:
+        self.checks[name] = check
+
+    async def _run_check(self, name: str, check: Callable[[], Awaitable[None]]) -> dict:
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(check(), timeout=self.timeout)
+            result = {"status": "ok"}
+        except DependencyDisabled:
+            return {"status": "disabled", "latency_ms": None, "error": ""}
+        except TimeoutError:
+            result = {"status": "error", "error": f"timed out after {self.timeout:.1f}s"}
+        except Exception as e:
+            result = {"status": "error", "error": str(e)}
+            logger.error("Health check %s failed: %s", name, e)
+        result["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        result.setdefault("error", "")
+        return result
+
+    async def refresh(self) -> dict[str, dict]:
+        """Run all checks concurrently and replace the cached snapshot."""
+        async with self._refresh_lock:
+            names = list(self.checks)
+            results = await asyncio.gather(*(self._run_check(name, self.checks[name]) for name in names))
+            self.results = dict(zip(names, results, strict=True))
+            self.checked_at = datetime.datetime.now(datetime.timezone.utc)
+        return self.results
+
+    async def get_results(self) -> dict[str, dict]:
+        """Return the cached results, running the checks once if the refresher has not produced any yet."""
+        if self.checked_at is None:
+            await self.refresh()
+        return self.results
+
+    def is_healthy(self) -> bool:
+        """No dependency check failed and no circuit breaker is open."""
+        checks_ok = all(result["status"] != "error" for result in self.results.values())
+        return checks_ok and OPEN not in breaker_states().values()
+
+    def is_ready(self) -> bool:
+        """Every critical dependency passed its check and its breaker is not open (requests would only fail fast)."""
+        breakers = breaker_states()
+        return all(
+            self.results.get(name, {}).get("status") != "error" and breakers.get(name) != OPEN
+            for name in CRITICAL_DEPENDENCIES
+        )
+
+    async def _run_forever(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error("Health refresher error: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start the background refresher (called from the app lifespan)."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Singleton instance
+health_monitor = HealthMonitor()
+health_monitor.register("firestore", check_firestore)
+health_monitor.register("llm", check_llm)
+health_monitor.register("gemini", check_gemini)
+health_monitor.register("storage", check_storage)
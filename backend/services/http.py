@@ -0,0 +1,50 @@
+import logging
+import sys
+
+import httpx
+
+from config import HTTP_KEEPALIVE_EXPIRY, HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE_CONNECTIONS, HTTP_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+# Shared connection pool for outbound HTTP (LLM provider, Gemini), created on first use
+_http_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the process-wide async HTTP client with explicit pool limits."""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(HTTP_TIMEOUT, connect=10.0),
+            follow_redirects=True,
+        )
+        logger.info(
+            "HTTP pool created (max_connections=%s, keepalive=%s)", HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE_CONNECTIONS
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client (called on app shutdown).
+
+    Clients built on it are dropped too, so a later lifespan (tests, an embedded or reloaded app) creates them again
+    on a fresh pool instead of using the closed one.
+    """
+    global _http_client
+    if _http_client is None:
+        return
+    await _http_client.aclose()
+    # Imported here: both modules import this one. litellm is only touched if something already imported it.
+    from services import gemini
+
+    gemini._gemini_client = None
+    litellm = sys.modules.get("litellm")
+    if litellm is not None and litellm.aclient_session is _http_client:
+        litellm.aclient_session = None
+    _http_client = None
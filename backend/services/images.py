@@ -0,0 +1,122 @@
+import logging
+import re
+from typing import Awaitable, Callable
+
+from config import ENABLE_IMAGE_GENERATION, IMAGE_JOB_TIMEOUT_SECONDS, MOCK_MODE
+from models import GenerateImageRequest
+from services.cache import recipe_cache
+from services.firebase import get_db
+from services.gemini import generate_image as generate_gemini_image
+from services.jobs import Job, job_manager
+from services.mock import mock_image_latency
+from services.resilience import guarded
+from services.storage import generate_image_variants, get_storage_bucket, upload_image_variants
+
+logger = logging.getLogger(__name__)
+
+MOCK_IMAGE_URL = "https://images.unsplash.com/photo-1546069901-ba9599a7e63c"
+
+class ImageGenerationError(Exception):
+    """The image model returned no image."""
+
+
+# Called with the fraction of the work done and the stage about to start
+ProgressCallback = Callable[[float, str], Awaitable[None]]
+
+
+async def _no_progress(fraction: float, stage: str) -> None:
+    pass
+
+
+def recipe_image_text(recipe, recipe_id: str) -> str:
+    """Validate an image request and return the recipe text the image prompt is built from.
+
+    Raises ValueError with a user-facing message for invalid requests.
+    """
+    if not recipe_id or not re.match(r"^[a-zA-Z0-9]+$", recipe_id):
+        raise ValueError("Valid recipe_id is required")
+
+    # Build recipe text from recipe object
+    if isinstance(recipe, dict):
+        recipe_text = f"{recipe.get('title', '')}: {recipe.get('description', '')}"
+    else:
+        recipe_text = str(recipe)
+
+    if not recipe_text or len(recipe_text) < 10:
+        raise ValueError("Valid recipe data is required")
+
+    # Limit recipe text length
+    return recipe_text[:4000]
+
+
+async def create_recipe_image(
+    uid: str, recipe_id: str, recipe_text: str, progress: ProgressCallback = _no_progress
+) -> dict:
+    """Generate a photo of a recipe, upload its variants and attach them to the user's recipe document.
+
+    Returns {"image_url": ..., "image_variants": ...}. Raises ImageGenerationError if Gemini returns no image.
+    """
+    if MOCK_MODE:
+        logger.info("MOCK_MODE enabled: Returning mock image")
+        await progress(0.0, "generating")
+        await mock_image_latency.wait()
+        # Return a nice placeholder food image
+        return {"image_url": MOCK_IMAGE_URL, "image_variants": {}}
+
+    # Build an image prompt for Gemini
+    image_prompt = (
+        f"Generate a realistic, high-quality photo of the finished dish: {recipe_text}. "
+        "The image should show appetizing food photography with professional plating, "
+        "natural lighting, and a clean background. Show only the food, no text or labels."
+    )
+
+    await progress(0.0, "generating")
+    image_data = await generate_gemini_image(image_prompt)
+    if image_data is None:
+        raise ImageGenerationError("No image generated")
+
+    original_size_kb = len(image_data) / 1024
+    logger.info("Generated image size: %.1f KB", original_size_kb)
+
+    # Encode responsive size/format variants and upload them
+    await progress(0.7, "encoding")
+    variants = await generate_image_variants(image_data)
+    await progress(0.8, "uploading")
+    image_variants = await upload_image_variants(recipe_id, variants)
+    image_url = image_variants["full"]["jpeg"]
+
+    # Store image URL in Firestore (async)
+    await progress(0.95, "saving")
+    try:
+        doc_ref = get_db().collection("recipes").document(recipe_id)
+        async with guarded("firestore.get"):
+            doc = await doc_ref.get(field_paths=["uid"])
+        if doc.exists and doc.to_dict().get("uid") == uid:
+            async with guarded("firestore.update"):
+                await doc_ref.update({"image_url": image_url, "image_variants": image_variants})
+            recipe_cache.pop(f"recipe_{recipe_id}", None)
+            logger.info("Saved image URL for recipe %s", recipe_id)
+        else:
+            logger.warning("Recipe %s not found or not owned by user", recipe_id)
+    except Exception as e:
+        logger.error("Failed to save image URL to recipe: %s", e)
+
+    logger.info("Generated image for user %s", uid)
+    return {"image_url": image_url, "image_variants": image_variants}
+
+
+def prepare_image_job(uid: str, params: dict) -> dict:
+    """Validate the params of a "generate-image" job: a GenerateImageRequest body."""
+    if not ENABLE_IMAGE_GENERATION:
+        raise ValueError("Image generation feature is disabled.")
+    if not MOCK_MODE and not get_storage_bucket():
+        raise ValueError("Cloud Storage not configured.")
+    request = GenerateImageRequest.model_validate(params)
+    return {"recipe_id": request.recipe_id, "recipe_text": recipe_image_text(request.recipe, request.recipe_id)}
+
+
+async def run_image_job(job: Job, params: dict) -> dict:
+    return await create_recipe_image(job.data["uid"], params["recipe_id"], params["recipe_text"], job.set_progress)
+
+
+job_manager.register("generate-image", prepare_image_job, run_image_job, timeout=IMAGE_JOB_TIMEOUT_SECONDS)
@@ -0,0 +1,311 @@
+"""In-process background jobs.
+
+Long-running work (image generation first) is submitted as a job instead of running inside the request handler.
+Jobs wait on a bounded queue for one of JOB_WORKERS worker tasks. Each job is mirrored to a document in the "jobs"
+collection:
+
+    {"uid", "kind", "params", "status", "progress", "stage", "result", "error", "created_at", "updated_at"}
+
+status is "queued", "running", "succeeded", "failed" or "cancelled". Jobs of this process are served from memory and
+can be watched for changes; jobs of other workers and instances are read from Firestore. A job is cancelled on another
+worker by storing the "cancelled" status, which the owning worker picks up at the job's next update. The worker pool
+drains on shutdown: jobs still running after JOB_DRAIN_SECONDS are cancelled.
+"""
+
+import asyncio
+import datetime
+import logging
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from config import JOB_DRAIN_SECONDS, JOB_POLL_INTERVAL_SECONDS, JOB_QUEUE_SIZE, JOB_WORKERS
+from services.firebase import get_db
+from services.metrics import JOB_DURATION, JOB_QUEUE_DEPTH
+from services.resilience import guarded
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("succeeded", "failed", "cancelled")
+# Conditional writes of a job document lose to at most one concurrent writer (a cancellation), so one retry suffices
+_WRITE_ATTEMPTS = 2
+
+
+class JobQueueFull(Exception):
+    """The job queue is at capacity or no longer accepting jobs."""
+
+
+def _now() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+class Job:
+    """A job of this process: its stored fields plus the state used to run, watch and cancel it."""
+
+    def __init__(self, job_id: str, data: dict):
+        self.id = job_id
+        self.data = data
+        self.task: asyncio.Task | None = None
+        self.cancel_requested = False
+        # Replaced after every update; watchers wait on the one they saw last
+        self._changed = asyncio.Event()
+
+    async def update(self, **fields) -> None:
+        """Persist fields to the job, apply them and notify watchers.
+
+        Once the stored job has a terminal status (cancelled through another worker or instance), the job adopts
+        that status instead of overwriting it, and its task is cancelled.
+        """
+        fields["updated_at"] = _now()
+        try:
+            stored = await _update_unless_finished(self.id, fields)
+        except Exception as e:
+            # Local watchers still see the change; pollers on other instances see it on the next write
+            logger.warning("Could not persist job %s: %s", self.id, e)
+            stored = None
+        if stored is not None:
+            logger.info("Job %s was %s elsewhere", self.id, stored["status"])
+            fields = {key: stored.get(key) for key in ("status", "error", "updated_at")}
+            self.cancel_requested = True
+            if self.task is not None and not self.task.done():
+                self.task.cancel()
+        self.data.update(fields)
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def set_progress(self, fraction: float, stage: str) -> None:
+        await self.update(progress=round(fraction, 3), stage=stage)
+
+
+async def _update_unless_finished(job_id: str, fields: dict) -> dict | None:
+    """Update a stored job unless it already has a terminal status; return the stored fields in that case.
+
+    Each write is conditional on the version that was read, so the worker recording an outcome and a cancellation
+    made through another worker or instance cannot overwrite one another.
+    """
+    doc_ref = get_db().collection("jobs").document(job_id)
+    for attempt in range(_WRITE_ATTEMPTS):
+        async with guarded("firestore.get"):
+            snapshot = await doc_ref.get()
+        stored = snapshot.to_dict() or {}
+        if stored.get("status") in TERMINAL_STATUSES:
+            return stored
+        try:
+            option = get_db().write_option(last_update_time=snapshot.update_time)
+            async with guarded("firestore.update"):
+                await doc_ref.update(fields, option=option)
+            return None
+        except Exception:
+            # Most likely a concurrent write: read the new version and decide again
+            if attempt == _WRITE_ATTEMPTS - 1:
+                raise
+    return None
+
+
+JobHandler = Callable[[Job, dict], Awaitable[Any]]
+# Validates and normalizes submitted params; raises ValueError with a user-facing message
+JobPrepare = Callable[[str, dict], dict]
+
+
+class JobManager:
+    def __init__(self, workers: int = JOB_WORKERS, queue_size: int = JOB_QUEUE_SIZE):
+        self.workers = workers
+        self.queue_size = queue_size
+        # Format: {kind: (prepare, handler, timeout_seconds)}
+        self.kinds: dict[str, tuple[JobPrepare, JobHandler, float]] = {}
+        # Unfinished jobs of this process, keyed by job ID
+        self.jobs: dict[str, Job] = {}
+        self._queue: asyncio.Queue[Job] | None = None
+        self._worker_tasks: list[asyncio.Task] = []
+
+    def register(self, kind: str, prepare: JobPrepare, handler: JobHandler, timeout: float) -> None:
+        self.kinds[kind] = (prepare, handler, timeout)
+
+    def start(self) -> None:
+        """Start the worker pool (called from the app lifespan)."""
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._worker_tasks = [asyncio.create_task(self._worker(self._queue)) for _ in range(self.workers)]
+
+    async def submit(self, uid: str, kind: str, params: dict) -> Job:
+        """Validate, store and enqueue a job.
+
+        Raises ValueError for an unknown kind or invalid params, and JobQueueFull when the queue cannot take it.
+        """
+        if kind not in self.kinds:
+            raise ValueError(f"Unknown job kind: {kind}")
+        # drain() may stop accepting jobs while this one is stored; it still runs or cancels what reached the queue
+        queue = self._queue
+        if queue is None or queue.full():
+            raise JobQueueFull()
+        prepare, _, _ = self.kinds[kind]
+        params = prepare(uid, params)
+
+        now = _now()
+        data = {
+            "uid": uid,
+            "kind": kind,
+            "params": params,
+            "status": "queued",
+            "progress": 0.0,
+            "stage": "",
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        doc_ref = get_db().collection("jobs").document()
+        async with guarded("firestore.set"):
+            await doc_ref.set(data)
+
+        job = Job(doc_ref.id, data)
+        self.jobs[job.id] = job
+        queue.put_nowait(job)
+        JOB_QUEUE_DEPTH.set(queue.qsize())
+        logger.info("Queued %s job %s for user %s", kind, job.id, uid)
+        return job
+
+    async def get(self, job_id: str) -> dict | None:
+        """Return the stored fields of a job, or None if it does not exist."""
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return job.data
+        async with guarded("firestore.get"):
+            doc = await get_db().collection("jobs").document(job_id).get()
+        if not doc.exists:
+            return None
+        data = doc.to_dict()
+        if data.get("status") not in TERMINAL_STATUSES and self._abandoned(data):
+            # The instance that ran the job stopped without recording an outcome
+            data = {**data, "status": "failed", "error": "Job was interrupted"}
+        return data
+
+    def _abandoned(self, data: dict) -> bool:
+        timeout = self.kinds.get(data.get("kind"), (None, None, 0))[2]
+        try:
+            updated_at = datetime.datetime.fromisoformat(data["updated_at"])
+        except (KeyError, TypeError, ValueError):
+            return False
+        age = (datetime.datetime.now(datetime.timezone.utc) - updated_at).total_seconds()
+        # A running job writes at the latest when it times out; a queued one may wait for a full queue ahead of it
+        longest_wait = timeout * (1 + self.queue_size / max(self.workers, 1))
+        return age > longest_wait + JOB_DRAIN_SECONDS
+
+    async def cancel(self, job_id: str) -> dict | None:
+        """Cancel a queued or running job. Returns its fields, or None if it does not exist."""
+        job = self.jobs.get(job_id)
+        if job is None:
+            data = await self.get(job_id)
+            if data is not None and data.get("status") not in TERMINAL_STATUSES:
+                # Owned by another worker or instance, or abandoned. The owner sees the stored cancellation at the
+                # job's next update and stops it; an outcome it recorded first is kept.
+                fields = {"status": "cancelled", "updated_at": _now()}
+                stored = await _update_unless_finished(job_id, fields)
+                data = stored if stored is not None else {**data, **fields}
+            return data
+
+        job.cancel_requested = True
+        if job.task is not None:
+            job.task.cancel()
+            # Return once the worker has recorded the outcome
+            async for _ in self.watch(job.id):
+                pass
+        elif job.data["status"] == "queued":
+            # The worker skips it when it is dequeued
+            self.jobs.pop(job.id, None)
+            await job.update(status="cancelled")
+        return job.data
+
+    async def watch(self, job_id: str) -> AsyncIterator[dict]:
+        """Yield the job's fields now and after every change, until it reaches a terminal status."""
+        job = self.jobs.get(job_id)
+        if job is None:
+            # Not ours: poll the stored document
+            previous = None
+            while True:
+                data = await self.get(job_id)
+                if data is None:
+                    return
+                if data != previous:
+                    yield data
+                    previous = data
+                if data.get("status") in TERMINAL_STATUSES:
+                    return
+                await asyncio.sleep(JOB_POLL_INTERVAL_SECONDS)
+
+        while True:
+            changed = job._changed
+            yield dict(job.data)
+            if job.data["status"] in TERMINAL_STATUSES:
+                return
+            await changed.wait()
+
+    async def _worker(self, queue: asyncio.Queue[Job]) -> None:
+        # The queue is passed in rather than read from self._queue, which drain() clears while workers finish
+        while True:
+            job = await queue.get()
+            JOB_QUEUE_DEPTH.set(queue.qsize())
+            try:
+                if job.data["status"] == "queued":
+                    await self._run(job)
+            finally:
+                queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        _, handler, timeout = self.kinds[job.data["kind"]]
+        start = time.perf_counter()
+        await job.update(status="running")
+        if job.cancel_requested:
+            # Cancelled while the status was being written
+            await self._finish(job, {"status": "cancelled"}, start)
+            return
+        job.task = asyncio.create_task(handler(job, job.data["params"]))
+        try:
+            result = await asyncio.wait_for(job.task, timeout)
+            outcome = {"status": "succeeded", "progress": 1.0, "result": result}
+        except TimeoutError:
+            logger.warning("Job %s timed out after %ss", job.id, timeout)
+            outcome = {"status": "failed", "error": f"Timed out after {timeout:g}s"}
+        except asyncio.CancelledError:
+            outcome = {"status": "cancelled"}
+            if asyncio.current_task().cancelling():
+                # The worker itself is being cancelled (shutdown): record the outcome, then stop
+                outcome["error"] = "Server shutting down"
+                await self._finish(job, outcome, start)
+                raise
+        except ValueError as e:
+            outcome = {"status": "failed", "error": str(e)}
+        except Exception as e:
+            logger.exception("Job %s failed: %s", job.id, e)
+            outcome = {"status": "failed", "error": "Job failed"}
+        await self._finish(job, outcome, start)
+
+    async def _finish(self, job: Job, outcome: dict, start: float) -> None:
+        self.jobs.pop(job.id, None)
+        JOB_DURATION.observe(time.perf_counter() - start, kind=job.data["kind"], status=outcome["status"])
+        await job.update(**outcome)
+        logger.info("Job %s %s", job.id, outcome["status"])
+
+    async def drain(self, timeout: float = JOB_DRAIN_SECONDS) -> None:
+        """Stop accepting jobs, give queued and running jobs until the timeout to finish, then cancel the rest."""
+        if self._queue is None:
+            return
+        queue, self._queue = self._queue, None
+        try:
+            await asyncio.wait_for(queue.join(), timeout)
+        except TimeoutError:
+            if self.jobs:
+                logger.warning("Cancelling %s unfinished jobs at shutdown", len(self.jobs))
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        # Jobs that never reached a worker
+        while not queue.empty():
+            job = queue.get_nowait()
+            if job.data["status"] == "queued":
+                self.jobs.pop(job.id, None)
+                await job.update(status="cancelled", error="Server shutting down")
+
+
+# Singleton instance
+job_manager = JobManager()
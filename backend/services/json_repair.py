@@ -0,0 +1,213 @@
+"""Incremental parsing and local repair of JSON written by an LLM.
+
+IncrementalJSONParser follows a JSON document as it streams in, keeping the nesting of open arrays and objects and
+the last point at which every value written so far was complete. That lets it:
+
+- reject output as soon as it cannot be JSON (prose, a different format), instead of after the whole completion
+- tell whether the document was finished, or cut off (by max_tokens) and can be continued where it stopped
+- repair common defects locally: trailing commas are dropped, raw control characters in strings are escaped, a
+  leading ```json fence and anything after the document are ignored, and a cut-off document is cut back to its last
+  complete value (dropping a truncated final item) with its open strings, arrays and objects closed
+
+Scanning is linear in the length of the text; runs of string characters and whitespace are skipped with regexes.
+"""
+
+import re
+
+# What the parser expects next
+START, VALUE, VALUE_OR_CLOSE, KEY, KEY_OR_CLOSE, COLON, COMMA_OR_CLOSE, DONE = range(8)
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_STRING_RUN = re.compile(r'[^"\\\x00-\x1f]*')
+_TOKEN_RUN = re.compile(r"[A-Za-z0-9+\-.]*")
+_NUMBER = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?")
+_LITERALS = ("true", "false", "null")
+_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t", "\b": "\\b", "\f": "\\f"}
+_CLOSERS = {"{": "}", "[": "]"}
+# A markdown fence some models put around JSON despite structured output
+_FENCE = "```json"
+
+
+class JSONRepairError(ValueError):
+    """The text cannot be read as JSON, even with local repairs."""
+
+
+class IncrementalJSONParser:
+    """Checks and repairs a JSON array or object fed to it in chunks of any size."""
+
+    def __init__(self):
+        # Accepted (and repaired) output, and how much of it ends with every value complete
+        self._out: list[str] = []
+        self._safe = 0
+        self._stack: list[str] = []
+        self._state = START
+        self._prefix = ""
+        # A comma is only written once the next item starts, so a trailing one is never written
+        self._comma = False
+        # String or literal being read: strings are buffered until their closing quote
+        self._string: list[str] | None = None
+        self._key = False
+        self._escape = False
+        self._token: str | None = None
+        self.error: JSONRepairError | None = None
+        # Whether a defect was fixed in the text read so far (truncation is told by `complete`)
+        self.repaired = False
+
+    @property
+    def complete(self) -> bool:
+        """Whether the top-level value has been closed."""
+        return self._state == DONE
+
+    def feed(self, text: str) -> None:
+        """Scan the next chunk of the document. Raises JSONRepairError (also on later calls) once the text cannot
+        be JSON; text after the end of the document is ignored."""
+        if self.error is not None:
+            raise self.error
+        try:
+            self._feed(text)
+        except JSONRepairError as e:
+            self.error = e
+            raise
+
+    def result(self) -> str:
+        """The document read so far as valid JSON: as written if it is complete, otherwise cut back to its last
+        complete value with everything still open closed."""
+        if self.complete:
+            return "".join(self._out)
+        if not self._safe:
+            raise JSONRepairError("No JSON value was started")
+        # Every push and pop moves the safe point, so the containers open there are the ones open now
+        closers = "".join(_CLOSERS[opener] for opener in reversed(self._stack))
+        return "".join(self._out[: self._safe]) + closers
+
+    def _fail(self, message: str) -> None:
+        raise JSONRepairError(f"{message} at output offset {sum(map(len, self._out))}")
+
+    def _feed(self, text: str) -> None:
+        i, n = 0, len(text)
+        while i < n and self._state != DONE:
+            if self._string is not None:
+                i = self._scan_string(text, i)
+            elif self._token is not None:
+                match = _TOKEN_RUN.match(text, i)
+                self._token += match.group()
+                i = match.end()
+                if i < n:
+                    self._end_token()
+            elif text[i] in " \t\n\r":
+                i = _WHITESPACE.match(text, i).end()
+            else:
+                self._structural(text[i])
+                i += 1
+
+    def _scan_string(self, text: str, i: int) -> int:
+        if self._escape:
+            self._escape = False
+            self._string.append(text[i])
+            return i + 1
+        match = _STRING_RUN.match(text, i)
+        self._string.append(match.group())
+        i = match.end()
+        if i == len(text):
+            return i
+        char = text[i]
+        if char == '"':
+            self._out.append('"' + "".join(self._string) + '"')
+            self._string = None
+            if self._key:
+                self._state = COLON
+            else:
+                self._value_complete()
+        elif char == "\\":
+            self._string.append(char)
+            self._escape = True
+        else:
+            # A raw newline or tab inside a string
+            self._string.append(_CONTROL_ESCAPES.get(char, f"\\u{ord(char):04x}"))
+            self.repaired = True
+        return i + 1
+
+    def _end_token(self) -> None:
+        token, self._token = self._token, None
+        if not (_NUMBER.fullmatch(token) or token in _LITERALS):
+            self._fail(f"Invalid literal {token!r}")
+        self._out.append(token)
+        self._value_complete()
+
+    def _start_item(self) -> None:
+        if self._comma:
+            self._out.append(",")
+            self._comma = False
+
+    def _open(self, opener: str) -> None:
+        self._start_item()
+        self._out.append(opener)
+        self._stack.append(opener)
+        self._state = KEY_OR_CLOSE if opener == "{" else VALUE_OR_CLOSE
+        self._safe = len(self._out)
+
+    def _close(self, closer: str) -> None:
+        if not self._stack or _CLOSERS[self._stack[-1]] != closer:
+            self._fail(f"Unexpected {closer!r}")
+        if self._comma:
+            self._comma = False
+            self.repaired = True
+        self._stack.pop()
+        self._out.append(closer)
+        self._value_complete()
+
+    def _value_complete(self) -> None:
+        self._state = COMMA_OR_CLOSE if self._stack else DONE
+        self._safe = len(self._out)
+
+    def _structural(self, char: str) -> None:
+        state = self._state
+        if state == START:
+            if char in "{[":
+                self.repaired = self.repaired or bool(self._prefix)
+                self._open(char)
+            elif _FENCE.startswith(self._prefix + char):
+                self._prefix += char
+            else:
+                self._fail(f"Expected a JSON object or array, got {char!r}")
+        elif state in (VALUE, VALUE_OR_CLOSE):
+            if char == '"':
+                self._start_item()
+                self._string, self._key = [], False
+            elif char in "{[":
+                self._open(char)
+            elif char in "-0123456789tfn":
+                self._start_item()
+                self._token = char
+            elif char == "]" and (state == VALUE_OR_CLOSE or self._comma):
+                self._close(char)
+            else:
+                self._fail(f"Expected a value, got {char!r}")
+        elif state in (KEY, KEY_OR_CLOSE):
+            if char == '"':
+                self._start_item()
+                self._string, self._key = [], True
+            elif char == "}":
+                self._close(char)
+            else:
+                self._fail(f"Expected a key, got {char!r}")
+        elif state == COLON:
+            if char != ":":
+                self._fail(f"Expected ':', got {char!r}")
+            self._out.append(char)
+            self._state = VALUE
+        elif state == COMMA_OR_CLOSE:
+            if char == ",":
+                self._comma = True
+                self._state = KEY if self._stack[-1] == "{" else VALUE
+            elif char in "}]":
+                self._close(char)
+            else:
+                self._fail(f"Expected ',' or a closing bracket, got {char!r}")
+
+
+def repair_json(text: str) -> str:
+    """Return text as valid JSON, repairing it as IncrementalJSONParser does. Raises JSONRepairError."""
+    parser = IncrementalJSONParser()
+    parser.feed(text)
+    return parser.result()
@@ -1,10 +1,23 @@
-import asyncio
+import functools
 import logging
+import re
+import time
 
-import litellm
-
-from config import LLM_MODEL, MOCK_MODE
+from config import (
+    LLM_API_BASE,
+    LLM_CONTINUATION_MAX_TOKENS,
+    LLM_MAX_CONTINUATIONS,
+    LLM_MAX_TOKENS,
+    LLM_MODEL,
+    MOCK_MODE,
+)
 from models import IngredientGroup, Recipe
+from services.http import get_http_client
+from services.json_repair import IncrementalJSONParser, JSONRepairError
+from services.llm_router import llm_router
+from services.metrics import LLM_OUTPUT_REPAIRS, LLM_TIME_TO_FIRST_TOKEN, LLM_TOKENS, timed
+from services.mock import mock_llm_latency
+from services.token_budget import generation_profile, token_budget
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +38,169 @@ UPDATE_SYSTEM_MESSAGE = """You are a meticulous test kitchen editor. Your goal i
 - If the modification affects the cooking method (e.g., frying to baking), rewrite the relevant instructions completely with proper timings and visual cues.
 """
 
+CONTINUE_MESSAGE = (
+    "Your response was cut off. Continue the JSON exactly where it stopped: output only the remaining characters, "
+    "without repeating anything or adding a code fence."
+)
+
+
+def get_litellm():
+    """Import litellm on first use (it is slow to import) and point it at the shared HTTP pool.
+
+    litellm uses aclient_session for OpenAI-compatible providers; other providers keep litellm's own cached clients.
+    """
+    import litellm
+
+    if litellm.aclient_session is None:
+        litellm.aclient_session = get_http_client()
+    return litellm
+
+
+# Provider API hosts used for connection warm-up and health checks when LLM_API_BASE is not set
+PROVIDER_API_BASES = {
+    "anthropic": "https://api.anthropic.com",
+    "openai": "https://api.openai.com",
+    "gemini": "https://generativelanguage.googleapis.com",
+    "mistral": "https://api.mistral.ai",
+    "groq": "https://api.groq.com",
+}
+
+
+@functools.cache
+def get_llm_api_base() -> str:
+    """Resolve the base URL of the configured LLM provider ("" if unknown)."""
+    if LLM_API_BASE:
+        return LLM_API_BASE
+    _, provider, _, api_base = get_litellm().get_llm_provider(LLM_MODEL)
+    return api_base or PROVIDER_API_BASES.get(provider, "")
+
+
+def _trim_descriptions(schema) -> None:
+    """Cut every field description in a JSON schema to its first sentence."""
+    if isinstance(schema, dict):
+        for key, value in schema.items():
+            if key == "description" and isinstance(value, str):
+                schema[key] = re.split(r"(?<=\.)\s", value, maxsplit=1)[0]
+            else:
+                _trim_descriptions(value)
+    elif isinstance(schema, list):
+        for item in schema:
+            _trim_descriptions(item)
+
+
+@functools.cache
+def get_recipe_response_format(compact: bool = False) -> dict:
+    """Build the Recipe structured-output schema once instead of on every completion call.
+
+    The compact schema, used for simple recipes, keeps only the first sentence of each field description: the style
+    guidance in the rest is prompt tokens a simple recipe does not need.
+    """
+    from litellm.utils import type_to_response_format_param
+
+    response_format = type_to_response_format_param(Recipe)
+    if compact:
+        _trim_descriptions(response_format)
+    return response_format
+
+
+async def _complete(
+    operation: str,
+    messages: list[dict],
+    model: str = LLM_MODEL,
+    parser: IncrementalJSONParser | None = None,
+    max_tokens: int = LLM_MAX_TOKENS,
+    response_format: dict | None = None,
+):
+    """Stream a completion (free text unless a response_format is given), recording time-to-first-token and total
+    latency. Content is fed to `parser` as it arrives, so output that cannot be JSON fails right away.
+
+    Returns the reassembled (non-streaming) response.
+    """
+    litellm = get_litellm()
+    start = time.perf_counter()
+    chunks = []
+    options = {"response_format": response_format} if response_format is not None else {}
+    with timed(f"llm.{operation}") as span:
+        span.set_attribute("llm.model", model)
+        stream = await litellm.acompletion(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            stream=True,
+            stream_options={"include_usage": True},
+            **options,
+        )
+        first_token_seen = False
+        async for chunk in stream:
+            content = chunk.choices[0].delta.content if chunk.choices else None
+            if content:
+                if not first_token_seen:
+                    first_token_seen = True
+                    LLM_TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - start, operation=operation)
+                if parser is not None:
+                    parser.feed(content)
+            chunks.append(chunk)
+
+        response = litellm.stream_chunk_builder(chunks, messages=messages)
+        span.set_attribute("llm.prompt_tokens", response.usage.prompt_tokens)
+        span.set_attribute("llm.completion_tokens", response.usage.completion_tokens)
+
+    LLM_TOKENS.inc(response.usage.prompt_tokens, operation=operation, type="prompt")
+    LLM_TOKENS.inc(response.usage.completion_tokens, operation=operation, type="completion")
+    return response
+
+
+async def _complete_recipe(
+    operation: str, messages: list[dict], profile: tuple[str, ...], compact_schema: bool = False
+) -> tuple[Recipe, object]:
+    """Complete a Recipe through the LLM router (deadline, hedging and failover across the configured models).
+
+    max_tokens is the budget learned for the request profile (services/token_budget.py). Output cut off at the
+    budget is continued by the same model rather than regenerated, and what is still incomplete or malformed is
+    repaired locally (services/json_repair.py). An attempt whose output is not a valid Recipe even then counts as
+    failed, so the router moves on to the next model. Returns (recipe, usage).
+    """
+    budget = token_budget.max_tokens(profile)
+    response_format = get_recipe_response_format(compact_schema)
+
+    async def attempt(model: str) -> tuple[Recipe, object]:
+        parser = IncrementalJSONParser()
+        response = await _complete(operation, messages, model, parser, budget, response_format)
+        content = response.choices[0].message.content or ""
+        usage = response.usage
+        truncated = response.choices[0].finish_reason == "length"
+
+        for _ in range(LLM_MAX_CONTINUATIONS):
+            if parser.complete or response.choices[0].finish_reason != "length":
+                break
+            LLM_OUTPUT_REPAIRS.inc(operation=operation, kind="continued")
+            continuation = [
+                *messages,
+                {"role": "assistant", "content": content},
+                {"role": "user", "content": CONTINUE_MESSAGE},
+            ]
+            try:
+                response = await _complete(operation, continuation, model, parser, LLM_CONTINUATION_MAX_TOKENS)
+            except JSONRepairError as e:
+                # The parser keeps everything valid up to the mismatch, which is repaired below
+                logger.warning("Continuation from %s does not follow the cut-off output: %s", model, e)
+                break
+            content += response.choices[0].message.content or ""
+            usage = get_litellm().Usage(
+                prompt_tokens=usage.prompt_tokens + response.usage.prompt_tokens,
+                completion_tokens=usage.completion_tokens + response.usage.completion_tokens,
+                total_tokens=usage.total_tokens + response.usage.total_tokens,
+            )
+
+        token_budget.record(profile, budget, usage.completion_tokens, truncated)
+        if not parser.complete or parser.repaired:
+            kind = "repaired" if parser.complete else "truncated"
+            LLM_OUTPUT_REPAIRS.inc(operation=operation, kind=kind)
+            logger.warning("Repairing %s output from %s (%s)", kind, model, operation)
+        return Recipe.model_validate_json(parser.result()), usage
+
+    return await llm_router.call(attempt)
+
 
 async def generate_recipe_from_prompt(
     prompt: str,
@@ -39,7 +215,7 @@ async def generate_recipe_from_prompt(
     """
     if MOCK_MODE:
         logger.info("MOCK_MODE enabled: Returning mock recipe")
-        await asyncio.sleep(1.5)
+        await mock_llm_latency.wait()
         mock_recipe = Recipe(
             title="Mock Spaghetti Carbonara",
             description="A classic Roman pasta dish made with eggs, hard cheese, cured pork, and black pepper. This is a mock recipe for testing.",
@@ -99,22 +275,26 @@ async def generate_recipe_from_prompt(
 
     full_prompt += "\n\nPlease create a detailed, step-by-step recipe following the system guidelines."
 
-    response = await litellm.acompletion(
-        model=LLM_MODEL,
-        messages=[
+    profile = generation_profile(complexity, diet, time, servings)
+    recipe, usage = await _complete_recipe(
+        "generate",
+        [
             {"role": "system", "content": system_msg},
             {"role": "user", "content": full_prompt},
         ],
-        max_tokens=2000,
-        response_format=Recipe,
+        profile,
+        compact_schema=complexity == "simple",
     )
 
-    usage = response.usage
+    # The profile is logged so budgets can be replayed from logs (python -m benchmarks.token_budget --log)
     logger.info(
-        f"Token usage - Prompt: {usage.prompt_tokens}, Completion: {usage.completion_tokens}, Total: {usage.total_tokens}"
+        "Token usage (%s) - Prompt: %s, Completion: %s, Total: %s",
+        "/".join(profile),
+        usage.prompt_tokens,
+        usage.completion_tokens,
+        usage.total_tokens,
     )
 
-    recipe = Recipe.model_validate_json(response.choices[0].message.content)
     return recipe, {"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens}
 
 
@@ -125,7 +305,7 @@ async def update_recipe_with_modifications(original_recipe: dict, modifications:
     """
     if MOCK_MODE:
         logger.info("MOCK_MODE enabled: Returning mock updated recipe")
-        await asyncio.sleep(1.5)
+        await mock_llm_latency.wait()
         # Just return the original recipe with a slight modification to title for proof
         original_recipe_obj = Recipe(**original_recipe) if isinstance(original_recipe, dict) else original_recipe
         if hasattr(original_recipe_obj, "title"):
@@ -153,20 +333,20 @@ async def update_recipe_with_modifications(original_recipe: dict, modifications:
         "Please rewrite the recipe to incorporate these changes. Keep the rest of the recipe consistent with the original style."
     )
 
-    response = await litellm.acompletion(
-        model=LLM_MODEL,
-        messages=[
+    updated_recipe, usage = await _complete_recipe(
+        "update",
+        [
             {"role": "system", "content": UPDATE_SYSTEM_MESSAGE},
             {"role": "user", "content": update_prompt},
         ],
-        max_tokens=2000,
-        response_format=Recipe,
+        ("update",),
     )
 
-    usage = response.usage
     logger.info(
-        f"Update token usage - Prompt: {usage.prompt_tokens}, Completion: {usage.completion_tokens}, Total: {usage.total_tokens}"
+        "Update token usage - Prompt: %s, Completion: %s, Total: %s",
+        usage.prompt_tokens,
+        usage.completion_tokens,
+        usage.total_tokens,
     )
 
-    updated_recipe = Recipe.model_validate_json(response.choices[0].message.content)
     return updated_recipe, {"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens}
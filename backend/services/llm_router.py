@@ -0,0 +1,193 @@
+"""Routing of LLM calls across LLM_MODEL and LLM_FALLBACK_MODELS.
+
+Each call runs against the best model first: the configured order, except that unhealthy models (a low recent
+success score) go last and the alternates are ordered by their typical latency. Then:
+
+- Hedging: if the first attempt runs longer than LLM_HEDGE_QUANTILE of that model's recent latencies, the call is
+  also sent to the next model and the first valid result wins; the other attempt is cancelled. At most
+  LLM_HEDGE_MAX_RATE of recent calls are hedged, so hedging adds a bounded share of cost.
+- Failover: an attempt that fails (provider error or an invalid Recipe) moves on to the next model right away.
+- Deadline: the whole call, across models, is cancelled after LLM_DEADLINE_SECONDS.
+
+Health scores are a moving average of attempt outcomes that drifts back to healthy while a model is not used, so a
+demoted model is retried after a while.
+"""
+
+import asyncio
+import collections
+import logging
+import time
+from typing import Awaitable, Callable, TypeVar
+
+from config import (
+    LLM_DEADLINE_SECONDS,
+    LLM_FALLBACK_MODELS,
+    LLM_HEDGE_DEFAULT_DELAY_SECONDS,
+    LLM_HEDGE_MAX_RATE,
+    LLM_HEDGE_QUANTILE,
+    LLM_MODEL,
+)
+from services.metrics import LLM_ATTEMPTS, LLM_HEDGES, LLM_MODEL_HEALTH
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Latencies kept per model, and how many are needed before they replace the default hedge delay
+LATENCY_WINDOW = 200
+MIN_LATENCY_SAMPLES = 20
+# Weight of the latest outcome in a health score, the score below which a model is demoted, and how fast a score
+# recovers while the model is unused
+HEALTH_ALPHA = 0.2
+UNHEALTHY_SCORE = 0.5
+HEALTH_RECOVERY_HALF_LIFE_SECONDS = 60.0
+# Calls over which the hedge rate is measured
+HEDGE_WINDOW = 200
+
+
+class LLMDeadlineExceeded(Exception):
+    """No model returned a valid result within the call deadline."""
+
+
+class ModelStats:
+    """Recent latencies and health of one model."""
+
+    def __init__(self, model: str):
+        self.model = model
+        self.latencies: collections.deque[float] = collections.deque(maxlen=LATENCY_WINDOW)
+        self._score = 1.0
+        self._updated = time.monotonic()
+
+    @property
+    def score(self) -> float:
+        """Health from 0 (every recent attempt failed) to 1, recovering towards 1 over time."""
+        elapsed = time.monotonic() - self._updated
+        return 1 - (1 - self._score) * 0.5 ** (elapsed / HEALTH_RECOVERY_HALF_LIFE_SECONDS)
+
+    @property
+    def healthy(self) -> bool:
+        return self.score >= UNHEALTHY_SCORE
+
+    def record(self, success: bool, latency: float | None = None) -> None:
+        self._score = (1 - HEALTH_ALPHA) * self.score + HEALTH_ALPHA * success
+        self._updated = time.monotonic()
+        if success and latency is not None:
+            self.latencies.append(latency)
+        LLM_MODEL_HEALTH.set(round(self._score, 3), model=self.model)
+
+    def quantile(self, q: float) -> float | None:
+        """Latency quantile of recent successful attempts, or None until enough were seen."""
+        if len(self.latencies) < MIN_LATENCY_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class LLMRouter:
+    """Runs LLM calls with per-call deadlines, hedging and failover across models."""
+
+    def __init__(
+        self,
+        models: list[str],
+        deadline: float = LLM_DEADLINE_SECONDS,
+        hedge_quantile: float = LLM_HEDGE_QUANTILE,
+        hedge_default_delay: float = LLM_HEDGE_DEFAULT_DELAY_SECONDS,
+        hedge_max_rate: float = LLM_HEDGE_MAX_RATE,
+    ):
+        self.models = list(dict.fromkeys(models))
+        self.stats = {model: ModelStats(model) for model in self.models}
+        self.deadline = deadline
+        self.hedge_quantile = hedge_quantile
+        self.hedge_default_delay = hedge_default_delay
+        self.hedge_max_rate = hedge_max_rate
+        # Whether each recent call was hedged
+        self._hedged: collections.deque[bool] = collections.deque(maxlen=HEDGE_WINDOW)
+
+    def ranked_models(self) -> list[str]:
+        """Models in the order they are tried: healthy before unhealthy, the primary before the alternates, and
+        alternates by their median latency."""
+        primary = self.models[0]
+
+        def key(model: str) -> tuple:
+            stats = self.stats[model]
+            median = stats.quantile(0.5)
+            return (not stats.healthy, model != primary, median if median is not None else float("inf"))
+
+        return sorted(self.models, key=key)
+
+    def hedge_delay(self, model: str) -> float:
+        """How long an attempt on a model runs before the call is hedged."""
+        delay = self.stats[model].quantile(self.hedge_quantile)
+        return self.hedge_default_delay if delay is None else delay
+
+    def _may_hedge(self) -> bool:
+        return sum(self._hedged) < self.hedge_max_rate * max(len(self._hedged), 1)
+
+    async def call(self, attempt: Callable[[str], Awaitable[T]]) -> T:
+        """Run `attempt(model)` on the best model, hedging or failing over to the others, and return the first
+        result. Raises the last attempt's error if every model fails, or LLMDeadlineExceeded."""
+        loop = asyncio.get_running_loop()
+        candidates = collections.deque(self.ranked_models())
+        deadline = loop.time() + self.deadline
+        running: dict[asyncio.Task, tuple[str, float]] = {}
+        # At most one hedge per call; failovers start a new hedge timer for the model taking over
+        hedge_at: float | None = None
+        hedged = False
+        last_error: BaseException | None = None
+        # How attempts still running when the call ends are counted: losers of a race, or timed out
+        unfinished_outcome = "cancelled"
+
+        def launch() -> None:
+            nonlocal hedge_at
+            model = candidates.popleft()
+            running[asyncio.create_task(attempt(model))] = (model, loop.time())
+            hedge_at = loop.time() + self.hedge_delay(model) if candidates and not hedged else None
+
+        launch()
+        try:
+            while running:
+                wake_at = deadline if hedge_at is None else min(deadline, hedge_at)
+                done, _ = await asyncio.wait(
+                    running, timeout=max(wake_at - loop.time(), 0), return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    if loop.time() >= deadline:
+                        for model, _ in running.values():
+                            self.stats[model].record(False)
+                        unfinished_outcome = "timeout"
+                        raise LLMDeadlineExceeded(f"No LLM response within {self.deadline:g}s")
+                    # The attempt is slower than usual: ask the next model too, within the hedge budget
+                    hedge_at = None
+                    if self._may_hedge():
+                        hedged = True
+                        LLM_HEDGES.inc(reason="slow")
+                        logger.info("Hedging slow LLM call with %s", candidates[0])
+                        launch()
+                    continue
+
+                for task in done:
+                    model, started = running.pop(task)
+                    if task.exception() is None:
+                        self.stats[model].record(True, loop.time() - started)
+                        LLM_ATTEMPTS.inc(model=model, outcome="success")
+                        return task.result()
+                    last_error = task.exception()
+                    self.stats[model].record(False)
+                    LLM_ATTEMPTS.inc(model=model, outcome="error")
+                    logger.warning("LLM call to %s failed: %s", model, last_error)
+
+                if not running and candidates:
+                    # Failover runs one attempt at a time, so it is not limited by the hedge budget
+                    LLM_HEDGES.inc(reason="error")
+                    launch()
+            raise last_error
+        finally:
+            self._hedged.append(hedged)
+            # Cancel the attempts that lost the race, timed out or are still running when the caller gives up
+            for task, (model, _) in running.items():
+                task.cancel()
+                LLM_ATTEMPTS.inc(model=model, outcome=unfinished_outcome)
+
+
+llm_router = LLMRouter([LLM_MODEL, *LLM_FALLBACK_MODELS])
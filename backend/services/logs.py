@@ -0,0 +1,142 @@
+import datetime
+import json
+import logging
+import queue
+import sys
+import zlib
+from logging.handlers import QueueHandler, QueueListener
+
+from config import LOG_FORMAT, LOG_INFO_SAMPLE_RATIOS, LOG_LEVEL
+from services.tracing import request_id_var, request_scope_var
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s"
+
+_listener: QueueListener | None = None
+
+
+def parse_sample_ratios(spec: str) -> dict[str, float]:
+    """Parse "route=ratio,route=ratio" into {route template: ratio}."""
+    ratios = {}
+    for part in filter(None, (part.strip() for part in spec.split(","))):
+        route, _, ratio = part.rpartition("=")
+        ratios[route.strip()] = float(ratio)
+    return ratios
+
+
+class RequestContextFilter(logging.Filter):
+    """Adds the request ID and route template to records.
+
+    Runs on the emitting thread, the only place the request's context variables are visible.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        request_id = request_id_var.get()
+        if request_id:
+            record.request_id = request_id
+        scope = request_scope_var.get()
+        if scope is not None:
+            route = scope.get("route")
+            record.route = route.path if route is not None else scope["path"]
+        return True
+
+
+class RouteSamplingFilter(logging.Filter):
+    """Keeps INFO and lower records for a fraction of requests on high-volume routes.
+
+    Sampling is decided per request ID, so a sampled request keeps all of its lines. Warnings and errors are
+    always kept.
+    """
+
+    def __init__(self, ratios: dict[str, float]):
+        super().__init__()
+        self.ratios = ratios
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO:
+            return True
+        ratio = self.ratios.get(getattr(record, "route", ""))
+        if ratio is None or ratio >= 1:
+            return True
+        return zlib.crc32(getattr(record, "request_id", "").encode()) / 2**32 < ratio
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with the field names Cloud Logging recognizes."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "severity": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", ""):
+            entry["request_id"] = record.request_id
+        if getattr(record, "route", ""):
+            entry["route"] = record.route
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Queues records unformatted so %-formatting and serialization happen on the listener thread.
+
+    The queue never leaves the process, so records do not need to be made picklable first.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _output_handler() -> logging.Handler:
+    handler = logging.StreamHandler(sys.stderr)
+    if LOG_FORMAT == "text":
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT, datefmt="%Y-%m-%d %H:%M:%S", defaults={"request_id": "-"}))
+    else:
+        handler.setFormatter(JsonFormatter())
+    return handler
+
+
+def init_logging() -> None:
+    """Route all logging through a queue drained by a background thread (called from the app lifespan).
+
+    Request handlers only pay for filtering and an enqueue; formatting and stream I/O happen off the event loop.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = _DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+    queue_handler.addFilter(RouteSamplingFilter(parse_sample_ratios(LOG_INFO_SAMPLE_RATIOS)))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(LOG_LEVEL)
+
+    _listener = QueueListener(log_queue, _output_handler(), respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and log synchronously from then on (called on app shutdown)."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    _listener = None
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    handler = _output_handler()
+    handler.addFilter(RequestContextFilter())
+    root.addHandler(handler)
@@ -0,0 +1,161 @@
+"""Maintenance tasks run outside request handling, from a scheduler or by hand.
+
+Purging archived recipes deletes recipes archived more than PURGE_ARCHIVED_AFTER_DAYS ago (by the archivedAt field
+set by archive_recipe) together with everything that refers to them:
+
+- their image objects in Cloud Storage: the legacy recipe-images/{id}.jpg and the variants under recipe-images/{id}/
+- the documents, through a BulkWriter limited to PURGE_MAX_OPS_PER_SECOND so the purge does not compete with live
+  traffic for Firestore write capacity
+- their recipe_cache entries in the process running the purge (other instances drop them within the cache TTL)
+
+Recipes are read in pages of PURGE_PAGE_SIZE and images are deleted before their document, so a recipe whose images
+could not be deleted is kept and retried by the next run. A dry run lists what would be deleted without deleting it.
+
+    uv run python -m services.maintenance purge-archived [--days 30] [--rate 50] [--dry-run]
+"""
+
+import argparse
+import asyncio
+import datetime
+import logging
+
+from google.cloud.firestore_v1.base_query import FieldFilter
+from google.cloud.firestore_v1.bulk_writer import BulkWriterOptions
+
+from config import PURGE_ARCHIVED_AFTER_DAYS, PURGE_IMAGE_CONCURRENCY, PURGE_MAX_OPS_PER_SECOND, PURGE_PAGE_SIZE
+from services.cache import recipe_cache
+from services.firebase import close_firebase, get_db
+from services.resilience import guarded, retrying
+from services.storage import get_storage_bucket
+
+logger = logging.getLogger(__name__)
+
+# Attempts of a document delete before BulkWriter gives up on it
+PURGE_WRITE_ATTEMPTS = 5
+
+
+def _delete_images(bucket, recipe_id: str, dry_run: bool) -> int:
+    """Delete (or with dry_run, only count) a recipe's image objects. Returns how many there were."""
+    prefix = f"recipe-images/{recipe_id}"
+    blobs = [
+        blob
+        for blob in bucket.list_blobs(prefix=prefix)
+        if blob.name == f"{prefix}.jpg" or blob.name.startswith(f"{prefix}/")
+    ]
+    if blobs and not dry_run:
+        # Objects already gone (a rerun after an interrupted purge) are not an error
+        bucket.delete_blobs(blobs, on_error=lambda blob: None)
+    return len(blobs)
+
+
+def _on_write_error(failure, bulk_writer) -> bool:
+    """BulkWriter error callback: retry a failed delete a few times, then log it and give up."""
+    if failure.attempts < PURGE_WRITE_ATTEMPTS:
+        return True
+    logger.error("Could not delete %s: %s", failure.operation.reference._document_path, failure.message)
+    return False
+
+
+async def purge_archived_recipes(
+    days: int = PURGE_ARCHIVED_AFTER_DAYS,
+    dry_run: bool = False,
+    rate: int = PURGE_MAX_OPS_PER_SECOND,
+    page_size: int = PURGE_PAGE_SIZE,
+) -> dict[str, int]:
+    """Delete recipes archived more than `days` ago with their images and cache entries (see the module docstring).
+
+    Returns the number of recipes and image objects deleted, or that would be deleted in a dry run.
+    """
+    threshold = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=days)
+    db = get_db()
+    bucket = get_storage_bucket()
+    query = (
+        db.collection("recipes")
+        .where(filter=FieldFilter("archived", "==", True))
+        .where(filter=FieldFilter("archivedAt", "<", threshold))
+        .order_by("archivedAt")
+        .order_by("__name__")
+        .select(["archivedAt"])
+        .limit(page_size)
+    )
+    writer = None
+    if not dry_run:
+        writer = db.bulk_writer(BulkWriterOptions(initial_ops_per_second=rate, max_ops_per_second=rate))
+        writer.on_write_error(_on_write_error)
+    image_slots = asyncio.Semaphore(PURGE_IMAGE_CONCURRENCY)
+    purged = {"recipes": 0, "images": 0, "skipped": 0}
+
+    async def delete_images(recipe_id: str) -> int | None:
+        if bucket is None:
+            return 0
+        async with image_slots:
+            try:
+                return await retrying(
+                    "gcs.delete_objects", lambda: asyncio.to_thread(_delete_images, bucket, recipe_id, dry_run)
+                )
+            except Exception as e:
+                logger.warning("Could not delete images of recipe %s, keeping it for the next run: %s", recipe_id, e)
+                return None
+
+    def queue_deletes(references: list) -> None:
+        # BulkWriter sends batches from its own threads and blocks here while it is over its rate limit
+        for reference in references:
+            writer.delete(reference)
+
+    cursor = None
+    try:
+        while True:
+            page = query if cursor is None else query.start_after(cursor)
+            async with guarded("firestore.query"):
+                docs = [doc async for doc in page.stream()]
+
+            image_counts = await asyncio.gather(*(delete_images(doc.id) for doc in docs))
+            deletable = [doc for doc, count in zip(docs, image_counts, strict=True) if count is not None]
+            if writer is not None:
+                await asyncio.to_thread(queue_deletes, [doc.reference for doc in deletable])
+                for doc in deletable:
+                    recipe_cache.pop(f"recipe_{doc.id}", None)
+            purged["recipes"] += len(deletable)
+            purged["images"] += sum(count for count in image_counts if count is not None)
+            purged["skipped"] += len(docs) - len(deletable)
+
+            if len(docs) < page_size:
+                break
+            cursor = {"archivedAt": docs[-1].get("archivedAt"), "__name__": docs[-1].id}
+    finally:
+        if writer is not None:
+            await asyncio.to_thread(writer.close)
+
+    logger.info(
+        "%s %d archived recipes and %d images older than %d days (%d kept after image errors)",
+        "Would purge" if dry_run else "Purged",
+        purged["recipes"],
+        purged["images"],
+        days,
+        purged["skipped"],
+    )
+    return purged
+
+
+async def _main(args: argparse.Namespace) -> None:
+    try:
+        await purge_archived_recipes(days=args.days, dry_run=args.dry_run, rate=args.rate)
+    finally:
+        await close_firebase()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    purge = commands.add_parser("purge-archived", help="Delete old archived recipes with their images")
+    purge.add_argument("--days", type=int, default=PURGE_ARCHIVED_AFTER_DAYS, help="Minimum days since archiving")
+    purge.add_argument("--rate", type=int, default=PURGE_MAX_OPS_PER_SECOND, help="Firestore deletes per second")
+    purge.add_argument("--dry-run", action="store_true", help="Only report what would be deleted")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
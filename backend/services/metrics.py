@@ -0,0 +1,258 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+from services.tracing import tracer
+
+# Default latency buckets in seconds, spanning cache hits (~1 ms) to full LLM generations (~60 s)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+
+class _Metric:
+    """Base class for metrics whose values are sharded per thread.
+
+    Each thread only ever writes to its own shard, so updates need no lock; collection merges the shards.
+    """
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._local = threading.local()
+        self._shards: list[dict] = []
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard: dict = {}
+            self._local.shard = shard
+            # list.append is atomic under the GIL, so registering a new shard is safe without a lock
+            self._shards.append(shard)
+            return shard
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _format_labels(self, key: tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key, strict=True)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def collect(self) -> dict[tuple[str, ...], float]:
+        totals: dict[tuple[str, ...], float] = {}
+        for shard in list(self._shards):
+            for key, value in shard.copy().items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def render(self) -> list[str]:
+        return [f"{self.name}{self._format_labels(key)} {value}" for key, value in sorted(self.collect().items())]
+
+
+class Gauge(_Metric):
+    """A point-in-time value. Setting is a single dict assignment, so one shared shard is enough."""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+    def render(self) -> list[str]:
+        return [f"{self.name}{self._format_labels(key)} {value}" for key, value in sorted(self._values.copy().items())]
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: str) -> None:
+        shard = self._shard()
+        key = self._key(labels)
+        # Format: [count per bucket..., count above the last bucket, sum, total count]
+        state = shard.get(key)
+        if state is None:
+            state = shard[key] = [0] * (len(self.buckets) + 3)
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-2] += value
+        state[-1] += 1
+
+    def collect(self) -> dict[tuple[str, ...], list[float]]:
+        totals: dict[tuple[str, ...], list[float]] = {}
+        for shard in list(self._shards):
+            for key, state in shard.copy().items():
+                merged = totals.setdefault(key, [0] * len(state))
+                for i, value in enumerate(list(state)):
+                    merged[i] += value
+        return totals
+
+    def render(self) -> list[str]:
+        lines = []
+        for key, state in sorted(self.collect().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, state, strict=False):
+                cumulative += count
+                bucket_labels = self._format_labels(key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            inf_labels = self._format_labels(key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf_labels} {state[-1]}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {state[-2]}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {state[-1]}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Singleton registry and the application's metrics
+registry = Registry()
+
+REQUEST_DURATION = registry.register(
+    Histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route", "status"))
+)
+STAGE_DURATION = registry.register(
+    Histogram("stage_duration_seconds", "Latency of individual processing stages", ("stage", "status"))
+)
+LLM_TIME_TO_FIRST_TOKEN = registry.register(
+    Histogram("llm_time_to_first_token_seconds", "Time until the LLM streamed its first token", ("operation",))
+)
+LLM_TOKENS = registry.register(Counter("llm_tokens_total", "LLM tokens used", ("operation", "type")))
+CACHE_REQUESTS = registry.register(Counter("cache_requests_total", "In-process cache lookups", ("cache", "result")))
+EVENT_LOOP_LAG = registry.register(
+    Histogram(
+        "event_loop_lag_seconds",
+        "Delay between when the event loop should have woken a task and when it did",
+        buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+    )
+)
+EVENT_LOOP_BLOCKS = registry.register(
+    Counter("event_loop_blocks_total", "Times a request blocked the event loop beyond the threshold", ("route",))
+)
+RECIPE_UPDATES = registry.register(
+    Counter("recipe_updates_total", "Recipe updates by how they were applied", ("path",))
+)
+JOB_DURATION = registry.register(
+    Histogram("job_duration_seconds", "Run time of background jobs by final status", ("kind", "status"))
+)
+JOB_QUEUE_DEPTH = registry.register(Gauge("job_queue_depth", "Background jobs waiting for a worker"))
+LLM_ATTEMPTS = registry.register(
+    Counter("llm_attempts_total", "LLM calls per model by outcome", ("model", "outcome"))
+)
+LLM_HEDGES = registry.register(
+    Counter("llm_hedges_total", "LLM calls also sent to another model, because slow or failed", ("reason",))
+)
+LLM_MODEL_HEALTH = registry.register(Gauge("llm_model_health", "Recent success score of each LLM model", ("model",)))
+LLM_OUTPUT_REPAIRS = registry.register(
+    Counter("llm_output_repairs_total", "LLM outputs fixed locally or continued after truncation", ("operation", "kind"))
+)
+LLM_TOKEN_BUDGET_CALLS = registry.register(
+    Counter("llm_token_budget_calls_total", "LLM calls by whether they fit their output budget", ("operation", "outcome"))
+)
+LLM_TOKEN_BUDGET_SAVED = registry.register(
+    Counter("llm_token_budget_saved_tokens_total", "Output tokens requested below LLM_MAX_TOKENS", ("operation",))
+)
+BREAKER_STATE = registry.register(
+    Gauge("circuit_breaker_state", "Dependency circuit breaker state (0 closed, 1 half-open, 2 open)", ("dependency",))
+)
+DEPENDENCY_REJECTIONS = registry.register(
+    Counter("dependency_rejections_total", "Calls failed fast without reaching a dependency", ("dependency", "reason"))
+)
+
+
+@contextmanager
+def timed(stage: str):
+    """Record the duration of a block as a stage latency, labelled ok/error, inside a tracing span.
+
+    Yields the span so callers can attach attributes.
+    """
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        with tracer.start_span(stage) as span:
+            yield span
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        STAGE_DURATION.observe(time.perf_counter() - start, stage=stage, status=status)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency per route template, method and status code."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope; use its template to keep label cardinality bounded
+            route = scope.get("route")
+            REQUEST_DURATION.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=str(status_code),
+            )
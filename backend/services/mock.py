@@ -0,0 +1,51 @@
+import asyncio
+import math
+import random
+
+from config import MOCK_IMAGE_LATENCY, MOCK_LLM_LATENCY
+
+# z-score of the 95th percentile of a standard normal distribution
+_Z95 = 1.6449
+
+
+class MockDependencyError(Exception):
+    """Injected failure of a mocked dependency."""
+
+
+class LatencyModel:
+    """Log-normal latency distribution with an optional error rate, for MOCK_MODE and benchmarks.
+
+    Specs look like "median_ms[:p95_ms[:error_rate]]", e.g. "1500:6000:0.01". A spec without a p95 is a fixed delay.
+    """
+
+    def __init__(self, median_ms: float, p95_ms: float | None = None, error_rate: float = 0.0):
+        self.median_ms = median_ms
+        self.p95_ms = p95_ms if p95_ms is not None else median_ms
+        self.error_rate = error_rate
+        self._mu = math.log(max(median_ms, 1e-3))
+        self._sigma = math.log(max(self.p95_ms, median_ms, 1e-3) / max(median_ms, 1e-3)) / _Z95
+
+    @classmethod
+    def from_spec(cls, spec: str) -> "LatencyModel":
+        parts = [float(part) for part in spec.split(":")]
+        return cls(*parts)
+
+    def sample(self) -> float:
+        """Draw one latency in seconds."""
+        if self._sigma == 0:
+            return self.median_ms / 1000
+        return random.lognormvariate(self._mu, self._sigma) / 1000
+
+    async def wait(self) -> None:
+        """Sleep for one sampled latency, then fail with probability error_rate."""
+        await asyncio.sleep(self.sample())
+        if self.error_rate and random.random() < self.error_rate:
+            raise MockDependencyError("injected failure")
+
+    def __repr__(self) -> str:
+        return f"LatencyModel({self.median_ms:g}:{self.p95_ms:g}:{self.error_rate:g})"
+
+
+# Latency of the mocked LLM and Gemini calls used in MOCK_MODE
+mock_llm_latency = LatencyModel.from_spec(MOCK_LLM_LATENCY)
+mock_image_latency = LatencyModel.from_spec(MOCK_IMAGE_LATENCY)
@@ -0,0 +1,221 @@
+"""Per-serving macros computed from the ingredient list instead of estimated by the LLM.
+
+The ingredient nutrition table (data/nutrition.csv: nutrients per 100 g, a density for volume measures and a weight
+per piece for counted items) is compiled once into a .npy file keyed by its content hash and memory-mapped, so every
+worker process shares the same pages. Ingredient lines are parsed with the scaling module's quantity grammar and
+matched to a table row by the longest alias they contain; the arithmetic for all lines of all recipes in a batch is
+then done in one NumPy pass.
+
+Lines without a leading quantity ("Salt to taste") are ignored. If too few of the quantified lines match the table
+(NUTRITION_MIN_COVERAGE) or the servings are unknown, no macros are computed and the caller keeps the LLM's estimate.
+"""
+
+import csv
+import hashlib
+import io
+import logging
+import os
+import re
+import tempfile
+
+import numpy as np
+
+from config import NUTRITION_MIN_COVERAGE, NUTRITION_TABLE_PATH
+from models import Macros, Recipe
+from services.scaling import PARENTHETICAL, QUANTITY, SIZE_AFTER, UNIT_ALIASES, UNITS, parse_number
+
+logger = logging.getLogger(__name__)
+
+# Table columns: nutrients per 100 g, then grams per ml and grams per piece (0 when not applicable)
+COLUMNS = ("kcal", "protein", "carbs", "fat", "density", "each")
+NUTRIENTS = 4
+DENSITY, EACH = 4, 5
+
+# How a line's amount converts to grams: directly, through the row's density or through its weight per piece
+GRAMS, MILLILITERS, PIECES = 0, 1, 2
+
+# Longest alias, in words, looked up in an ingredient line
+MAX_ALIAS_WORDS = 4
+
+_WORD = re.compile(r"[a-zà-ÿ]+(?:-[a-zà-ÿ]+)*")
+
+
+def _singular(word: str) -> str:
+    """Naive singular form, applied to both the aliases and the ingredient text so that they match either way."""
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith("oes") or word.endswith("ches") or word.endswith("shes"):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+        return word[:-1]
+    return word
+
+
+def _words(text: str) -> tuple[str, ...]:
+    return tuple(_singular(word) for word in _WORD.findall(text.lower()))
+
+
+class NutritionTable:
+    """Ingredient rows (a memory-mapped float32 array with COLUMNS) and the aliases that name them."""
+
+    def __init__(self, values: np.ndarray, names: list[str], aliases: dict[tuple[str, ...], int]):
+        self.values = values
+        self.names = names
+        self.aliases = aliases
+
+    @classmethod
+    def load(cls, path: str, cache_dir: str | None = None) -> "NutritionTable":
+        """Read the CSV table, compiling its numbers to a cached .npy file the first time, and memory-map them."""
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        rows = list(csv.DictReader(io.StringIO(text), skipinitialspace=True))
+        rows = [row for row in rows if row["name"] and not row["name"].startswith("#")]
+
+        names = [row["name"] for row in rows]
+        aliases = {}
+        for index, row in enumerate(rows):
+            for alias in [row["name"], *row["aliases"].split("|")]:
+                if alias.strip():
+                    aliases.setdefault(_words(alias), index)
+
+        digest = hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+        compiled = os.path.join(cache_dir or tempfile.gettempdir(), f"nutrition-{digest}.npy")
+        if not os.path.exists(compiled):
+            values = np.array([[float(row[column] or 0) for column in COLUMNS] for row in rows], dtype=np.float32)
+            # Write under a temporary name so that concurrent workers never map a partial file
+            fd, partial = tempfile.mkstemp(dir=os.path.dirname(compiled), suffix=".npy")
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, values)
+            os.replace(partial, compiled)
+            logger.info("Compiled nutrition table %s (%d ingredients)", compiled, len(rows))
+        return cls(np.load(compiled, mmap_mode="r"), names, aliases)
+
+    def match(self, text: str) -> int | None:
+        """Row of the longest alias found in an ingredient name, or None. Between aliases of the same length the
+        last one wins, since the head noun comes last ("large egg yolks"). The text before the first comma is tried
+        first ("butter, softened"), then the whole text."""
+        for part in dict.fromkeys([text.split(",")[0], text]):
+            words = _words(PARENTHETICAL.sub(" ", part))
+            for size in range(min(MAX_ALIAS_WORDS, len(words)), 0, -1):
+                for start in range(len(words) - size, -1, -1):
+                    row = self.aliases.get(words[start:start + size])
+                    if row is not None:
+                        return row
+        return None
+
+
+_table: NutritionTable | None = None
+
+
+def get_nutrition_table() -> NutritionTable:
+    """The nutrition table at NUTRITION_TABLE_PATH, loaded on first use."""
+    global _table
+    if _table is None:
+        _table = NutritionTable.load(NUTRITION_TABLE_PATH)
+    return _table
+
+
+def _amount(match: re.Match) -> float:
+    low = parse_number(match.group("low"))
+    high = match.group("high")
+    return (low + parse_number(high)) / 2 if high else low
+
+
+def _measure(match: re.Match) -> tuple[float, int] | None:
+    """Amount and conversion kind of a quantity with a mass or volume unit, or None for a bare count."""
+    unit = match.group("unit")
+    if not unit:
+        return None
+    dimension, size, _ = UNITS[UNIT_ALIASES[unit.lower()]]
+    return _amount(match) * size, GRAMS if dimension == "mass" else MILLILITERS
+
+
+def parse_ingredient(item: str) -> tuple[float, int, str] | None:
+    """Split an ingredient line into (amount, conversion kind, ingredient text), or None if it has no leading
+    quantity.
+
+    "1 cup (150g) flour" is 150 g of flour, "2 (14 oz) cans tomatoes" is 28 oz of tomatoes and "3 cloves garlic"
+    is three pieces of garlic.
+    """
+    item = item.strip().lstrip("-•* ")
+    match = QUANTITY.match(item)
+    if match is None or SIZE_AFTER.match(item, match.end()):
+        return None
+    rest = item[match.end():]
+    measured = _measure(match)
+
+    # A parenthetical right after the quantity is a metric equivalent or a package size
+    parenthetical = PARENTHETICAL.match(rest)
+    if parenthetical:
+        inner = QUANTITY.search(parenthetical.group("body"))
+        inner_measured = _measure(inner) if inner else None
+        if inner_measured and (measured is None or inner_measured[1] == GRAMS):
+            count = 1.0 if measured else _amount(match)
+            measured = (count * inner_measured[0], inner_measured[1])
+            rest = rest[parenthetical.end():]
+
+    if measured is None:
+        return _amount(match), PIECES, rest
+    return measured[0], measured[1], rest
+
+
+def _servings(recipe: dict) -> float:
+    """Number of servings, or NaN if the servings text has none."""
+    match = QUANTITY.search(recipe.get("servings") or "")
+    amount = _amount(match) if match else 0
+    return amount if amount > 0 else np.nan
+
+
+def compute_macros_batch(recipes: list[dict]) -> list[dict | None]:
+    """Per-serving macros ({"calories", "protein", "carbs", "fat"}) for each recipe dict, or None where they
+    cannot be computed reliably. All ingredient lines of all recipes are evaluated in one vectorized pass."""
+    table = get_nutrition_table()
+    owners, rows, amounts, kinds = [], [], [], []
+    quantified = np.zeros(len(recipes))
+    for index, recipe in enumerate(recipes):
+        for group in recipe.get("ingredients") or []:
+            for item in group.get("items") or []:
+                parsed = parse_ingredient(item)
+                if parsed is None:
+                    continue
+                quantified[index] += 1
+                row = table.match(parsed[2])
+                if row is not None:
+                    owners.append(index)
+                    rows.append(row)
+                    amounts.append(parsed[0])
+                    kinds.append(parsed[1])
+
+    owners = np.asarray(owners, dtype=np.intp)
+    values = table.values[np.asarray(rows, dtype=np.intp)]
+    # Grams per line: a mass as is, a volume times the density, a count times the weight per piece
+    per_unit = np.column_stack([np.ones(len(rows), dtype=np.float32), values[:, DENSITY], values[:, EACH]])
+    grams = np.asarray(amounts) * per_unit[np.arange(len(rows)), np.asarray(kinds, dtype=np.intp)]
+    # Lines whose unit the row cannot convert (a volume of something only sold by weight) count as unmatched
+    converted = grams > 0
+
+    totals = np.zeros((len(recipes), NUTRIENTS))
+    np.add.at(totals, owners[converted], values[converted, :NUTRIENTS] * (grams[converted, None] / 100))
+    matched = np.bincount(owners[converted], minlength=len(recipes))
+    servings = np.array([_servings(recipe) for recipe in recipes])
+    per_serving = np.rint(totals / servings[:, None])
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        reliable = (matched / quantified >= NUTRITION_MIN_COVERAGE) & ~np.isnan(servings)
+    return [
+        dict(zip(Macros.model_fields, map(int, per_serving[index]), strict=True)) if reliable[index] else None
+        for index in range(len(recipes))
+    ]
+
+
+def compute_macros(recipe: dict) -> dict | None:
+    """Per-serving macros of one recipe dict, or None (see compute_macros_batch)."""
+    return compute_macros_batch([recipe])[0]
+
+
+def recompute_macros(recipe: Recipe) -> Recipe:
+    """The recipe with its macros replaced by computed ones, or unchanged if they cannot be computed."""
+    macros = compute_macros(recipe.model_dump(include={"servings", "ingredients"}))
+    if macros is None:
+        return recipe
+    return recipe.model_copy(update={"macros": Macros.model_construct(**macros)})
@@ -0,0 +1,95 @@
+"""Storage format of recipe documents.
+
+Schema version 2 splits the recipe into:
+
+- "summary": title, description, times and servings, small enough for list views and share previews
+- "body": the full Recipe as gzip-compressed JSON (instructions, notes and markup make up most of a recipe)
+
+Version 1 documents store the full recipe as a plain "recipe" map. Readers accept both; documents read in full are
+rewritten to the current version in the background.
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+
+from firebase_admin import firestore
+
+from services.firebase import get_db
+from services.resilience import guarded
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 2
+SUMMARY_FIELDS = ("title", "description", "prep_time", "cook_time", "servings")
+
+# Field masks for reads, covering both schema versions
+SUMMARY_PROJECTION = ["schema_version", "summary", "recipe.title", "recipe.description", "image_url", "timestamp"]
+TITLE_PROJECTION = ["schema_version", "summary.title", "recipe.title", "timestamp"]
+BODY_PROJECTION = ["schema_version", "body", "recipe"]
+
+# Upgrade writes in flight (kept so the tasks are not garbage collected before they finish)
+_upgrade_tasks: set[asyncio.Task] = set()
+
+
+def encode_recipe(recipe: dict) -> dict:
+    """Return the document fields storing a recipe in the current schema version."""
+    body = json.dumps(recipe, separators=(",", ":"), ensure_ascii=False).encode()
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "summary": {field: recipe.get(field, "") for field in SUMMARY_FIELDS},
+        "body": gzip.compress(body, compresslevel=6),
+    }
+
+
+def decode_recipe(data: dict) -> dict:
+    """Return the full recipe stored in a document of any schema version."""
+    if data.get("schema_version", 1) >= 2:
+        return json.loads(gzip.decompress(data["body"]))
+    recipe = data.get("recipe", {})
+    return recipe if isinstance(recipe, dict) else {}
+
+
+def recipe_summary(data: dict) -> dict:
+    """Return the summary fields of a document of any schema version (read with SUMMARY_PROJECTION or more)."""
+    if data.get("schema_version", 1) >= 2:
+        return data.get("summary", {})
+    recipe = data.get("recipe", {})
+    return {field: recipe.get(field, "") for field in SUMMARY_FIELDS} if isinstance(recipe, dict) else {}
+
+
+def read_document(data: dict) -> dict:
+    """Return a document with its recipe decoded into a plain "recipe" field, as routes and caches use it."""
+    document = {key: value for key, value in data.items() if key not in ("body", "summary", "schema_version")}
+    document["recipe"] = decode_recipe(data)
+    return document
+
+
+def recipe_update_fields(recipe: dict) -> dict:
+    """Fields for an update() that replaces a document's recipe, upgrading old-version documents as it goes."""
+    return {**encode_recipe(recipe), "recipe": firestore.DELETE_FIELD}
+
+
+async def _upgrade(doc_ref, recipe: dict, update_time) -> None:
+    try:
+        # Only overwrite the version that was read; a concurrent update wins and is already current
+        option = get_db().write_option(last_update_time=update_time)
+        async with guarded("firestore.update"):
+            await doc_ref.update(recipe_update_fields(recipe), option=option)
+        logger.info("Upgraded recipe %s to schema version %s", doc_ref.id, SCHEMA_VERSION)
+    except Exception as e:
+        logger.warning("Could not upgrade recipe %s: %s", doc_ref.id, e)
+
+
+def upgrade_in_background(doc) -> None:
+    """Rewrite an old-version document snapshot in the current format without delaying the caller.
+
+    The snapshot must contain the full recipe (read with BODY_PROJECTION or the whole document).
+    """
+    data = doc.to_dict()
+    if data.get("schema_version", 1) >= SCHEMA_VERSION:
+        return
+    task = asyncio.create_task(_upgrade(doc.reference, decode_recipe(data), doc.update_time))
+    _upgrade_tasks.add(task)
+    task.add_done_callback(_upgrade_tasks.discard)
@@ -0,0 +1,212 @@
+"""Fast failure when a dependency (Firestore, Firebase Auth, Gemini, Cloud Storage) degrades.
+
+Calls are wrapped by stage name, which also times them like timed():
+
+    async with guarded("firestore.get"):
+        doc = await doc_ref.get()
+
+    users = await retrying("auth.get_users", lambda: asyncio.to_thread(...))
+
+The prefix of the stage picks the dependency, and each dependency has:
+
+- a circuit breaker: after BREAKER_FAILURE_THRESHOLD consecutive transient failures, calls fail immediately with
+  DependencyUnavailable (a 503) for BREAKER_RESET_SECONDS; then a single trial call decides whether it closes again
+- a bulkhead: a cap on its calls in flight, so a slow dependency cannot take every request down with it; callers
+  wait up to BULKHEAD_WAIT_SECONDS for a slot
+- a per-call timeout
+- bounded retries with jittered exponential backoff, for idempotent calls made through retrying()
+
+Only transient errors (timeouts, connection errors, 5xx and 429 responses) count as failures: a "not found" or
+"permission denied" still means the dependency answered. Calls to blocking SDKs run in threads, which a timeout
+abandons rather than stops.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, TypeVar
+
+from config import (
+    AUTH_MAX_CONCURRENCY,
+    AUTH_TIMEOUT_SECONDS,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_RESET_SECONDS,
+    BULKHEAD_WAIT_SECONDS,
+    FIRESTORE_MAX_CONCURRENCY,
+    FIRESTORE_TIMEOUT_SECONDS,
+    GCS_POOL_MAXSIZE,
+    GCS_TIMEOUT_SECONDS,
+    GEMINI_MAX_CONCURRENCY,
+    GEMINI_TIMEOUT_SECONDS,
+    RETRY_ATTEMPTS,
+    RETRY_BASE_DELAY_SECONDS,
+    RETRY_MAX_DELAY_SECONDS,
+)
+from services.metrics import BREAKER_STATE, DEPENDENCY_REJECTIONS, timed
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Status names used by gRPC and Firebase errors for transient failures
+_TRANSIENT_CODES = {"UNAVAILABLE", "DEADLINE_EXCEEDED", "INTERNAL", "RESOURCE_EXHAUSTED", "UNKNOWN"}
+
+
+class DependencyUnavailable(Exception):
+    """A call was failed fast because its dependency's breaker is open or its bulkhead is full."""
+
+    def __init__(self, dependency: str, reason: str, retry_after: float):
+        super().__init__(f"{dependency} unavailable ({reason})")
+        self.dependency = dependency
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def is_transient(error: BaseException) -> bool:
+    """Whether an error says the dependency is struggling (worth retrying, and counted by its breaker)."""
+    if isinstance(error, (TimeoutError, OSError)):
+        return True
+    # google.api_core and google.genai errors carry the HTTP status, Firebase errors a status name
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return code == 429 or code >= 500
+    return isinstance(code, str) and code in _TRANSIENT_CODES
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures and lets one trial call through once the reset time has passed."""
+
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = 0.0
+        self._state = CLOSED
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return self._state
+
+    def retry_after(self) -> float:
+        return max(self.reset_timeout - (time.monotonic() - self.opened_at), 0)
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead. In the half-open state only one trial call runs at a time."""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self._trial_running:
+            self._set_state(HALF_OPEN)
+            self._trial_running = True
+            return True
+        return False
+
+    def record(self, success: bool | None) -> None:
+        """Record a call's outcome; None (the caller went away) gives no verdict but ends a trial."""
+        self._trial_running = False
+        if success is None:
+            return
+        if success:
+            self.failures = 0
+            if self._state != CLOSED:
+                logger.info("Circuit breaker for %s closed", self.name)
+                self._set_state(CLOSED)
+            return
+        self.failures += 1
+        if self._state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self._state != OPEN:
+                logger.warning("Circuit breaker for %s opened after %d failures", self.name, self.failures)
+            self.opened_at = time.monotonic()
+            self._set_state(OPEN)
+
+    def _set_state(self, state: str) -> None:
+        self._state = state
+        BREAKER_STATE.set(_STATE_VALUES[state], dependency=self.name)
+
+
+class Dependency:
+    """Breaker, bulkhead and timeout shared by all calls to one dependency."""
+
+    def __init__(self, name: str, timeout: float, max_concurrency: int):
+        self.name = name
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.breaker = CircuitBreaker(name)
+        self._slots = asyncio.Semaphore(max_concurrency)
+
+    def _reject(self, reason: str, retry_after: float) -> DependencyUnavailable:
+        DEPENDENCY_REJECTIONS.inc(dependency=self.name, reason=reason)
+        return DependencyUnavailable(self.name, reason, retry_after)
+
+    @asynccontextmanager
+    async def guard(self, stage: str) -> AsyncIterator:
+        """Run a block as a call to this dependency (see the module docstring). Yields the stage's span."""
+        if self.breaker.state == OPEN:
+            raise self._reject("circuit open", self.breaker.retry_after())
+        try:
+            await asyncio.wait_for(self._slots.acquire(), BULKHEAD_WAIT_SECONDS)
+        except TimeoutError:
+            raise self._reject("bulkhead full", BULKHEAD_WAIT_SECONDS) from None
+        try:
+            if not self.breaker.allow():
+                raise self._reject("circuit open", self.breaker.retry_after())
+            success = None
+            try:
+                with timed(stage) as span:
+                    async with asyncio.timeout(self.timeout):
+                        yield span
+                success = True
+            except Exception as e:
+                success = not is_transient(e)
+                raise
+            finally:
+                self.breaker.record(success)
+        finally:
+            self._slots.release()
+
+
+dependencies = {
+    "firestore": Dependency("firestore", FIRESTORE_TIMEOUT_SECONDS, FIRESTORE_MAX_CONCURRENCY),
+    "auth": Dependency("auth", AUTH_TIMEOUT_SECONDS, AUTH_MAX_CONCURRENCY),
+    "gemini": Dependency("gemini", GEMINI_TIMEOUT_SECONDS, GEMINI_MAX_CONCURRENCY),
+    "gcs": Dependency("gcs", GCS_TIMEOUT_SECONDS, GCS_POOL_MAXSIZE),
+}
+
+
+def guarded(stage: str):
+    """Guard a block of calls to the dependency named by the stage's prefix ("firestore.get" -> firestore)."""
+    return dependencies[stage.split(".", 1)[0]].guard(stage)
+
+
+async def retrying(stage: str, call: Callable[[], Awaitable[T]], attempts: int = RETRY_ATTEMPTS) -> T:
+    """Make an idempotent call under guarded(stage), retrying transient failures with full-jitter exponential
+    backoff. A failure left after the last attempt is raised as is; an open breaker is never retried."""
+    for attempt in range(attempts - 1):
+        try:
+            async with guarded(stage):
+                return await call()
+        except DependencyUnavailable:
+            raise
+        except Exception as e:
+            if not is_transient(e):
+                raise
+            delay = random.uniform(0, min(RETRY_MAX_DELAY_SECONDS, RETRY_BASE_DELAY_SECONDS * 2**attempt))
+            logger.warning("%s failed (%s), retrying in %.2fs", stage, e, delay)
+            await asyncio.sleep(delay)
+    async with guarded(stage):
+        return await call()
+
+
+def breaker_states() -> dict[str, str]:
+    """Current breaker state of every dependency, for the readiness probe."""
+    return {name: dependency.breaker.state for name, dependency in dependencies.items()}
@@ -0,0 +1,50 @@
+import hashlib
+
+from fastapi import Request
+from fastapi.responses import Response
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+from services.compression import strip_coding_suffix
+
+
+class ModelResponse(Response):
+    """JSON response rendered directly from an already validated pydantic model.
+
+    Returning a Response makes FastAPI skip response_model validation and its jsonable conversion; pydantic-core
+    serializes the model to bytes in one pass. Keep response_model on the route for the OpenAPI schema, and only use
+    this with models built from validated data (model_construct skips validation).
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: BaseModel) -> bytes:
+        return to_json(content)
+
+
+def content_etag(body: bytes) -> str:
+    """Strong ETag of a response body."""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, and a tag sent back for a compressed copy names the same body
+    candidates = (strip_coding_suffix(tag.strip().removeprefix("W/")) for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+def conditional_response(request: Request, response: Response, cache_control: str, vary: str | None = None) -> Response:
+    """Add a strong ETag and caching headers to a rendered response.
+
+    Returns an empty 304 response instead when the request's If-None-Match names the current body.
+    """
+    headers = {"ETag": content_etag(response.body), "Cache-Control": cache_control}
+    if vary:
+        headers["Vary"] = vary
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return response
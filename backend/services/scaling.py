@@ -0,0 +1,440 @@
+"""Deterministic servings scaling and unit conversion.
+
+The most common recipe updates ("make it for 8", "double it", "convert to metric") are applied here instead of
+regenerating the whole recipe with the LLM. parse_modification() recognizes them and returns None for anything else,
+in which case the update goes to the LLM.
+
+Quantities are whole numbers, decimals, fractions ("1 1/2", "1½") and ranges ("2-3", "2 to 3"), optionally followed
+by a unit. In ingredient items the leading quantity and every later quantity with a unit are scaled. A parenthetical
+after a quantity with a unit is a dual unit ("1 cup (150g)") and is scaled too; after a bare count it is a package
+size ("1 (14 oz) can") and is left alone. In instructions and notes only quantities with a unit are scaled, so times,
+temperatures and step numbers never change. Lengths and temperatures are only converted, never scaled, including a
+leading temperature of an ingredient item ("350°F oven").
+"""
+
+import re
+
+# Unicode vulgar fractions and their values
+FRACTION_CHARS = {
+    "½": 1 / 2, "⅓": 1 / 3, "⅔": 2 / 3, "¼": 1 / 4, "¾": 3 / 4, "⅕": 1 / 5,
+    "⅛": 1 / 8, "⅜": 3 / 8, "⅝": 5 / 8, "⅞": 7 / 8,
+}
+# Fractions quantities are rounded to when written as fractions
+FRACTION_STEPS = {0: "", 1 / 8: "1/8", 1 / 4: "1/4", 1 / 3: "1/3", 1 / 2: "1/2", 2 / 3: "2/3", 3 / 4: "3/4", 1: ""}
+UNICODE_FRACTIONS = {"1/8": "⅛", "1/4": "¼", "1/3": "⅓", "1/2": "½", "2/3": "⅔", "3/4": "¾"}
+
+# Canonical units: (dimension, size in ml or g, system)
+UNITS = {
+    "tsp": ("volume", 4.92892, "both"),
+    "tbsp": ("volume", 14.7868, "both"),
+    "fl oz": ("volume", 29.5735, "imperial"),
+    "cup": ("volume", 236.588, "imperial"),
+    "pint": ("volume", 473.176, "imperial"),
+    "quart": ("volume", 946.353, "imperial"),
+    "gallon": ("volume", 3785.41, "imperial"),
+    "ml": ("volume", 1.0, "metric"),
+    "l": ("volume", 1000.0, "metric"),
+    "oz": ("mass", 28.3495, "imperial"),
+    "lb": ("mass", 453.592, "imperial"),
+    "mg": ("mass", 0.001, "metric"),
+    "g": ("mass", 1.0, "metric"),
+    "kg": ("mass", 1000.0, "metric"),
+}
+# Spellings found in recipes (matched case-insensitively), mapped to canonical units
+UNIT_ALIASES = {
+    "teaspoon": "tsp", "teaspoons": "tsp", "tsp": "tsp", "tsps": "tsp",
+    "tablespoon": "tbsp", "tablespoons": "tbsp", "tbsp": "tbsp", "tbsps": "tbsp", "tbs": "tbsp", "tbl": "tbsp",
+    "fluid ounce": "fl oz", "fluid ounces": "fl oz", "fl oz": "fl oz", "fl. oz": "fl oz", "fl. oz.": "fl oz",
+    "cup": "cup", "cups": "cup", "c.": "cup",
+    "pint": "pint", "pints": "pint", "pt": "pint",
+    "quart": "quart", "quarts": "quart", "qt": "quart",
+    "gallon": "gallon", "gallons": "gallon", "gal": "gallon",
+    "ml": "ml", "milliliter": "ml", "milliliters": "ml", "millilitre": "ml", "millilitres": "ml",
+    "l": "l", "liter": "l", "liters": "l", "litre": "l", "litres": "l",
+    "oz": "oz", "ounce": "oz", "ounces": "oz",
+    "lb": "lb", "lbs": "lb", "pound": "lb", "pounds": "lb",
+    "mg": "mg", "g": "g", "gram": "g", "grams": "g", "gr": "g",
+    "kg": "kg", "kilogram": "kg", "kilograms": "kg", "kilo": "kg", "kilos": "kg",
+}
+# Spelled-out units keep agreeing with their quantity
+PLURALS = {
+    "teaspoon": "teaspoons", "tablespoon": "tablespoons", "cup": "cups", "pint": "pints", "quart": "quarts",
+    "gallon": "gallons", "ounce": "ounces", "pound": "pounds", "gram": "grams", "kilogram": "kilograms",
+    "liter": "liters", "litre": "litres", "milliliter": "milliliters", "millilitre": "millilitres", "lb": "lbs",
+    "fluid ounce": "fluid ounces",
+}
+SINGULARS = {plural: singular for singular, plural in PLURALS.items()}
+
+MIN_FACTOR, MAX_FACTOR = 0.1, 20
+
+_FRACTION_CLASS = "".join(FRACTION_CHARS)
+_NUMBER = rf"(?:\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?(?:\s?[{_FRACTION_CLASS}])?|[{_FRACTION_CLASS}])"
+_UNIT = "|".join(re.escape(alias) for alias in sorted(UNIT_ALIASES, key=len, reverse=True))
+QUANTITY = re.compile(
+    rf"(?<![\w.])(?P<low>{_NUMBER})(?:(?P<sep>\s*(?:-|–|—|to)\s*)(?P<high>{_NUMBER}))?"
+    rf"(?:(?P<space>\s?)(?P<unit>(?i:{_UNIT}))(?![A-Za-z]))?"
+)
+# A quantity that is a dimension rather than an amount ("2-inch pieces", "9x13 inch pan")
+SIZE_AFTER = re.compile(r"(?:\s*-\s*|\s*)(?:inch|inches|in\.|cm|centimeters?|mm)\b|\s*[x×]\s*\d")
+# A quantity that is a temperature ("350°F", "180 degrees C")
+TEMPERATURE_AFTER = re.compile(r"\s*(?:°|º|degrees?\s*)\s*[FC]\b")
+PARENTHETICAL = re.compile(r"\s*\((?P<body>[^()]*)\)")
+_TEMPERATURE = re.compile(r"(?P<value>\d+(?:\.\d+)?)(?P<sep>\s*)(?:°|º|degrees?\s*)\s*(?P<scale>[FC])\b")
+_LENGTH = re.compile(
+    r"(?:(?P<width>\d+(?:\.\d+)?)(?P<by>\s*[x×]\s*))?(?P<value>\d+(?:\.\d+)?)(?P<sep>-|\s?)"
+    r"(?P<unit>inches|inch|cm|centimeters|centimeter)\b"
+)
+
+
+def parse_number(text: str) -> float:
+    """Value of a number as matched by _NUMBER: "2", "1.5", "1/2", "1 1/2", "1½" or "½"."""
+    text = text.strip()
+    if text[-1] in FRACTION_CHARS:
+        whole = text[:-1].strip()
+        return (float(whole) if whole else 0.0) + FRACTION_CHARS[text[-1]]
+    if "/" in text:
+        whole, _, fraction = text.rpartition(" ")
+        numerator, denominator = fraction.split("/")
+        return (float(whole) if whole else 0.0) + int(numerator) / max(int(denominator), 1)
+    return float(text)
+
+
+def format_fraction(value: float, unicode: bool = False) -> str:
+    """Write a quantity as a whole number plus a common kitchen fraction ("1 1/2"), never rounding to zero."""
+    whole = int(value)
+    step = min(FRACTION_STEPS, key=lambda s: abs(value - whole - s))
+    if step == 1:
+        whole, step = whole + 1, 0
+    if whole == 0 and step == 0:
+        step = 1 / 8
+    fraction = FRACTION_STEPS[step]
+    if unicode and fraction:
+        return f"{whole or ''}{UNICODE_FRACTIONS[fraction]}"
+    if whole and fraction:
+        return f"{whole} {fraction}"
+    return fraction or str(whole)
+
+
+def format_decimal(value: float) -> str:
+    """Write a metric quantity with kitchen precision: nearest 5 from 100, whole numbers from 10, else one or two
+    decimals."""
+    if value >= 100:
+        rounded = round(value / 5) * 5
+    elif value >= 10:
+        rounded = round(value)
+    else:
+        rounded = round(value, 2 if value < 1 else 1)
+    return f"{rounded:g}"
+
+
+def _format_like(value: float, original: str, unit: str | None) -> str:
+    """Format a scaled quantity in the style of the original: decimals for metric units and decimal input."""
+    canonical = UNIT_ALIASES.get((unit or "").lower())
+    if (canonical and UNITS[canonical][2] == "metric") or "." in original:
+        return format_decimal(value)
+    return format_fraction(value, unicode=any(c in FRACTION_CHARS for c in original))
+
+
+def _agree(unit: str, value: float) -> str:
+    """Pluralize or singularize a spelled-out unit to agree with its quantity."""
+    if value > 1 and unit.lower() in PLURALS:
+        return PLURALS[unit.lower()]
+    if value <= 1 and unit.lower() in SINGULARS:
+        return SINGULARS[unit.lower()]
+    return unit
+
+
+def _scale_match(match: re.Match, factor: float) -> str:
+    unit = match.group("unit")
+    low = parse_number(match.group("low")) * factor
+    text = _format_like(low, match.group("low"), unit)
+    largest = low
+    if match.group("high"):
+        high = parse_number(match.group("high")) * factor
+        text += match.group("sep") + _format_like(high, match.group("high"), unit)
+        largest = high
+    if unit:
+        text += match.group("space") + _agree(unit, largest)
+    return text
+
+
+def _is_size(text: str, match: re.Match) -> bool:
+    return bool(SIZE_AFTER.match(text, match.end()))
+
+
+def _is_temperature(text: str, match: re.Match) -> bool:
+    return not match.group("unit") and bool(TEMPERATURE_AFTER.match(text, match.end()))
+
+
+def scale_text(text: str, factor: float) -> str:
+    """Scale every quantity that has a unit (used for instructions and notes)."""
+
+    def replace(match: re.Match) -> str:
+        if not match.group("unit") or _is_size(text, match):
+            return match.group(0)
+        return _scale_match(match, factor)
+
+    return QUANTITY.sub(replace, text)
+
+
+def scale_ingredient(item: str, factor: float) -> str:
+    """Scale an ingredient item: its leading quantity, a dual-unit parenthetical and later quantities with units."""
+    match = QUANTITY.match(item)
+    if match is None or _is_size(item, match) or _is_temperature(item, match):
+        return scale_text(item, factor)
+
+    head = _scale_match(match, factor)
+    rest = item[match.end():]
+    parenthetical = PARENTHETICAL.match(rest)
+    if parenthetical and not match.group("unit"):
+        # Package size of a counted item ("1 (14 oz) can"): the size stays, only the count changes
+        head += parenthetical.group(0)
+        rest = rest[parenthetical.end():]
+    return head + scale_text(rest, factor)
+
+
+def _convert_amount(value: float, canonical: str, system: str) -> tuple[float, str]:
+    """Convert an amount to the equivalent in the target system, choosing a unit that suits its size."""
+    dimension, size, unit_system = UNITS[canonical]
+    if unit_system in ("both", system):
+        return value, canonical
+    base = value * size
+    if system == "metric":
+        if dimension == "volume":
+            return (base / 1000, "l") if base >= 1000 else (base, "ml")
+        return (base / 1000, "kg") if base >= 1000 else (base, "g")
+    if dimension == "volume":
+        if base >= UNITS["cup"][1] / 4:
+            return base / UNITS["cup"][1], "cup"
+        if base >= UNITS["tbsp"][1]:
+            return base / UNITS["tbsp"][1], "tbsp"
+        return base / UNITS["tsp"][1], "tsp"
+    if base >= UNITS["lb"][1]:
+        return base / UNITS["lb"][1], "lb"
+    return base / UNITS["oz"][1], "oz"
+
+
+def _format_converted(value: float, unit: str) -> str:
+    if UNITS[unit][2] == "metric":
+        return format_decimal(value)
+    if unit == "oz":
+        return format_decimal(value) if value >= 4 else format_fraction(value)
+    return format_fraction(value)
+
+
+def _display_unit(unit: str, value: float) -> str:
+    return "cups" if unit == "cup" and value > 1 else unit
+
+
+def _convert_match(match: re.Match, system: str) -> str | None:
+    """Converted text of a quantity with a unit, or None if it is already in the target system."""
+    canonical = UNIT_ALIASES[match.group("unit").lower()]
+    if UNITS[canonical][2] in ("both", system):
+        return None
+    low, unit = _convert_amount(parse_number(match.group("low")), canonical, system)
+    text = _format_converted(low, unit)
+    largest = low
+    if match.group("high"):
+        high = UNITS[canonical][1] * parse_number(match.group("high")) / UNITS[unit][1]
+        text += match.group("sep") + _format_converted(high, unit)
+        largest = high
+    return f"{text} {_display_unit(unit, largest)}"
+
+
+def _unit_system(match: re.Match) -> str | None:
+    unit = match.group("unit")
+    return UNITS[UNIT_ALIASES[unit.lower()]][2] if unit else None
+
+
+def convert_text(text: str, system: str) -> str:
+    """Convert quantities, temperatures and lengths in a text to "metric" or "imperial" units.
+
+    A dual-unit quantity ("1 cup (150g)") keeps only the side already in the target system.
+    """
+    pieces = []
+    position = 0
+    for match in QUANTITY.finditer(text):
+        if match.start() < position:
+            # Inside a parenthetical already handled with the quantity before it
+            continue
+        pieces.append(text[position:match.start()])
+        position = match.end()
+        if not match.group("unit") or _is_size(text, match):
+            pieces.append(match.group(0))
+            continue
+        parenthetical = PARENTHETICAL.match(text, match.end())
+        inner = QUANTITY.fullmatch(parenthetical.group("body").strip()) if parenthetical else None
+        if inner and inner.group("unit"):
+            outer_system, inner_system = _unit_system(match), _unit_system(inner)
+            if inner_system == system and outer_system not in ("both", system):
+                pieces.append(inner.group(0))
+                position = parenthetical.end()
+                continue
+            if outer_system == system and inner_system not in ("both", system):
+                pieces.append(match.group(0))
+                position = parenthetical.end()
+                continue
+        pieces.append(_convert_match(match, system) or match.group(0))
+    pieces.append(text[position:])
+    return _convert_temperatures(_convert_lengths("".join(pieces), system), system)
+
+
+def _convert_temperatures(text: str, system: str) -> str:
+    def replace(match: re.Match) -> str:
+        value, scale = float(match.group("value")), match.group("scale")
+        if system == "metric" and scale == "F":
+            return f"{round((value - 32) * 5 / 9 / 5) * 5}°C"
+        if system == "imperial" and scale == "C":
+            return f"{round((value * 9 / 5 + 32) / 5) * 5}°F"
+        return match.group(0)
+
+    return _TEMPERATURE.sub(replace, text)
+
+
+def _convert_lengths(text: str, system: str) -> str:
+    def convert(value: str) -> str:
+        number = float(value)
+        if system == "metric":
+            cm = number * 2.54
+            return f"{round(cm * 2) / 2:g}" if cm < 5 else f"{round(cm)}"
+        return format_fraction(number / 2.54)
+
+    def replace(match: re.Match) -> str:
+        if match.group("unit").startswith("inch") != (system == "metric"):
+            return match.group(0)
+        value = convert(match.group("value"))
+        if system == "metric":
+            target = "cm"
+        else:
+            target = "inches" if match.group("sep") != "-" and parse_number(value) > 1 else "inch"
+        prefix = f"{convert(match.group('width'))}{match.group('by')}" if match.group("width") else ""
+        return f"{prefix}{value}{match.group('sep')}{target}"
+
+    return _LENGTH.sub(replace, text)
+
+
+# Modification requests recognized as quick edits
+
+_NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+    "eleven": 11, "twelve": 12, "fifteen": 15, "twenty": 20, "a dozen": 12, "dozen": 12,
+}
+_FACTOR_WORDS = {"double": 2, "doubled": 2, "twice": 2, "triple": 3, "tripled": 3, "quadruple": 4, "halve": 0.5,
+                 "half": 0.5, "halved": 0.5}
+_COUNT = r"(?P<n>\d+|" + "|".join(_NUMBER_WORDS) + ")"
+_PEOPLE = r"(?:\s+(?:people|persons?|servings?|portions?|guests|adults|of us))?"
+_RECIPE = r"(?:\s+(?:it|this|this recipe|the recipe|recipe|everything|the quantities|quantities|servings|the servings))?"
+_SERVINGS_PATTERNS = [
+    re.compile(rf"^(?:make|scale|adjust|change|resize|increase|reduce|cut|bump|set){_RECIPE}(?:\s+(?:up|down))?"
+               rf"(?:\s+(?:to serve|to feed|so it serves|so it feeds|to|for|serving))?\s+{_COUNT}{_PEOPLE}$"),
+    re.compile(rf"^(?:for|serves?|feeds?|serving|to serve|to feed|enough for|i need it for|it should serve)"
+               rf"\s+{_COUNT}{_PEOPLE}$"),
+    re.compile(rf"^{_COUNT}\s+(?:people|persons|servings|portions|guests)$"),
+]
+_FACTOR_PATTERNS = [
+    re.compile(rf"^(?P<word>{'|'.join(_FACTOR_WORDS)}){_RECIPE}$"),
+    re.compile(rf"^(?:make|scale|cut){_RECIPE}\s+(?:by\s+)?(?:in\s+)?(?P<word>{'|'.join(_FACTOR_WORDS)})$"),
+    re.compile(rf"^(?:scale|multiply|increase|make){_RECIPE}\s+(?:by|x)\s*(?P<f>\d+(?:\.\d+)?)\s*x?$"),
+    re.compile(r"^(?:x\s*(?P<f>\d+(?:\.\d+)?)|(?P<g>\d+(?:\.\d+)?)\s*x)$"),
+]
+_SYSTEM_WORDS = {"metric": "metric", "grams": "metric", "metric units": "metric", "imperial": "imperial",
+                 "us": "imperial", "us customary": "imperial", "american": "imperial", "cups": "imperial"}
+_SYSTEM_PATTERN = re.compile(
+    r"^(?:(?:convert|switch|change|translate)(?:\s+(?:it|this|the recipe|everything|all|the units|units"
+    r"|the measurements|measurements|all measurements|the ingredients|ingredients|quantities|the quantities))?"
+    r"\s+(?:to|into)\s+|use\s+|in\s+)?(?:the\s+)?(?P<system>" + "|".join(_SYSTEM_WORDS) + r")"
+    r"(?:\s+(?:units|measurements|measures|system|instead))?$"
+)
+_CLAUSE_SEPARATOR = re.compile(r"\s*(?:,|;|&|\band\b|\bthen\b|\balso\b)\s*")
+
+
+def _parse_clause(clause: str) -> dict | None:
+    for pattern in _SERVINGS_PATTERNS:
+        match = pattern.match(clause)
+        if match:
+            n = match.group("n")
+            return {"servings": int(n) if n.isdigit() else _NUMBER_WORDS[n]}
+    for pattern in _FACTOR_PATTERNS:
+        match = pattern.match(clause)
+        if match:
+            groups = match.groupdict()
+            if groups.get("word"):
+                return {"factor": _FACTOR_WORDS[groups["word"]]}
+            return {"factor": float(groups.get("f") or groups.get("g"))}
+    match = _SYSTEM_PATTERN.match(clause)
+    if match:
+        return {"system": _SYSTEM_WORDS[match.group("system")]}
+    return None
+
+
+def parse_modification(modifications: str) -> dict | None:
+    """Recognize a servings, scaling and/or unit conversion request.
+
+    Returns {"servings": int} or {"factor": float}, optionally with {"system": "metric" | "imperial"}, or None if the
+    request asks for anything else.
+    """
+    text = re.sub(r"^(?:please|can you|could you)\s+|[.!?]+$|\bplease\b", "", modifications.strip().lower()).strip()
+    edit: dict = {}
+    for clause in filter(None, _CLAUSE_SEPARATOR.split(text)):
+        parsed = _parse_clause(clause.strip())
+        if parsed is None or parsed.keys() & edit.keys() or ("servings" in edit and "factor" in parsed) or (
+            "factor" in edit and "servings" in parsed
+        ):
+            return None
+        edit.update(parsed)
+    return edit or None
+
+
+def _scale_servings(servings: str, edit: dict) -> tuple[float, str] | None:
+    """Scaling factor and the new servings text, or None if the current servings are unknown."""
+    match = QUANTITY.search(servings)
+    if "factor" in edit:
+        factor = edit["factor"]
+        if match is None:
+            return factor, servings
+        scaled = _scale_match(match, factor)
+        return factor, servings[:match.start()] + scaled + servings[match.end():]
+    if match is None:
+        return None
+    current = parse_number(match.group("low"))
+    if current <= 0:
+        return None
+    target = edit["servings"]
+    return target / current, servings[:match.start()] + str(target) + servings[match.end():]
+
+
+def apply_quick_edit(recipe: dict, edit: dict) -> dict | None:
+    """Apply a parsed quick edit to a recipe. Returns the updated recipe, or None if it cannot be done locally."""
+    updated = {**recipe}
+    notes = list(recipe.get("notes", []))
+
+    if "servings" in edit or "factor" in edit:
+        scaled = _scale_servings(recipe.get("servings", ""), edit)
+        if scaled is None:
+            return None
+        factor, updated["servings"] = scaled
+        if not MIN_FACTOR <= factor <= MAX_FACTOR:
+            return None
+        if factor != 1:
+            updated["ingredients"] = [
+                {**group, "items": [scale_ingredient(item, factor) for item in group.get("items", [])]}
+                for group in recipe.get("ingredients", [])
+            ]
+            updated["instructions"] = [scale_text(step, factor) for step in recipe.get("instructions", [])]
+            notes = [scale_text(note, factor) for note in notes if not note.startswith("Scaled from")]
+            notes.append(
+                f"Scaled from {recipe.get('servings') or 'the original servings'} to {updated['servings']}. "
+                "Cooking times and pan sizes may need adjusting."
+            )
+
+    system = edit.get("system")
+    if system:
+        updated["ingredients"] = [
+            {**group, "items": [convert_text(item, system) for item in group.get("items", [])]}
+            for group in updated.get("ingredients", [])
+        ]
+        updated["instructions"] = [convert_text(step, system) for step in updated.get("instructions", [])]
+        notes = [convert_text(note, system) for note in notes]
+
+    updated["notes"] = notes
+    return updated
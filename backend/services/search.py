@@ -0,0 +1,180 @@
+"""Per-user inverted index over recipe titles, ingredients and notes.
+
+The index lives under users/{uid}/search_index:
+
+- one shard document per first character of a term: {"terms": {term: [recipe_id, ...]}}
+- a "meta" document: {"version": INDEX_VERSION, "recipes": {recipe_id: {"title": ..., "timestamp": ...}}}
+
+Routes update it in the same batch as the recipe write, using ArrayUnion/ArrayRemove so concurrent writes merge.
+A query reads the meta document plus one shard per distinct leading character of its terms, in one get_all call.
+"""
+
+import logging
+import re
+import unicodedata
+
+from firebase_admin import firestore
+from google.cloud.firestore_v1.base_query import FieldFilter
+
+from services.firebase import get_db
+from services.recipe_store import BODY_PROJECTION, decode_recipe
+from services.resilience import guarded
+
+logger = logging.getLogger(__name__)
+
+# Bump when tokenization changes; indexes of an older version are rebuilt on the next search
+INDEX_VERSION = 1
+META_DOCUMENT = "meta"
+
+MIN_TERM_LENGTH = 2
+STOPWORDS = frozenset(
+    """a an and or of the to with for in on into at by from as is it its be this that your you
+    about until over under each per plus very
+    cup cups tbsp tsp tablespoon tablespoons teaspoon teaspoons g kg mg ml l oz lb lbs ounce ounces pound pounds
+    gram grams pinch dash large medium small""".split()
+)
+_WORD = re.compile(r"[^\W\d_]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into lowercase, accent-free words, dropping numbers, units and stopwords."""
+    normalized = unicodedata.normalize("NFKD", text.lower())
+    stripped = "".join(c for c in normalized if not unicodedata.combining(c))
+    return [word for word in _WORD.findall(stripped) if len(word) >= MIN_TERM_LENGTH and word not in STOPWORDS]
+
+
+def recipe_terms(recipe: dict) -> set[str]:
+    """Searchable terms of a recipe: its title, ingredient items and notes."""
+    texts = [recipe.get("title", "")]
+    for group in recipe.get("ingredients", []):
+        texts.extend(group.get("items", []) if isinstance(group, dict) else [str(group)])
+    texts.extend(recipe.get("notes", []))
+    return {term for text in texts for term in tokenize(text)}
+
+
+def _index_ref(uid: str):
+    return get_db().collection("users").document(uid).collection("search_index")
+
+
+def _shard_id(term: str) -> str:
+    return term[0]
+
+
+def _postings_by_shard(terms: set[str], value) -> dict[str, dict]:
+    shards: dict[str, dict] = {}
+    for term in terms:
+        shards.setdefault(_shard_id(term), {})[term] = value
+    return shards
+
+
+def index_recipe(batch, uid: str, recipe_id: str, recipe: dict, timestamp, previous: dict | None = None) -> None:
+    """Add a new or updated recipe to the user's index as part of a write batch.
+
+    For updates, pass the previous recipe so terms it no longer contains are removed.
+    """
+    terms = recipe_terms(recipe)
+    stale = recipe_terms(previous) - terms if previous else set()
+    index_ref = _index_ref(uid)
+    shards = _postings_by_shard(terms, firestore.ArrayUnion([recipe_id]))
+    for shard, postings in _postings_by_shard(stale, firestore.ArrayRemove([recipe_id])).items():
+        shards.setdefault(shard, {}).update(postings)
+    for shard, postings in shards.items():
+        batch.set(index_ref.document(shard), {"terms": postings}, merge=True)
+    batch.set(
+        index_ref.document(META_DOCUMENT),
+        {"recipes": {recipe_id: {"title": recipe.get("title", ""), "timestamp": timestamp}}},
+        merge=True,
+    )
+
+
+def unindex_recipe(batch, uid: str, recipe_id: str, recipe: dict) -> None:
+    """Remove a recipe from the user's index as part of a write batch."""
+    index_ref = _index_ref(uid)
+    for shard, postings in _postings_by_shard(recipe_terms(recipe), firestore.ArrayRemove([recipe_id])).items():
+        batch.set(index_ref.document(shard), {"terms": postings}, merge=True)
+    batch.set(index_ref.document(META_DOCUMENT), {"recipes": {recipe_id: firestore.DELETE_FIELD}}, merge=True)
+
+
+async def rebuild_index(uid: str) -> tuple[dict, dict[str, dict]]:
+    """Build the user's index from their non-archived recipes and overwrite the stored one.
+
+    Returns the meta document and the shard documents.
+    """
+    query = (
+        get_db().collection("recipes")
+        .where(filter=FieldFilter("uid", "==", uid))
+        .where(filter=FieldFilter("archived", "==", False))
+        .select(["timestamp", *BODY_PROJECTION])
+    )
+    postings: dict[str, list[str]] = {}
+    recipes = {}
+    async with guarded("firestore.query"):
+        async for doc in query.stream():
+            data = doc.to_dict()
+            recipe = decode_recipe(data)
+            recipes[doc.id] = {"title": recipe.get("title", ""), "timestamp": data.get("timestamp", "")}
+            for term in recipe_terms(recipe):
+                postings.setdefault(term, []).append(doc.id)
+
+    meta = {"version": INDEX_VERSION, "recipes": recipes}
+    shards: dict[str, dict] = {}
+    for term, recipe_ids in postings.items():
+        shards.setdefault(_shard_id(term), {"terms": {}})["terms"][term] = recipe_ids
+
+    index_ref = _index_ref(uid)
+    batch = get_db().batch()
+    # Overwrite without merge so terms of deleted or archived recipes disappear
+    for shard, data in shards.items():
+        batch.set(index_ref.document(shard), data)
+    batch.set(index_ref.document(META_DOCUMENT), meta)
+    async with guarded("firestore.commit"):
+        await batch.commit()
+    logger.info("Rebuilt search index for user %s (%s recipes, %s terms)", uid, len(recipes), len(postings))
+    return meta, shards
+
+
+async def search_recipes(uid: str, query: str, limit: int = 20) -> list[dict]:
+    """Return the user's recipes matching every word of the query, each word as a prefix of an indexed term.
+
+    Results are ordered by the number of query words found in the title, then newest first.
+    """
+    words = list(dict.fromkeys(tokenize(query)))
+    if not words:
+        return []
+
+    index_ref = _index_ref(uid)
+    shard_ids = sorted({_shard_id(word) for word in words})
+    refs = [index_ref.document(META_DOCUMENT)] + [index_ref.document(shard) for shard in shard_ids]
+    async with guarded("firestore.get_all"):
+        docs = {doc.id: doc async for doc in get_db().get_all(refs)}
+
+    meta_doc = docs[META_DOCUMENT]
+    meta = meta_doc.to_dict() if meta_doc.exists else None
+    if meta is None or meta.get("version") != INDEX_VERSION:
+        meta, shards = await rebuild_index(uid)
+    else:
+        shards = {shard: docs[shard].to_dict() or {} for shard in shard_ids if docs[shard].exists}
+
+    matches: set[str] | None = None
+    for word in words:
+        terms = shards.get(_shard_id(word), {}).get("terms", {})
+        found = {recipe_id for term, recipe_ids in terms.items() if term.startswith(word) for recipe_id in recipe_ids}
+        matches = found if matches is None else matches & found
+        if not matches:
+            return []
+
+    recipes = meta.get("recipes", {})
+    scored = []
+    for recipe_id in matches:
+        entry = recipes.get(recipe_id)
+        if entry is None:
+            # Posting left behind for a recipe that is no longer indexed
+            continue
+        title_terms = tokenize(entry.get("title", ""))
+        title_hits = sum(any(term.startswith(word) for term in title_terms) for word in words)
+        timestamp = entry.get("timestamp", "")
+        result = {"id": recipe_id, "title": entry.get("title", ""), "timestamp": timestamp}
+        scored.append(((title_hits, str(timestamp)), result))
+
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return [result for _, result in scored[:limit]]
@@ -1,55 +1,186 @@
+import asyncio
 import io
 import logging
+from concurrent.futures import ProcessPoolExecutor
 
-from google.cloud import storage
-from PIL import Image
-
-from config import GCS_BUCKET_NAME
+from config import GCS_BUCKET_NAME, GCS_POOL_MAXSIZE, IMAGE_ENCODE_WORKERS
+from services.firebase import SERVICE_ACCOUNT_KEY_PATH
+from services.metrics import timed
+from services.resilience import retrying
 
 logger = logging.getLogger(__name__)
 
-# Initialize Cloud Storage for image uploads
-storage_bucket = None
-if GCS_BUCKET_NAME:
+# Cloud Storage bucket for image uploads, created by init_storage() during app startup or on first use
+_storage_bucket = None
+_storage_initialized = False
+
+
+def init_storage():
+    """Initialize the Cloud Storage client and bucket (idempotent). Returns None when GCS is not configured."""
+    global _storage_bucket, _storage_initialized
+    if _storage_initialized:
+        return _storage_bucket
+    _storage_initialized = True
+
+    if not GCS_BUCKET_NAME:
+        return None
+
     try:
-        storage_client = storage.Client.from_service_account_json("serviceAccountKey.json")
-        storage_bucket = storage_client.bucket(GCS_BUCKET_NAME)
-        logger.info(f"Cloud Storage initialized with bucket: {GCS_BUCKET_NAME}")
+        # Deferred: google.cloud.storage is slow to import and only needed when images are enabled
+        import requests
+        from google.auth.transport.requests import AuthorizedSession
+        from google.cloud import storage
+        from google.oauth2 import service_account
+
+        credentials = service_account.Credentials.from_service_account_file(
+            SERVICE_ACCOUNT_KEY_PATH, scopes=storage.Client.SCOPE
+        )
+        # Size the connection pool to match the concurrent uploads of image variants
+        session = AuthorizedSession(credentials)
+        adapter = requests.adapters.HTTPAdapter(pool_connections=GCS_POOL_MAXSIZE, pool_maxsize=GCS_POOL_MAXSIZE)
+        session.mount("https://", adapter)
+
+        storage_client = storage.Client(project=credentials.project_id, credentials=credentials, _http=session)
+        _storage_bucket = storage_client.bucket(GCS_BUCKET_NAME)
+        logger.info("Cloud Storage initialized with bucket: %s", GCS_BUCKET_NAME)
     except Exception as e:
-        logger.warning(f"Cloud Storage not configured: {e}")
-        storage_bucket = None
+        logger.warning("Cloud Storage not configured: %s", e)
+        _storage_bucket = None
+    return _storage_bucket
+
+
+def get_storage_bucket():
+    """Return the Cloud Storage bucket, or None when GCS is not configured."""
+    if not _storage_initialized:
+        return init_storage()
+    return _storage_bucket
+
+
+# Responsive variants generated for every recipe image: name -> max width in pixels.
+# Images are never upscaled, so "full" is the original size for typical Gemini output.
+IMAGE_VARIANT_WIDTHS = {
+    "thumb": 320,
+    "medium": 768,
+    "full": 1600,
+}
+
+# Encodings produced for each variant: name -> (PIL format, mime type, file extension, save options).
+# JPEG is kept as the universal fallback for clients without WebP/AVIF support.
+IMAGE_VARIANT_FORMATS = {
+    "avif": ("AVIF", "image/avif", "avif", {"quality": 55, "speed": 6}),
+    "webp": ("WEBP", "image/webp", "webp", {"quality": 78, "method": 4}),
+    "jpeg": ("JPEG", "image/jpeg", "jpg", {"quality": 80, "optimize": True, "progressive": True}),
+}
+
+# Lazily created pool for CPU-bound image encoding (kept off the event loop and the GIL)
+_encode_pool: ProcessPoolExecutor | None = None
+
+
+def _get_encode_pool() -> ProcessPoolExecutor:
+    global _encode_pool
+    if _encode_pool is None:
+        _encode_pool = ProcessPoolExecutor(max_workers=IMAGE_ENCODE_WORKERS)
+    return _encode_pool
+
+
+def shutdown_encode_pool() -> None:
+    """Shut down the image encoding process pool (called on app shutdown)."""
+    global _encode_pool
+    if _encode_pool is not None:
+        _encode_pool.shutdown(wait=False, cancel_futures=True)
+        _encode_pool = None
 
 
-def compress_image(image_data: bytes, max_size_kb: int = 500) -> tuple[bytes, str]:
-    """Compress image to reduce storage costs. Returns (compressed_data, mime_type)."""
+def _resize_variants(image_data: bytes) -> dict[str, tuple[str, tuple[int, int], bytes]]:
+    """Decode the source image once and resize it to every variant width.
+
+    Returns raw pixel buffers as {variant: (mode, size, pixels)} so they can be shipped to encoder processes.
+    """
+    from PIL import Image
+
     img = Image.open(io.BytesIO(image_data))
 
     # Convert to RGB if necessary (for PNG with transparency)
-    if img.mode in ("RGBA", "P"):
+    if img.mode != "RGB":
         img = img.convert("RGB")
 
-    # Start with high quality and reduce until under max size
-    quality = 85
-    while quality >= 30:
-        buffer = io.BytesIO()
-        img.save(buffer, format="JPEG", quality=quality, optimize=True)
-        compressed_data = buffer.getvalue()
-
-        if len(compressed_data) / 1024 <= max_size_kb:
-            logger.info(f"Compressed image to {len(compressed_data) / 1024:.1f} KB (quality={quality})")
-            return compressed_data, "image/jpeg"
-
-        quality -= 10
-
-    # If still too large, resize the image
-    width, height = img.size
-    while len(compressed_data) / 1024 > max_size_kb and width > 800:
-        width = int(width * 0.8)
-        height = int(height * 0.8)
-        resized = img.resize((width, height), Image.Resampling.LANCZOS)
-        buffer = io.BytesIO()
-        resized.save(buffer, format="JPEG", quality=70, optimize=True)
-        compressed_data = buffer.getvalue()
-
-    logger.info(f"Compressed image to {len(compressed_data) / 1024:.1f} KB ({width}x{height})")
-    return compressed_data, "image/jpeg"
+    variants = {}
+    for name, max_width in IMAGE_VARIANT_WIDTHS.items():
+        if img.width > max_width:
+            height = round(img.height * max_width / img.width)
+            resized = img.resize((max_width, height), Image.Resampling.LANCZOS)
+        else:
+            resized = img
+        variants[name] = (resized.mode, resized.size, resized.tobytes())
+    return variants
+
+
+def _encode_variant(mode: str, size: tuple[int, int], pixels: bytes, fmt: str) -> bytes:
+    """Encode a raw pixel buffer into one output format. Runs in a worker process."""
+    from PIL import Image
+
+    pil_format, _, _, options = IMAGE_VARIANT_FORMATS[fmt]
+    img = Image.frombytes(mode, size, pixels)
+    buffer = io.BytesIO()
+    img.save(buffer, format=pil_format, **options)
+    return buffer.getvalue()
+
+
+async def generate_image_variants(image_data: bytes) -> dict[str, dict[str, tuple[bytes, str]]]:
+    """Produce every size/format variant of an image in one decode pass.
+
+    Encoding runs in parallel on a process pool. Returns {variant: {format: (data, mime_type)}}.
+    """
+    with timed("image.encode"):
+        resized = await asyncio.to_thread(_resize_variants, image_data)
+
+        loop = asyncio.get_running_loop()
+        pool = _get_encode_pool()
+        jobs = [
+            (name, fmt, loop.run_in_executor(pool, _encode_variant, mode, size, pixels, fmt))
+            for name, (mode, size, pixels) in resized.items()
+            for fmt in IMAGE_VARIANT_FORMATS
+        ]
+        encoded = await asyncio.gather(*(job for _, _, job in jobs))
+
+    variants: dict[str, dict[str, tuple[bytes, str]]] = {}
+    for (name, fmt, _), data in zip(jobs, encoded, strict=True):
+        variants.setdefault(name, {})[fmt] = (data, IMAGE_VARIANT_FORMATS[fmt][1])
+
+    summary = ", ".join(f"{name}/{fmt}={len(data) / 1024:.1f}KB" for (name, fmt, _), data in zip(jobs, encoded, strict=True))
+    logger.info("Encoded image variants: %s", summary)
+    return variants
+
+
+def _upload_blob(blob_name: str, data: bytes, mime_type: str) -> str:
+    blob = get_storage_bucket().blob(blob_name)
+    blob.cache_control = "public, max-age=86400"
+    blob.upload_from_string(data, content_type=mime_type)
+    blob.make_public()
+    return blob.public_url
+
+
+async def upload_image_variants(
+    recipe_id: str, variants: dict[str, dict[str, tuple[bytes, str]]]
+) -> dict[str, dict[str, str]]:
+    """Upload all image variants concurrently. Returns {variant: {format: public_url}}."""
+    uploads = [
+        (name, fmt, f"recipe-images/{recipe_id}/{name}.{IMAGE_VARIANT_FORMATS[fmt][2]}", data, mime_type)
+        for name, formats in variants.items()
+        for fmt, (data, mime_type) in formats.items()
+    ]
+    with timed("gcs.upload") as span:
+        span.set_attribute("gcs.objects", len(uploads))
+        # Each object is written under a fixed name, so a failed upload can be retried on its own
+        urls = await asyncio.gather(
+            *(
+                retrying("gcs.upload_object", lambda args=(blob_name, data, mime_type): asyncio.to_thread(_upload_blob, *args))
+                for _, _, blob_name, data, mime_type in uploads
+            )
+        )
+
+    variant_urls: dict[str, dict[str, str]] = {}
+    for (name, fmt, _, _, _), url in zip(uploads, urls, strict=True):
+        variant_urls.setdefault(name, {})[fmt] = url
+    logger.info("Uploaded %s image variants to GCS under recipe-images/%s/", len(uploads), recipe_id)
+    return variant_urls
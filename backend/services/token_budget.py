@@ -0,0 +1,97 @@
+"""Output token budgets (max_tokens) for LLM calls, learned from the tokens calls actually use.
+
+Each completion is recorded under its profile: ("generate", complexity, diet, time, servings) for generation and
+("update",) for updates. A call's budget is LLM_TOKEN_BUDGET_QUANTILE of its profile's recent completion tokens plus
+LLM_TOKEN_BUDGET_HEADROOM, kept within [LLM_MIN_TOKEN_BUDGET, LLM_MAX_TOKENS]. A profile with fewer than
+MIN_BUDGET_SAMPLES falls back to the next coarser one (the complexity alone, then the operation), and the budget is
+LLM_MAX_TOKENS until anything has been seen.
+
+A budget that turns out too small costs a continuation rather than a failed call (see services/json_repair.py);
+truncations are counted per profile so the report shows whether the quantile is set too tight.
+"""
+
+import collections
+
+from config import LLM_MAX_TOKENS, LLM_MIN_TOKEN_BUDGET, LLM_TOKEN_BUDGET_HEADROOM, LLM_TOKEN_BUDGET_QUANTILE
+from services.metrics import LLM_TOKEN_BUDGET_CALLS, LLM_TOKEN_BUDGET_SAVED
+
+# Completion token counts kept per profile, and how many are needed before a profile gets its own budget
+USAGE_WINDOW = 500
+MIN_BUDGET_SAMPLES = 20
+
+
+def generation_profile(complexity: str, diet: str, time: str, servings: str) -> tuple[str, ...]:
+    return ("generate", complexity, diet, time, servings)
+
+
+def _levels(profile: tuple[str, ...]) -> list[tuple[str, ...]]:
+    """The profile and its coarser fallbacks, most specific first."""
+    return list(dict.fromkeys([profile, profile[:2], profile[:1]]))
+
+
+class TokenBudget:
+    """Learns completion token usage per profile and sets max_tokens from it."""
+
+    def __init__(
+        self,
+        quantile: float = LLM_TOKEN_BUDGET_QUANTILE,
+        headroom: float = LLM_TOKEN_BUDGET_HEADROOM,
+        minimum: int = LLM_MIN_TOKEN_BUDGET,
+        maximum: int = LLM_MAX_TOKENS,
+    ):
+        self.quantile = quantile
+        self.headroom = headroom
+        self.minimum = minimum
+        self.maximum = maximum
+        self.usage: dict[tuple[str, ...], collections.deque[int]] = collections.defaultdict(
+            lambda: collections.deque(maxlen=USAGE_WINDOW)
+        )
+        # Format: {profile: {"calls": int, "truncated": int, "budget": int, "used": int}}
+        self.totals: dict[tuple[str, ...], dict[str, int]] = collections.defaultdict(
+            lambda: {"calls": 0, "truncated": 0, "budget": 0, "used": 0}
+        )
+
+    def max_tokens(self, profile: tuple[str, ...]) -> int:
+        """The output budget for a call with this profile."""
+        for level in _levels(profile):
+            usage = self.usage.get(level)
+            if usage is not None and len(usage) >= MIN_BUDGET_SAMPLES:
+                ordered = sorted(usage)
+                tokens = ordered[min(int(self.quantile * len(ordered)), len(ordered) - 1)]
+                return max(self.minimum, min(self.maximum, round(tokens * (1 + self.headroom))))
+        return self.maximum
+
+    def record(self, profile: tuple[str, ...], budget: int, completion_tokens: int, truncated: bool) -> None:
+        """Record a call's completion tokens (including any continuation) and whether it hit its budget."""
+        for level in _levels(profile):
+            self.usage[level].append(completion_tokens)
+        totals = self.totals[profile]
+        totals["calls"] += 1
+        totals["truncated"] += truncated
+        totals["budget"] += budget
+        totals["used"] += completion_tokens
+        LLM_TOKEN_BUDGET_CALLS.inc(operation=profile[0], outcome="truncated" if truncated else "fit")
+        LLM_TOKEN_BUDGET_SAVED.inc(self.maximum - budget, operation=profile[0])
+
+    def report(self) -> list[dict]:
+        """Per profile: calls, the truncation rate, and the tokens requested compared with always asking for the
+        maximum, busiest profiles first."""
+        rows = []
+        for profile, totals in sorted(self.totals.items(), key=lambda item: -item[1]["calls"]):
+            calls = totals["calls"]
+            rows.append(
+                {
+                    "profile": "/".join(profile),
+                    "calls": calls,
+                    "budget": self.max_tokens(profile),
+                    "mean_used": round(totals["used"] / calls, 1),
+                    "truncation_rate": round(totals["truncated"] / calls, 4),
+                    "requested_tokens": totals["budget"],
+                    "saved_tokens": self.maximum * calls - totals["budget"],
+                }
+            )
+        return rows
+
+
+# Singleton instance
+token_budget = TokenBudget()
@@ -0,0 +1,271 @@
+import asyncio
+import contextvars
+import json
+import logging
+import random
+import secrets
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+from config import (
+    TRACE_EXPORT_FILE,
+    TRACE_EXPORT_INTERVAL_SECONDS,
+    TRACE_EXPORTER,
+    TRACE_OTLP_ENDPOINT,
+    TRACE_SAMPLE_RATIO,
+)
+from services.http import get_http_client
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "recipelab-backend"
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+# Spans waiting for export; the oldest are dropped if the exporter falls behind
+MAX_QUEUED_SPANS = 10000
+EXPORT_BATCH_SIZE = 512
+
+# Request ID of the request being handled (set by TracingMiddleware, read by logging and error handlers)
+request_id_var: contextvars.ContextVar[str] = contextvars.ContextVar("request_id", default="")
+# ASGI scope of the request being handled; the router adds the matched route to it
+request_scope_var: contextvars.ContextVar[dict | None] = contextvars.ContextVar("request_scope", default=None)
+_current_span: contextvars.ContextVar["Span | None"] = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """A recorded unit of work, exported in the OTLP/JSON span format."""
+
+    sampled = True
+
+    def __init__(self, name: str, trace_id: str, parent_span_id: str = "", kind: int = SPAN_KIND_INTERNAL):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.kind = kind
+        self.attributes: dict[str, str | int | float | bool] = {}
+        self.status_code = STATUS_OK
+        self.status_message = ""
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+
+    def set_attribute(self, key: str, value: str | int | float | bool) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, exc: BaseException) -> None:
+        self.status_code = STATUS_ERROR
+        self.status_message = f"{type(exc).__name__}: {exc}"
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in self.attributes.items()],
+            "status": {"code": self.status_code, "message": self.status_message},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        return span
+
+
+class _NonRecordingSpan:
+    """Stands in for spans of unsampled traces so instrumented code never needs to check."""
+
+    sampled = False
+    trace_id = ""
+    span_id = ""
+
+    def set_attribute(self, key: str, value: str | int | float | bool) -> None:
+        pass
+
+    def set_error(self, exc: BaseException) -> None:
+        pass
+
+
+NON_RECORDING_SPAN = _NonRecordingSpan()
+
+
+def _otlp_attribute(key: str, value: str | int | float | bool) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def parse_traceparent(header: str) -> tuple[str, str, bool] | None:
+    """Parse a W3C traceparent header into (trace_id, parent_span_id, sampled)."""
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+
+class Tracer:
+    """Creates spans with head-based sampling and exports finished spans in batches."""
+
+    def __init__(self, exporter: str = TRACE_EXPORTER, sample_ratio: float = TRACE_SAMPLE_RATIO):
+        self.exporter = exporter
+        self.sample_ratio = sample_ratio
+        self._queue: deque[Span] = deque(maxlen=MAX_QUEUED_SPANS)
+        self._task: asyncio.Task | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.exporter)
+
+    @contextmanager
+    def start_span(
+        self,
+        name: str,
+        kind: int = SPAN_KIND_INTERNAL,
+        parent: tuple[str, str, bool] | None = None,
+    ):
+        """Start a child of the current span (or a new root, sampled per TRACE_SAMPLE_RATIO)."""
+        current = _current_span.get()
+        if not self.enabled or (current is not None and not current.sampled):
+            span = NON_RECORDING_SPAN
+        elif current is not None:
+            span = Span(name, current.trace_id, current.span_id, kind)
+        elif parent is not None:
+            trace_id, parent_span_id, sampled = parent
+            span = Span(name, trace_id, parent_span_id, kind) if sampled else NON_RECORDING_SPAN
+        elif random.random() < self.sample_ratio:
+            span = Span(name, secrets.token_hex(16), kind=kind)
+        else:
+            span = NON_RECORDING_SPAN
+
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            if span.sampled:
+                span.end_ns = time.time_ns()
+                self._queue.append(span)
+
+    def _drain(self) -> list[Span]:
+        spans = []
+        while self._queue and len(spans) < EXPORT_BATCH_SIZE:
+            spans.append(self._queue.popleft())
+        return spans
+
+    def _payload(self, spans: list[Span]) -> dict:
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [_otlp_attribute("service.name", SERVICE_NAME)]},
+                    "scopeSpans": [{"scope": {"name": "recipelab"}, "spans": [span.to_otlp() for span in spans]}],
+                }
+            ]
+        }
+
+    def _write_file(self, payload: dict) -> None:
+        with open(TRACE_EXPORT_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(payload) + "\n")
+
+    async def flush(self) -> None:
+        """Export all queued spans."""
+        while spans := self._drain():
+            payload = self._payload(spans)
+            try:
+                if self.exporter == "file":
+                    await asyncio.to_thread(self._write_file, payload)
+                elif self.exporter == "otlp":
+                    response = await get_http_client().post(f"{TRACE_OTLP_ENDPOINT.rstrip('/')}/v1/traces", json=payload)
+                    response.raise_for_status()
+            except Exception as e:
+                logger.warning("Dropped %s spans, export failed: %s", len(spans), e)
+
+    async def _run_forever(self) -> None:
+        while True:
+            await asyncio.sleep(TRACE_EXPORT_INTERVAL_SECONDS)
+            await self.flush()
+
+    def start(self) -> None:
+        """Start the background exporter (called from the app lifespan)."""
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run_forever())
+            logger.info("Tracing enabled (exporter=%s, sample_ratio=%s)", self.exporter, self.sample_ratio)
+
+    async def shutdown(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+# Singleton instance
+tracer = Tracer()
+
+
+def current_span() -> "Span | _NonRecordingSpan":
+    return _current_span.get() or NON_RECORDING_SPAN
+
+
+class TracingMiddleware:
+    """ASGI middleware assigning a request ID and opening the root server span of each request.
+
+    Honors incoming X-Request-ID and W3C traceparent headers, and echoes the request ID in the response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1")[:128] or uuid.uuid4().hex
+        parent = parse_traceparent(headers.get(b"traceparent", b"").decode("latin-1"))
+        token = request_id_var.set(request_id)
+        scope_token = request_scope_var.set(scope)
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = [*message["headers"], (b"x-request-id", request_id.encode("latin-1"))]
+                span.set_attribute("http.status_code", message["status"])
+            await send(message)
+
+        try:
+            with tracer.start_span(f"{scope['method']} {scope['path']}", kind=SPAN_KIND_SERVER, parent=parent) as span:
+                span.set_attribute("http.method", scope["method"])
+                span.set_attribute("request.id", request_id)
+                try:
+                    await self.app(scope, receive, send_with_request_id)
+                finally:
+                    route = scope.get("route")
+                    if span.sampled and route is not None:
+                        # Rename to the route template once routing has happened
+                        span.name = f"{scope['method']} {route.path}"
+                        span.set_attribute("http.route", route.path)
+        finally:
+            request_id_var.reset(token)
+            request_scope_var.reset(scope_token)
@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+
+from config import ENABLE_IMAGE_GENERATION, MOCK_MODE, WARMUP_STEP_BUDGET_SECONDS
+from models import Recipe
+from services.firebase import get_db, get_firebase_app
+from services.gemini import GEMINI_API_BASE, get_gemini_client
+from services.http import get_http_client
+from services.llm import get_llm_api_base, get_recipe_response_format
+
+logger = logging.getLogger(__name__)
+
+
+async def _open_connection(url: str) -> None:
+    """Complete DNS + TCP + TLS to a host through the shared pool; any HTTP status is fine."""
+    await get_http_client().head(url)
+
+
+async def warm_firestore() -> None:
+    """Open the gRPC channel and fetch an access token with a single point read."""
+    await get_db().collection("_warmup").document("ping").get()
+
+
+async def warm_auth_keys() -> None:
+    """Fetch Google's public signing keys into firebase_admin's cache so the first token verification is local."""
+    from firebase_admin import _token_gen
+    from firebase_admin import auth as firebase_auth
+
+    verifier = firebase_auth._get_client(get_firebase_app())._token_verifier
+    await asyncio.to_thread(verifier.request, _token_gen.ID_TOKEN_CERT_URI)
+
+
+async def warm_llm() -> None:
+    """Import litellm and pre-connect to the LLM provider."""
+    api_base = await asyncio.to_thread(get_llm_api_base)
+    if api_base:
+        await _open_connection(api_base)
+
+
+async def warm_gemini() -> None:
+    """Import google.genai, build the client and pre-connect to the Gemini API."""
+    await asyncio.to_thread(get_gemini_client)
+    await _open_connection(GEMINI_API_BASE)
+
+
+async def warm_schemas() -> None:
+    """Pre-build the Recipe JSON schema used as response_format and exercise its validator."""
+    await asyncio.to_thread(get_recipe_response_format)
+    await asyncio.to_thread(get_recipe_response_format, compact=True)
+    Recipe.model_json_schema()
+    Recipe.model_validate_json('{"title": "", "description": "", "ingredients": [], "instructions": []}')
+
+
+class Warmup:
+    """Runs the startup warm-up steps concurrently, each with its own timing and budget."""
+
+    def __init__(self):
+        self.started = False
+        self.done = False
+        # Format: {step: (coroutine function, budget in seconds)}
+        self.steps: dict[str, tuple[Callable[[], Awaitable[None]], float]] = {}
+        # Format: {step: {"status": "ok" | "timeout" | "error", "duration_ms": float, "error": str}}
+        self.report: dict[str, dict] = {}
+
+    def register(self, name: str, step: Callable[[], Awaitable[None]], budget: float = WARMUP_STEP_BUDGET_SECONDS) -> None:
+        self.steps[name] = (step, budget)
+
+    async def _run_step(self, name: str, step: Callable[[], Awaitable[None]], budget: float) -> None:
+        start = time.perf_counter()
+        result: dict = {"status": "ok"}
+        try:
+            await asyncio.wait_for(step(), timeout=budget)
+        except TimeoutError:
+            result = {"status": "timeout", "error": f"exceeded {budget:.1f}s budget"}
+        except Exception as e:
+            result = {"status": "error", "error": str(e)}
+        result["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        self.report[name] = result
+
+        if result["status"] == "ok":
+            logger.info("Warm-up step %s finished in %s ms", name, result["duration_ms"])
+        else:
+            logger.warning(
+                "Warm-up step %s %s after %s ms: %s", name, result["status"], result["duration_ms"], result["error"]
+            )
+
+    async def run(self) -> dict[str, dict]:
+        """Run every registered step. Failures are recorded, never raised: warm-up is best effort."""
+        self.started = True
+        start = time.perf_counter()
+        try:
+            await asyncio.gather(*(self._run_step(name, step, budget) for name, (step, budget) in self.steps.items()))
+        finally:
+            self.done = True
+        logger.info("Warm-up finished in %.0f ms", (time.perf_counter() - start) * 1000)
+        return self.report
+
+    @property
+    def ready(self) -> bool:
+        """True once warm-up has finished (or was never started)."""
+        return self.done or not self.started
+
+
+# Singleton instance
+warmup = Warmup()
+# The schema and LLM steps both import litellm, which alone can take several seconds on a cold container
+warmup.register("schemas", warm_schemas, budget=2 * WARMUP_STEP_BUDGET_SECONDS)
+warmup.register("firestore", warm_firestore)
+warmup.register("auth_keys", warm_auth_keys, budget=5)
+if not MOCK_MODE:
+    warmup.register("llm", warm_llm, budget=2 * WARMUP_STEP_BUDGET_SECONDS)
+    if ENABLE_IMAGE_GENERATION:
+        warmup.register("gemini", warm_gemini)
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+import weakref
+from collections import deque
+
+from config import LOOP_WATCHDOG_INTERVAL_MS, LOOP_WATCHDOG_THRESHOLD_MS
+from services.metrics import EVENT_LOOP_BLOCKS, EVENT_LOOP_LAG
+
+logger = logging.getLogger(__name__)
+
+# Number of recent blocking reports kept for inspection
+MAX_REPORTS = 50
+
+
+class LoopWatchdog:
+    """Measures event-loop lag and reports code that blocks the loop.
+
+    A heartbeat task on the loop records how late each wake-up is. A separate thread watches the heartbeat; when it
+    stalls beyond the threshold, the thread captures the loop thread's current stack (the code that is blocking)
+    and the route of the request whose task is running, while the loop is still blocked.
+    """
+
+    def __init__(
+        self,
+        interval_ms: float = LOOP_WATCHDOG_INTERVAL_MS,
+        threshold_ms: float = LOOP_WATCHDOG_THRESHOLD_MS,
+    ):
+        self.interval = interval_ms / 1000
+        self.threshold = threshold_ms / 1000
+        self.reports: deque[dict] = deque(maxlen=MAX_REPORTS)
+        # Format: {request task: ASGI scope}, so a blocked task can be mapped back to its route
+        self._task_scopes: weakref.WeakKeyDictionary[asyncio.Task, dict] = weakref.WeakKeyDictionary()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id = 0
+        self._last_beat = 0.0
+        self._reported_beat = 0.0
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def track(self, task: asyncio.Task, scope: dict) -> None:
+        self._task_scopes[task] = scope
+
+    def untrack(self, task: asyncio.Task) -> None:
+        self._task_scopes.pop(task, None)
+
+    async def _heartbeat(self) -> None:
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._last_beat = time.monotonic()
+            EVENT_LOOP_LAG.observe(max(0.0, self._last_beat - start - self.interval))
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            beat = self._last_beat
+            blocked = time.monotonic() - beat - self.interval
+            if blocked >= self.threshold and beat != self._reported_beat:
+                # Report each stall once, at the moment it crosses the threshold
+                self._reported_beat = beat
+                self._report(blocked)
+
+    def _route(self) -> str:
+        # Reading the current task from another thread is racy, but only the identity of the task is needed
+        task = asyncio.current_task(self._loop)
+        scope = self._task_scopes.get(task) if task is not None else None
+        if scope is None:
+            return "background"
+        route = scope.get("route")
+        return f"{scope['method']} {route.path if route is not None else scope['path']}"
+
+    def _report(self, blocked: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+        route = self._route()
+        self.reports.append({"route": route, "blocked_ms": round(blocked * 1000, 1), "stack": stack})
+        EVENT_LOOP_BLOCKS.inc(route=route)
+        logger.warning("Event loop blocked for over %.0f ms in %s; blocking stack:\n%s", blocked * 1000, route, stack)
+
+    def start(self) -> None:
+        """Start the heartbeat and watchdog thread (called from the app lifespan)."""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = self._reported_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        logger.info("Event-loop watchdog enabled (threshold=%.0f ms)", self.threshold * 1000)
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stop.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await asyncio.to_thread(self._thread.join)
+        self._thread = None
+
+
+# Singleton instance
+loop_watchdog = LoopWatchdog()
+
+
+class LoopWatchdogMiddleware:
+    """ASGI middleware associating each request's task with its scope while the watchdog runs."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not loop_watchdog.running:
+            await self.app(scope, receive, send)
+            return
+
+        task = asyncio.current_task()
+        loop_watchdog.track(task, scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            loop_watchdog.untrack(task)
@@ -1,14 +1,19 @@
 import os
 import sys
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Generator
 
 import pytest
+from firebase_admin import auth as firebase_auth
 from httpx import ASGITransport, AsyncClient
 
 # Ensure backend directory is in python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import auth
 from app import app
+from benchmarks.fakes import FakeAuth, FakeFirestore
+from services import firebase
+from services.cache import recipe_cache
 
 
 @pytest.fixture
@@ -24,3 +29,20 @@ async def client() -> AsyncGenerator[AsyncClient, None]:
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as c:
         yield c
+
+
+@pytest.fixture
+def store(monkeypatch) -> Generator[FakeFirestore, None, None]:
+    """
+    Fixture that backs Firestore and Firebase Auth with in-process fakes and starts with an empty recipe cache.
+    """
+    store = FakeFirestore()
+    fake_auth = FakeAuth()
+    monkeypatch.setattr(firebase, "_db_async", store)
+    monkeypatch.setattr(firebase_auth, "get_users", fake_auth.get_users)
+    monkeypatch.setattr(firebase_auth, "verify_id_token", fake_auth.verify_id_token)
+    monkeypatch.setattr(firebase, "get_firebase_app", lambda: None)
+    monkeypatch.setattr(auth, "get_firebase_app", lambda: None)
+    recipe_cache.clear()
+    yield store
+    recipe_cache.clear()
@@ -0,0 +1,138 @@
+import asyncio
+
+import orjson
+import pytest
+from httpx import AsyncClient
+
+from benchmarks.fakes import FakeFirestore
+from models import Recipe
+from services import generation
+from services.cache import recipe_cache
+from services.limiter import limiter
+from services.recipe_store import decode_recipe
+
+
+@pytest.fixture
+def store(store: FakeFirestore, monkeypatch) -> FakeFirestore:
+    """The shared fake store, recording the number of writes of every committed batch."""
+    commits = []
+    make_batch = store.batch
+
+    def batch():
+        write_batch = make_batch()
+        commit = write_batch.commit
+
+        async def counted_commit():
+            commits.append(len(write_batch._writes))
+            await commit()
+
+        write_batch.commit = counted_commit
+        return write_batch
+
+    monkeypatch.setattr(store, "batch", batch)
+    store.commits = commits
+    return store
+
+
+@pytest.fixture
+def llm(monkeypatch) -> dict:
+    """Fake generation: "<seconds> <title>" prompts sleep for that long, "fail" prompts raise."""
+    state = {"running": 0, "peak": 0}
+
+    async def generate_recipe_from_prompt(prompt: str, **options) -> tuple[Recipe, dict]:
+        state["running"] += 1
+        state["peak"] = max(state["peak"], state["running"])
+        try:
+            seconds, title = prompt.split(" ", 1)
+            await asyncio.sleep(float(seconds))
+            if title == "fail":
+                raise RuntimeError("model overloaded")
+            return Recipe(title=title, description="", ingredients=[], instructions=[]), {}
+        finally:
+            state["running"] -= 1
+
+    monkeypatch.setattr(generation, "generate_recipe_from_prompt", generate_recipe_from_prompt)
+    return state
+
+
+@pytest.mark.asyncio
+async def test_batch_streams_in_completion_order_and_commits_once(client: AsyncClient, store: FakeFirestore, llm):
+    prompts = ["0.06 Lasagna", "0 fail", "0.02 Salad", "0.04 Curry", "0.01 Soup"]
+    response = await client.post(
+        "/api/generate-recipes:batch",
+        json={"requests": [{"prompt": prompt} for prompt in prompts]},
+        headers={"Authorization": "Bearer user-alice"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [orjson.loads(line) for line in response.text.splitlines()]
+    results, summary = lines[:-1], lines[-1]
+    assert [result["index"] for result in results] == [1, 4, 2, 3, 0]
+    assert results[0]["error"] == "Error generating recipe"
+    assert summary == {"done": True, "saved": 4}
+    assert llm["peak"] <= generation.RECIPE_BATCH_CONCURRENCY
+
+    # Every recipe, with its search index entries, was written by a single commit under the streamed ID
+    assert len(store.commits) == 1
+    for result in results[1:]:
+        data = (await store.collection("recipes").document(result["id"]).get()).to_dict()
+        assert data["uid"] == "alice"
+        assert data["prompt"] == prompts[result["index"]]
+        assert decode_recipe(data)["title"] == result["recipe"]["title"]
+        assert f"recipe_{result['id']}" in recipe_cache
+
+
+@pytest.mark.asyncio
+async def test_batch_concurrency_cap_and_timeout(store: FakeFirestore, llm, monkeypatch):
+    monkeypatch.setattr(generation, "RECIPE_BATCH_TIMEOUT_SECONDS", 0.05)
+    requests = [generation.RecipeRequest(prompt=prompt) for prompt in ["0 A", "0 B", "0.01 C", "5 D"]]
+
+    results = [result async for result in generation.generate_recipe_batch("alice", requests, concurrency=2)]
+
+    assert llm["peak"] == 2
+    assert [(result.index, result.error) for result in results][-1] == (3, "Timed out")
+    assert sum(result.id is not None for result in results) == 3
+    assert len(store.commits) == 1
+    # The timed-out generation was cancelled
+    await asyncio.sleep(0)
+    assert llm["running"] == 0
+
+
+@pytest.mark.asyncio
+async def test_batch_requires_sign_in_and_limits_size(client: AsyncClient, store: FakeFirestore):
+    response = await client.post("/api/generate-recipes:batch", json={"requests": [{"prompt": "soup"}]})
+    assert response.status_code == 401
+
+    response = await client.post(
+        "/api/generate-recipes:batch",
+        json={"requests": [{"prompt": "soup"}] * 11},
+        headers={"Authorization": "Bearer user-alice"},
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_batch_is_charged_per_recipe_against_the_generation_limit(client: AsyncClient, store: FakeFirestore, llm):
+    headers = {"Authorization": "Bearer user-alice"}
+    limiter.reset()
+    try:
+        response = await client.post(
+            "/api/generate-recipes:batch", json={"requests": [{"prompt": "0 Soup"}] * 8}, headers=headers
+        )
+        assert response.status_code == 200
+
+        response = await client.post(
+            "/api/generate-recipes:batch", json={"requests": [{"prompt": "0 Soup"}] * 2}, headers=headers
+        )
+        assert response.status_code == 200
+
+        # The 10 generations a minute are used up, on both endpoints
+        response = await client.post(
+            "/api/generate-recipes:batch", json={"requests": [{"prompt": "0 Soup"}]}, headers=headers
+        )
+        assert response.status_code == 429
+        response = await client.post("/api/generate-recipe", json={"prompt": "0 Soup"}, headers=headers)
+        assert response.status_code == 429
+    finally:
+        limiter.reset()
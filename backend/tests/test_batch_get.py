@@ -0,0 +1,67 @@
+import pytest
+from firebase_admin import auth as firebase_auth
+from httpx import AsyncClient
+
+from benchmarks.fakes import FakeFirestore
+from services.cache import recipe_cache
+
+
+@pytest.fixture
+def store(store: FakeFirestore, monkeypatch) -> FakeFirestore:
+    """The shared fake store, recording the uids of every get_users call."""
+    get_users = firebase_auth.get_users
+    calls = []
+
+    def recorded_get_users(identifiers, app=None):
+        calls.append([identifier.uid for identifier in identifiers])
+        return get_users(identifiers)
+
+    monkeypatch.setattr(firebase_auth, "get_users", recorded_get_users)
+    store.get_users_calls = calls
+    return store
+
+
+def seed(store: FakeFirestore, uid: str, title: str) -> str:
+    doc_ref = store.collection("recipes").document()
+    recipe = {"title": title, "description": "", "ingredients": [], "instructions": []}
+    doc_ref._write({"uid": uid, "prompt": f"make {title}", "recipe": recipe, "timestamp": "t"})
+    return doc_ref.id
+
+
+@pytest.mark.asyncio
+async def test_batch_get_returns_request_order_with_per_item_errors(client: AsyncClient, store: FakeFirestore):
+    first = seed(store, "alice", "Soup")
+    second = seed(store, "bob", "Stew")
+    third = seed(store, "alice", "Salad")
+    ids = [second, "missing1", first, "bad-id!", third]
+    # A single-recipe view caches the recipe
+    await client.get(f"/api/recipe/{first}")
+    store.get_users_calls.clear()
+
+    response = await client.post(
+        "/api/recipes:batchGet", json={"ids": ids}, headers={"Authorization": "Bearer user-alice"}
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["id"] for result in results] == ids
+    assert results[0]["recipe"]["recipe"]["title"] == "Stew"
+    assert results[0]["recipe"]["displayName"] == "Benchmark bob"
+    assert results[0]["recipe"]["prompt"] is None
+    assert results[1]["error"] == "Recipe not found"
+    assert results[2]["recipe"]["prompt"] == "make Soup"
+    assert results[3]["error"] == "Invalid recipe ID format"
+    # Owners are looked up once, in a single batched call
+    assert store.get_users_calls == [["alice", "bob"]]
+
+    # Cached recipes are served from memory, but recipes read by a batch are not added to the cache
+    assert set(recipe_cache) == {f"recipe_{first}"}
+    store._documents.clear()
+    response = await client.post("/api/recipes:batchGet", json={"ids": [first, third]})
+    assert [result.get("error") for result in response.json()["results"]] == [None, "Recipe not found"]
+    assert response.json()["results"][0]["recipe"]["recipe"]["title"] == "Soup"
+
+
+@pytest.mark.asyncio
+async def test_batch_get_rejects_more_than_100_ids(client: AsyncClient):
+    response = await client.post("/api/recipes:batchGet", json={"ids": [f"id{i}" for i in range(101)]})
+    assert response.status_code == 422
@@ -0,0 +1,98 @@
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from httpx import ASGITransport, AsyncClient
+
+from benchmarks.fakes import FakeFirestore
+from services.compression import CompressionMiddleware, choose_coding
+from services.responses import conditional_response
+
+
+def test_choose_coding_prefers_brotli_and_honors_q_values():
+    assert choose_coding("gzip, deflate, br") == "br"
+    assert choose_coding("gzip;q=1.0, br;q=0.5") == "gzip"
+    assert choose_coding("*") == "br"
+    assert choose_coding("br;q=0, identity") is None
+    assert choose_coding("") is None
+
+
+@pytest.mark.asyncio
+async def test_compresses_large_and_streamed_bodies_only():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/small")
+    async def small():
+        return PlainTextResponse("x" * 50)
+
+    @app.get("/large")
+    async def large():
+        return PlainTextResponse("x" * 5000, headers={"ETag": '"abc"'})
+
+    @app.get("/stream")
+    async def stream():
+        async def lines():
+            for i in range(3):
+                yield f'{{"line": {i}}}\n'
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/small", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+
+        response = await client.get("/large", headers={"Accept-Encoding": "br"})
+        assert response.headers["content-encoding"] == "br"
+        assert response.headers["etag"] == '"abc-br"'
+        assert response.headers["vary"] == "Accept-Encoding"
+        # httpx decodes the body according to Content-Encoding
+        assert response.content == b"x" * 5000
+
+        response = await client.get("/stream", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.text.splitlines() == [f'{{"line": {i}}}' for i in range(3)]
+
+
+@pytest.mark.asyncio
+async def test_not_modified_keeps_etag_and_vary_of_compressed_representation():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/cached")
+    async def cached(request: Request):
+        return conditional_response(request, PlainTextResponse("x" * 5000), "public, max-age=60")
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/cached", headers={"Accept-Encoding": "br"})
+        etag = response.headers["etag"]
+        assert etag.endswith('-br"')
+
+        revisit = await client.get("/cached", headers={"Accept-Encoding": "br", "If-None-Match": etag})
+        assert revisit.status_code == 304
+        assert revisit.headers["etag"] == etag
+        assert revisit.headers["vary"] == "Accept-Encoding"
+        assert "content-encoding" not in revisit.headers
+
+
+@pytest.mark.asyncio
+async def test_recipe_view_revalidates_with_etag(client: AsyncClient, store: FakeFirestore):
+    doc_ref = store.collection("recipes").document()
+    recipe = {"title": "Soup", "description": "", "ingredients": [], "instructions": []}
+    doc_ref._write({"uid": "alice", "prompt": "make soup", "recipe": recipe, "timestamp": "t"})
+    url = f"/api/recipe/{doc_ref.id}"
+
+    response = await client.get(url, headers={"Authorization": "Bearer user-alice"})
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "private, no-cache"
+    etag = response.headers["etag"]
+
+    revisit = await client.get(url, headers={"Authorization": "Bearer user-alice", "If-None-Match": etag})
+    assert revisit.status_code == 304
+    assert revisit.content == b""
+    assert revisit.headers["etag"] == etag
+
+    # Other viewers get a different (public, prompt-free) body, so the owner's ETag does not match
+    shared = await client.get(url, headers={"If-None-Match": etag})
+    assert shared.status_code == 200
+    assert shared.headers["cache-control"].startswith("public")
+    assert shared.json()["prompt"] is None
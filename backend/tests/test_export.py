@@ -0,0 +1,85 @@
+import datetime
+import functools
+import gzip
+
+import orjson
+import pytest
+from httpx import AsyncClient
+
+from benchmarks.fakes import FakeFirestore, FakeQuery
+from routes import recipes
+from services import export
+from services.recipe_store import encode_recipe
+
+
+@pytest.fixture
+def store(store: FakeFirestore, monkeypatch) -> FakeFirestore:
+    # Small pages, so a handful of recipes spans several queries
+    monkeypatch.setattr(recipes, "export_recipes", functools.partial(export.export_recipes, page_size=2))
+    return store
+
+
+def seed(store: FakeFirestore, uid: str, title: str, archived: bool = False) -> str:
+    doc_ref = store.collection("recipes").document()
+    recipe = {"title": title, "description": "", "ingredients": [], "instructions": []}
+    timestamp = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+    doc_ref._write({"uid": uid, "prompt": title, **encode_recipe(recipe), "timestamp": timestamp, "archived": archived})
+    return doc_ref.id
+
+
+def read_lines(body: bytes) -> list[dict]:
+    return [orjson.loads(line) for line in body.splitlines()]
+
+
+@pytest.mark.asyncio
+async def test_export_streams_library_in_id_order_and_resumes(client: AsyncClient, store: FakeFirestore):
+    ids = sorted(seed(store, "alice", f"Recipe {n}") for n in range(5))
+    seed(store, "alice", "Archived", archived=True)
+    seed(store, "bob", "Not mine")
+
+    response = await client.get("/api/recipes/export", headers={"Authorization": "Bearer user-alice"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    *lines, summary = read_lines(response.content)
+    assert [line["id"] for line in lines] == ids
+    assert lines[0]["recipe"]["title"].startswith("Recipe")
+    assert lines[0]["timestamp"] == "2026-01-01T00:00:00+00:00"
+    assert "body" not in lines[0]
+    assert summary == {"done": True, "count": 5}
+
+    # Resuming after the second recipe sends only the rest
+    response = await client.get(
+        "/api/recipes/export", params={"cursor": ids[1]}, headers={"Authorization": "Bearer user-alice"}
+    )
+    *lines, summary = read_lines(response.content)
+    assert [line["id"] for line in lines] == ids[2:]
+    assert summary == {"done": True, "count": 3}
+
+
+@pytest.mark.asyncio
+async def test_export_gzip_and_errors(client: AsyncClient, store: FakeFirestore, monkeypatch):
+    for n in range(3):
+        seed(store, "alice", f"Recipe {n}")
+    headers = {"Authorization": "Bearer user-alice"}
+
+    plain = await client.get("/api/recipes/export", headers=headers)
+    compressed = await client.get("/api/recipes/export", params={"gzip": "true"}, headers=headers)
+    assert compressed.headers["content-type"] == "application/gzip"
+    assert 'filename="recipes.ndjson.gz"' in compressed.headers["content-disposition"]
+    assert gzip.decompress(compressed.content) == plain.content
+
+    # A failed read ends the export with the cursor to resume from
+    stream = FakeQuery.stream
+    calls = []
+
+    def failing_stream(query):
+        calls.append(query)
+        if len(calls) > 1:
+            raise ConnectionError("stream reset")
+        return stream(query)
+
+    monkeypatch.setattr(FakeQuery, "stream", failing_stream)
+    *lines, last = read_lines((await client.get("/api/recipes/export", headers=headers)).content)
+    assert last == {"error": "Error exporting recipes", "cursor": lines[-1]["id"]}
+
+    assert (await client.get("/api/recipes/export")).status_code == 401
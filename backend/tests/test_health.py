@@ -9,3 +9,21 @@ async def test_health_check(client: AsyncClient):
     data = response.json()
     assert data["status"] in ["ok", "degraded"]
     assert "services" in data
+
+
+@pytest.mark.asyncio
+async def test_liveness(client: AsyncClient):
+    response = await client.get("/api/health/live")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+
+
+@pytest.mark.asyncio
+async def test_readiness_reports_dependencies(client: AsyncClient):
+    response = await client.get("/api/health/ready")
+    assert response.status_code in [200, 503]
+    data = response.json()
+    assert data["status"] in ["ok", "degraded", "unavailable"]
+    for name in ["firestore", "llm", "gemini", "storage"]:
+        assert name in data["dependencies"]
+        assert data["dependencies"][name]["status"] in ["ok", "error", "disabled"]
@@ -0,0 +1,23 @@
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from services import gemini, http
+
+
+@pytest.mark.asyncio
+async def test_close_drops_clients_built_on_the_pool(monkeypatch):
+    client = http.get_http_client()
+    litellm = SimpleNamespace(aclient_session=client)
+    monkeypatch.setitem(sys.modules, "litellm", litellm)
+    monkeypatch.setattr(gemini, "_gemini_client", object())
+
+    await http.close_http_client()
+
+    assert client.is_closed
+    assert litellm.aclient_session is None
+    assert gemini._gemini_client is None
+    # The next lifespan gets a fresh pool
+    assert http.get_http_client() is not client
+    await http.close_http_client()
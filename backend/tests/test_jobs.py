@@ -0,0 +1,166 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+
+from benchmarks.fakes import FakeFirestore
+from services import images
+from services.jobs import JobManager, JobQueueFull, job_manager
+from services.mock import LatencyModel
+
+
+def prepare(uid: str, params: dict) -> dict:
+    if "seconds" not in params:
+        raise ValueError("seconds is required")
+    return params
+
+
+async def sleeper(job, params: dict) -> dict:
+    await job.set_progress(0.5, "sleeping")
+    await asyncio.sleep(params["seconds"])
+    return {"slept": params["seconds"]}
+
+
+@pytest.fixture
+async def manager(store: FakeFirestore):
+    manager = JobManager(workers=1, queue_size=2)
+    manager.register("sleep", prepare, sleeper, timeout=0.5)
+    manager.start()
+    yield manager
+    await manager.drain(timeout=0)
+
+
+@pytest.mark.asyncio
+async def test_job_progress_is_streamed_and_persisted(manager: JobManager, store: FakeFirestore):
+    job = await manager.submit("alice", "sleep", {"seconds": 0.01})
+    updates = [(data["status"], data["stage"]) async for data in manager.watch(job.id)]
+
+    assert updates[0] == ("queued", "")
+    assert ("running", "sleeping") in updates
+    assert updates[-1] == ("succeeded", "sleeping")
+    stored = (await store.collection("jobs").document(job.id).get()).to_dict()
+    assert stored["status"] == "succeeded"
+    assert stored["result"] == {"slept": 0.01}
+
+
+@pytest.mark.asyncio
+async def test_jobs_time_out_cancel_and_reject_when_full(manager: JobManager):
+    with pytest.raises(ValueError):
+        await manager.submit("alice", "sleep", {})
+
+    slow = await manager.submit("alice", "sleep", {"seconds": 5})
+    queued = await manager.submit("alice", "sleep", {"seconds": 0})
+    await manager.submit("alice", "sleep", {"seconds": 0})
+    # One job runs on the single worker and two fill the queue
+    await asyncio.sleep(0.01)
+    with pytest.raises(JobQueueFull):
+        await manager.submit("alice", "sleep", {"seconds": 0})
+
+    assert (await manager.cancel(queued.id))["status"] == "cancelled"
+    final = [data async for data in manager.watch(slow.id)][-1]
+    assert final["status"] == "failed"
+    assert final["error"] == "Timed out after 0.5s"
+
+    # Let the worker skip the cancelled job and finish the last one
+    await asyncio.sleep(0.05)
+    running = await manager.submit("alice", "sleep", {"seconds": 5})
+    await asyncio.sleep(0.05)
+    assert (await manager.cancel(running.id))["status"] == "cancelled"
+
+
+@pytest.mark.asyncio
+async def test_drain_cancels_unfinished_jobs(store: FakeFirestore):
+    manager = JobManager(workers=1, queue_size=5)
+    manager.register("sleep", prepare, sleeper, timeout=10)
+    manager.start()
+    running = await manager.submit("alice", "sleep", {"seconds": 5})
+    queued = await manager.submit("alice", "sleep", {"seconds": 5})
+    await asyncio.sleep(0.01)
+
+    await manager.drain(timeout=0.05)
+
+    for job in (running, queued):
+        stored = (await store.collection("jobs").document(job.id).get()).to_dict()
+        assert stored["status"] == "cancelled"
+        assert stored["error"] == "Server shutting down"
+    with pytest.raises(JobQueueFull):
+        await manager.submit("alice", "sleep", {"seconds": 0})
+
+
+@pytest.mark.asyncio
+async def test_image_job_route(client: AsyncClient, store: FakeFirestore, monkeypatch):
+    monkeypatch.setattr(images, "MOCK_MODE", True)
+    monkeypatch.setattr(images, "ENABLE_IMAGE_GENERATION", True)
+    monkeypatch.setattr(images, "mock_image_latency", LatencyModel(0))
+    headers = {"Authorization": "Bearer user-alice"}
+    params = {"recipe_id": "abc123", "recipe": {"title": "Tomato Soup", "description": "Warm and smooth"}}
+    job_manager.start()
+    try:
+        response = await client.post("/api/jobs", json={"kind": "generate-image", "params": params}, headers=headers)
+        assert response.status_code == 202
+        job_id = response.json()["id"]
+
+        stream = await client.get(f"/api/jobs/{job_id}", headers={**headers, "Accept": "text/event-stream"})
+        events = [line for line in stream.text.splitlines() if line.startswith("data: ")]
+        assert '"status":"succeeded"' in events[-1]
+
+        response = await client.get(f"/api/jobs/{job_id}", headers=headers)
+        assert response.json()["result"]["image_url"] == images.MOCK_IMAGE_URL
+        # Other users cannot see the job
+        response = await client.get(f"/api/jobs/{job_id}", headers={"Authorization": "Bearer user-bob"})
+        assert response.status_code == 404
+
+        response = await client.post("/api/jobs", json={"kind": "unknown"}, headers=headers)
+        assert response.status_code == 400
+    finally:
+        await job_manager.drain(timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_cancel_through_another_manager_stops_the_job(store: FakeFirestore):
+    stages = []
+
+    async def two_stages(job, params: dict) -> dict:
+        for stage in ("first", "second"):
+            await job.set_progress(0.5, stage)
+            await asyncio.sleep(params["seconds"])
+            stages.append(stage)
+        return {"done": True}
+
+    owner, other = JobManager(workers=1, queue_size=1), JobManager(workers=1, queue_size=1)
+    for manager in (owner, other):
+        manager.register("stages", prepare, two_stages, timeout=5)
+    owner.start()
+    try:
+        job = await owner.submit("alice", "stages", {"seconds": 0.05})
+        await asyncio.sleep(0.01)
+        assert (await other.cancel(job.id))["status"] == "cancelled"
+
+        final = [data async for data in owner.watch(job.id)][-1]
+        assert final["status"] == "cancelled"
+        assert stages == ["first"]
+        stored = (await store.collection("jobs").document(job.id).get()).to_dict()
+        assert stored["status"] == "cancelled"
+        assert stored["result"] is None
+    finally:
+        await owner.drain(timeout=0)
+
+
+@pytest.mark.asyncio
+async def test_drain_lets_running_and_queued_jobs_finish(store: FakeFirestore):
+    manager = JobManager(workers=1, queue_size=5)
+    manager.register("sleep", prepare, sleeper, timeout=10)
+    manager.start()
+    running = await manager.submit("alice", "sleep", {"seconds": 0.05})
+    queued = await manager.submit("alice", "sleep", {"seconds": 0.05})
+    await asyncio.sleep(0.01)
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await manager.drain(timeout=2)
+
+    # Both jobs ran to completion well before the drain timeout
+    assert loop.time() - start < 1
+    for job in (running, queued):
+        stored = (await store.collection("jobs").document(job.id).get()).to_dict()
+        assert stored["status"] == "succeeded"
@@ -0,0 +1,95 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from services import llm
+from services.json_repair import IncrementalJSONParser, JSONRepairError, repair_json
+from services.llm_router import LLMRouter
+from services.token_budget import TokenBudget
+
+RECIPE = json.dumps(
+    {
+        "title": "Tomato Soup",
+        "description": 'Bright and "silky".',
+        "servings": "4",
+        "macros": {"calories": 220, "protein": 6, "carbs": 30, "fat": 9},
+        "ingredients": [{"group_name": "Main", "items": ["1 kg tomatoes", "2 tbsp olive oil"]}],
+        "instructions": ["Roast the tomatoes at <strong>220°C</strong>.", "Blend until smooth.", "Season to taste."],
+        "notes": [],
+    },
+    ensure_ascii=False,
+)
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ('{"a": [1, 2, ], "b": "x",}', {"a": [1, 2], "b": "x"}),
+        ('```json\n{"a": "two\nlines"}\n```', {"a": "two\nlines"}),
+        ('{"a": ["one", "two", "thr', {"a": ["one", "two"]}),
+        ('{"a": {"b": [1, {"c": tr', {"a": {"b": [1, {}]}}),
+        ('{"a": 1, "b": [true, null], "c": 12', {"a": 1, "b": [True, None]}),
+        ('{"a": "x", "b":', {"a": "x"}),
+    ],
+)
+def test_repairs_defects_and_truncation(text: str, expected: dict):
+    assert json.loads(repair_json(text)) == expected
+
+
+def test_chunk_boundaries_do_not_matter():
+    for size in (1, 2, 3, 5, 64):
+        parser = IncrementalJSONParser()
+        for start in range(0, len(RECIPE), size):
+            parser.feed(RECIPE[start : start + size])
+        assert parser.complete and not parser.repaired
+        assert json.loads(parser.result()) == json.loads(RECIPE)
+
+
+def test_rejects_output_that_cannot_be_json_early():
+    parser = IncrementalJSONParser()
+    with pytest.raises(JSONRepairError):
+        parser.feed("Sure! Here is your recipe:")
+    with pytest.raises(JSONRepairError):
+        parser.feed("{}")
+
+    for text in ['{"a" 1}', '{"a": 1 "b": 2}', '{"a": tru}', '{"a": [1}']:
+        with pytest.raises(JSONRepairError):
+            repair_json(text)
+
+
+@pytest.mark.asyncio
+async def test_truncated_output_is_continued_not_regenerated(monkeypatch):
+    cut = RECIPE.index("Blend until") + 5
+    outputs = [(RECIPE[:cut], "length"), (RECIPE[cut:], "stop")]
+    calls = []
+
+    async def complete(operation, messages, model, parser, max_tokens, response_format=None):
+        calls.append({"messages": messages, "max_tokens": max_tokens, "structured": response_format is not None})
+        content, finish_reason = outputs[len(calls) - 1]
+        parser.feed(content)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason=finish_reason)],
+            usage=SimpleNamespace(prompt_tokens=100, completion_tokens=len(content), total_tokens=100 + len(content)),
+        )
+
+    monkeypatch.setattr(llm, "_complete", complete)
+    monkeypatch.setattr(llm, "llm_router", LLMRouter(["primary"]))
+    monkeypatch.setattr(llm, "token_budget", TokenBudget())
+
+    recipe, usage = await llm._complete_recipe("generate", [{"role": "user", "content": "tomato soup"}], ("generate",))
+
+    assert recipe.instructions[1] == "Blend until smooth."
+    assert usage.completion_tokens == len(RECIPE)
+    # The continuation sees the cut-off output and only asks for the rest
+    assert len(calls) == 2
+    assert calls[1]["messages"][-2] == {"role": "assistant", "content": RECIPE[:cut]}
+    assert calls[1]["max_tokens"] == llm.LLM_CONTINUATION_MAX_TOKENS
+    assert not calls[1]["structured"]
+
+    # Without continuations, the truncated last instruction is dropped instead of failing the request
+    monkeypatch.setattr(llm, "LLM_MAX_CONTINUATIONS", 0)
+    calls.clear()
+    recipe, _ = await llm._complete_recipe("generate", [{"role": "user", "content": "tomato soup"}], ("generate",))
+    assert recipe.instructions == ["Roast the tomatoes at <strong>220°C</strong>."]
+    assert recipe.notes == []
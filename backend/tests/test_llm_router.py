@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from services.llm_router import MIN_LATENCY_SAMPLES, LLMDeadlineExceeded, LLMRouter
+
+
+class FakeModels:
+    """Attempts that take a configured time per model and fail for models listed in `failing`."""
+
+    def __init__(self, latencies: dict[str, float], failing: set[str] = frozenset()):
+        self.latencies = latencies
+        self.failing = failing
+        self.started: list[str] = []
+        self.cancelled: list[str] = []
+
+    async def attempt(self, model: str) -> str:
+        self.started.append(model)
+        try:
+            await asyncio.sleep(self.latencies[model])
+        except asyncio.CancelledError:
+            self.cancelled.append(model)
+            raise
+        if model in self.failing:
+            raise ValueError(f"{model} returned an invalid recipe")
+        return model
+
+
+def router(**options) -> LLMRouter:
+    return LLMRouter(["primary", "fallback", "backup"], **{"deadline": 1, "hedge_default_delay": 0.02, **options})
+
+
+@pytest.mark.asyncio
+async def test_slow_call_is_hedged_and_loser_cancelled():
+    llm = router(hedge_max_rate=1)
+    models = FakeModels({"primary": 0.5, "fallback": 0.01, "backup": 0.01})
+
+    assert await llm.call(models.attempt) == "fallback"
+    assert models.started == ["primary", "fallback"]
+    await asyncio.sleep(0)
+    assert models.cancelled == ["primary"]
+
+    # A fast call is not hedged
+    models = FakeModels({"primary": 0.001, "fallback": 0.001, "backup": 0.001})
+    assert await llm.call(models.attempt) == "primary"
+    assert models.started == ["primary"]
+
+
+@pytest.mark.asyncio
+async def test_hedge_delay_follows_recent_latency():
+    llm = router(hedge_quantile=0.9)
+    assert llm.hedge_delay("primary") == 0.02
+    for latency in range(1, MIN_LATENCY_SAMPLES + 1):
+        llm.stats["primary"].record(True, latency / 100)
+    assert llm.hedge_delay("primary") == pytest.approx(0.19)
+
+
+@pytest.mark.asyncio
+async def test_hedge_rate_is_capped():
+    llm = router(hedge_max_rate=0.25)
+    hedged = 0
+    for _ in range(8):
+        models = FakeModels({"primary": 0.04, "fallback": 0.001, "backup": 0.001})
+        await llm.call(models.attempt)
+        hedged += len(models.started) > 1
+    assert hedged == 2
+
+
+@pytest.mark.asyncio
+async def test_failover_health_and_deadline():
+    llm = router(hedge_max_rate=0)
+    models = FakeModels({"primary": 0.001, "fallback": 0.001, "backup": 0.001}, failing={"primary"})
+
+    # Invalid output fails over to the next model immediately, even with hedging disabled
+    for _ in range(4):
+        assert await llm.call(models.attempt) == "fallback"
+    # After repeated failures the primary is tried last
+    assert not llm.stats["primary"].healthy
+    assert llm.ranked_models() == ["fallback", "backup", "primary"]
+
+    models = FakeModels({"primary": 0.001, "fallback": 0.001, "backup": 0.001}, failing={"primary", "fallback", "backup"})
+    with pytest.raises(ValueError):
+        await llm.call(models.attempt)
+
+    llm = router(deadline=0.05, hedge_max_rate=1)
+    models = FakeModels({"primary": 5, "fallback": 5, "backup": 5})
+    with pytest.raises(LLMDeadlineExceeded):
+        await llm.call(models.attempt)
+    await asyncio.sleep(0)
+    assert sorted(models.cancelled) == ["fallback", "primary"]
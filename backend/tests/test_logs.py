@@ -0,0 +1,44 @@
+import json
+import logging
+
+from services.logs import JsonFormatter, RequestContextFilter, RouteSamplingFilter, parse_sample_ratios
+from services.tracing import request_id_var, request_scope_var
+
+
+def make_record(level: int = logging.INFO) -> logging.LogRecord:
+    return logging.LogRecord("routes.recipes", level, __file__, 1, "Saved recipe %s", ("abc",), None)
+
+
+def test_json_output_includes_request_context():
+    id_token = request_id_var.set("req-1")
+    scope_token = request_scope_var.set({"method": "GET", "path": "/api/recipe/abc"})
+    try:
+        record = make_record()
+        RequestContextFilter().filter(record)
+    finally:
+        request_id_var.reset(id_token)
+        request_scope_var.reset(scope_token)
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "Saved recipe abc"
+    assert entry["severity"] == "INFO"
+    assert entry["request_id"] == "req-1"
+    assert entry["route"] == "/api/recipe/abc"
+
+
+def test_route_sampling_keeps_warnings_and_whole_requests():
+    sampler = RouteSamplingFilter(parse_sample_ratios("/api/recipe/{recipe_id}=0.25,/api/health/live=0"))
+
+    def keep(route: str, request_id: str, level: int = logging.INFO) -> bool:
+        record = make_record(level)
+        record.route = route
+        record.request_id = request_id
+        return sampler.filter(record)
+
+    kept = [request_id for request_id in map(str, range(1000)) if keep("/api/recipe/{recipe_id}", request_id)]
+    assert 150 < len(kept) < 350
+    # The decision is per request, so every line of a kept request is kept
+    assert all(keep("/api/recipe/{recipe_id}", request_id) for request_id in kept)
+    assert not keep("/api/health/live", "1")
+    assert keep("/api/health/live", "1", logging.WARNING)
+    assert keep("/api/favorites", "1")
@@ -0,0 +1,81 @@
+import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks.fakes import FakeFirestore
+from models import Recipe
+from services import maintenance
+from services.cache import recipe_cache
+
+
+class FakeBucket:
+    """Object names in a set; listing fails for prefixes of recipes in `failing`."""
+
+    def __init__(self, names: list[str]):
+        self.names = set(names)
+        self.failing: set[str] = set()
+
+    def list_blobs(self, prefix: str):
+        if prefix.rsplit("/", 1)[-1] in self.failing:
+            raise PermissionError("storage.objects.list denied")
+        return [SimpleNamespace(name=name) for name in sorted(self.names) if name.startswith(prefix)]
+
+    def delete_blobs(self, blobs, on_error=None) -> None:
+        for blob in blobs:
+            self.names.discard(blob.name)
+
+
+def seed(store: FakeFirestore, archived_days_ago: int | None) -> str:
+    doc_ref = store.collection("recipes").document()
+    data = {"uid": "alice", "recipe": {"title": "Soup"}, "archived": archived_days_ago is not None}
+    if archived_days_ago is not None:
+        data["archivedAt"] = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=archived_days_ago)
+    doc_ref._write(data)
+    recipe_cache[f"recipe_{doc_ref.id}"] = {"uid": "alice", "recipe": Recipe(title="Soup", description="",
+                                                                               ingredients=[], instructions=[])}
+    return doc_ref.id
+
+
+@pytest.mark.asyncio
+async def test_purge_deletes_old_archived_recipes_images_and_cache(store: FakeFirestore, monkeypatch):
+    old = [seed(store, days) for days in (31, 45, 60, 90, 400)]
+    kept = [seed(store, 10), seed(store, None)]
+    bucket = FakeBucket(
+        [f"recipe-images/{old[0]}.jpg"]
+        + [f"recipe-images/{recipe_id}/{variant}.webp" for recipe_id in old[1:] for variant in ("thumb", "full")]
+        + [f"recipe-images/{kept[0]}/thumb.webp", f"recipe-images/{old[0]}0/thumb.webp"]
+    )
+    monkeypatch.setattr(maintenance, "get_storage_bucket", lambda: bucket)
+
+    # A dry run only counts, across pages
+    result = await maintenance.purge_archived_recipes(days=30, dry_run=True, page_size=2)
+    assert result == {"recipes": 5, "images": 9, "skipped": 0}
+    assert len(bucket.names) == 11
+    for recipe_id in old:
+        assert (await store.collection("recipes").document(recipe_id).get()).exists
+
+    result = await maintenance.purge_archived_recipes(days=30, page_size=2)
+    assert result == {"recipes": 5, "images": 9, "skipped": 0}
+    for recipe_id in old:
+        assert not (await store.collection("recipes").document(recipe_id).get()).exists
+        assert f"recipe_{recipe_id}" not in recipe_cache
+    for recipe_id in kept:
+        assert (await store.collection("recipes").document(recipe_id).get()).exists
+        assert f"recipe_{recipe_id}" in recipe_cache
+    # Images of recipes that are kept, and of IDs that merely share a prefix, are left alone
+    assert bucket.names == {f"recipe-images/{kept[0]}/thumb.webp", f"recipe-images/{old[0]}0/thumb.webp"}
+
+
+@pytest.mark.asyncio
+async def test_recipe_is_kept_when_its_images_cannot_be_deleted(store: FakeFirestore, monkeypatch):
+    first, second = seed(store, 40), seed(store, 50)
+    bucket = FakeBucket([f"recipe-images/{first}/full.jpg", f"recipe-images/{second}/full.jpg"])
+    bucket.failing.add(first)
+    monkeypatch.setattr(maintenance, "get_storage_bucket", lambda: bucket)
+
+    result = await maintenance.purge_archived_recipes(days=30)
+
+    assert result == {"recipes": 1, "images": 1, "skipped": 1}
+    assert (await store.collection("recipes").document(first).get()).exists
+    assert not (await store.collection("recipes").document(second).get()).exists
@@ -0,0 +1,39 @@
+import threading
+
+import pytest
+from httpx import AsyncClient
+
+from services.metrics import Counter, Histogram
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_latency_seconds", "Test", ("stage",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, stage="a")
+    histogram.observe(0.5, stage="a")
+    histogram.observe(5.0, stage="a")
+
+    lines = histogram.render()
+    assert 'test_latency_seconds_bucket{stage="a",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{stage="a",le="1.0"} 2' in lines
+    assert 'test_latency_seconds_bucket{stage="a",le="+Inf"} 3' in lines
+    assert 'test_latency_seconds_count{stage="a"} 3' in lines
+
+
+def test_counter_merges_thread_shards():
+    counter = Counter("test_total", "Test", ("result",))
+    threads = [threading.Thread(target=lambda: [counter.inc(result="hit") for _ in range(100)]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    counter.inc(result="hit")
+
+    assert counter.collect() == {("hit",): 401}
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_records_requests(client: AsyncClient):
+    await client.get("/api/health/live")
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/health/live",status="200"}' in response.text
@@ -0,0 +1,120 @@
+import pytest
+from firebase_admin import auth as firebase_auth
+from httpx import AsyncClient
+
+import auth
+from benchmarks.fakes import FakeAuth, FakeFirestore
+from services import firebase
+from services.nutrition import (
+    GRAMS,
+    MILLILITERS,
+    PIECES,
+    NutritionTable,
+    compute_macros,
+    compute_macros_batch,
+    get_nutrition_table,
+    parse_ingredient,
+)
+from services.recipe_store import encode_recipe
+
+CARBONARA = {
+    "title": "Spaghetti Carbonara",
+    "servings": "4 servings",
+    "macros": {"calories": 1, "protein": 1, "carbs": 1, "fat": 1},
+    "ingredients": [
+        {
+            "group_name": "Main",
+            "items": [
+                "400g spaghetti",
+                "150g guanciale, diced",
+                "4 large egg yolks",
+                "1 large egg",
+                "50g pecorino romano, finely grated",
+                "2 tsp freshly ground black pepper",
+                "Salt to taste",
+            ],
+        }
+    ],
+}
+
+
+@pytest.mark.parametrize(
+    ("item", "amount", "kind", "name"),
+    [
+        ("400g spaghetti", 400, GRAMS, "spaghetti"),
+        ("1 cup (150g) flour", 150, GRAMS, "all-purpose flour"),
+        ("2 (14 oz) cans crushed tomatoes", 2 * 28.3495 * 14, GRAMS, "canned tomatoes"),
+        ("2 tbsp extra-virgin olive oil", 2 * 14.7868, MILLILITERS, "olive oil"),
+        ("2-3 cloves garlic, minced", 2.5, PIECES, "garlic"),
+        ("1½ lbs boneless chicken thighs", 1.5 * 453.592, GRAMS, "chicken thigh"),
+        ("3 medium potatoes", 3, PIECES, "potato"),
+    ],
+)
+def test_parse_and_match_ingredient(item, amount, kind, name):
+    parsed = parse_ingredient(item)
+    assert parsed[:2] == (pytest.approx(amount), kind)
+    table = get_nutrition_table()
+    assert table.names[table.match(parsed[2])] == name
+
+
+def test_lines_without_a_quantity_are_skipped():
+    assert parse_ingredient("Salt to taste") is None
+    assert parse_ingredient("2-inch piece ginger") is None
+
+
+def test_compute_macros_per_serving():
+    macros = compute_macros(CARBONARA)
+    # 400 g spaghetti, 150 g guanciale, 4 yolks, 1 egg, 50 g pecorino and 10 ml pepper, over 4 servings
+    assert macros == {"calories": 740, "protein": 24, "carbs": 77, "fat": 37}
+
+    # Scaling the ingredients and the servings together leaves the per-serving macros unchanged
+    doubled = {**CARBONARA, "servings": "8 servings"}
+    doubled["ingredients"] = [{"group_name": "Main", "items": [
+        "800g spaghetti", "300g guanciale", "8 egg yolks", "2 eggs", "100g pecorino", "4 tsp black pepper",
+    ]}]
+    assert compute_macros(doubled) == pytest.approx(macros, abs=1)
+
+
+def test_compute_macros_batch_requires_coverage_and_servings():
+    unknown = {"servings": "4", "ingredients": [{"group_name": "Main", "items": ["2 cups dragonfruit", "1 yuzu"]}]}
+    no_servings = {**CARBONARA, "servings": ""}
+
+    assert compute_macros_batch([CARBONARA, unknown, no_servings, {}]) == [compute_macros(CARBONARA), None, None, None]
+    assert compute_macros_batch([]) == []
+
+
+def test_table_is_compiled_once_and_memory_mapped(tmp_path):
+    path = tmp_path / "nutrition.csv"
+    path.write_text("name,aliases,kcal,protein,carbs,fat,density,each\nrice,white rice|jasmine rice,365,7,80,1,0.8,0\n")
+
+    table = NutritionTable.load(str(path), cache_dir=str(tmp_path))
+    assert table.values.filename and len(list(tmp_path.glob("nutrition-*.npy"))) == 1
+    assert table.match("cooked jasmine rice") == 0
+    assert table.values[0, 0] == 365
+
+    NutritionTable.load(str(path), cache_dir=str(tmp_path))
+    assert len(list(tmp_path.glob("nutrition-*.npy"))) == 1
+
+
+@pytest.mark.asyncio
+async def test_history_includes_computed_macros(client: AsyncClient, monkeypatch):
+    store = FakeFirestore()
+    monkeypatch.setattr(firebase, "_db_async", store)
+    monkeypatch.setattr(firebase_auth, "verify_id_token", FakeAuth().verify_id_token)
+    monkeypatch.setattr(auth, "get_firebase_app", lambda: None)
+    unknown = {**CARBONARA, "title": "Mystery Stew", "ingredients": [{"group_name": "Main", "items": ["1 yuzu"]}]}
+    for timestamp, recipe in [("2", CARBONARA), ("1", unknown)]:
+        await store.collection("recipes").document().set(
+            {"uid": "alice", "archived": False, "timestamp": timestamp, **encode_recipe(recipe)}
+        )
+    headers = {"Authorization": "Bearer user-alice"}
+
+    response = await client.get("/api/recipe-history", headers=headers)
+    assert [item["macros"] for item in response.json()["history"]] == [None, None]
+
+    response = await client.get("/api/recipe-history?include_macros=true", headers=headers)
+    history = response.json()["history"]
+    assert [item["title"] for item in history] == ["Spaghetti Carbonara", "Mystery Stew"]
+    assert history[0]["macros"] == compute_macros(CARBONARA)
+    # Falls back to the stored estimate when the ingredients cannot be matched
+    assert history[1]["macros"] == unknown["macros"]
@@ -0,0 +1,55 @@
+import asyncio
+
+from benchmarks.fakes import FakeFirestore
+from services import firebase
+from services.recipe_store import (
+    SCHEMA_VERSION,
+    TITLE_PROJECTION,
+    decode_recipe,
+    encode_recipe,
+    recipe_summary,
+    upgrade_in_background,
+)
+
+RECIPE = {
+    "title": "Carbonara",
+    "description": "Silky Roman pasta.",
+    "servings": "2 servings",
+    "ingredients": [{"group_name": "Main", "items": ["200g guanciale"]}],
+    "instructions": ["Cook the pasta until <strong>al dente</strong>. " * 20],
+    "notes": ["Use pecorino."],
+}
+
+
+def test_encoded_recipe_round_trips_and_compresses():
+    fields = encode_recipe(RECIPE)
+    assert fields["schema_version"] == SCHEMA_VERSION
+    assert fields["summary"]["title"] == "Carbonara"
+    assert len(fields["body"]) < len(str(RECIPE)) / 2
+    assert decode_recipe(fields) == RECIPE
+    # Old documents store the recipe as a plain map
+    assert decode_recipe({"recipe": RECIPE}) == RECIPE
+    assert recipe_summary({"recipe": RECIPE}) == recipe_summary(fields)
+
+
+async def test_old_documents_are_upgraded_unless_modified_since_read(monkeypatch):
+    store = FakeFirestore()
+    monkeypatch.setattr(firebase, "_db_async", store)
+    legacy = store.collection("recipes").document("legacy")
+    legacy._write({"uid": "u1", "recipe": RECIPE})
+    raced = store.collection("recipes").document("raced")
+    raced._write({"uid": "u1", "recipe": RECIPE})
+
+    upgrade_in_background(await legacy.get())
+    snapshot = await raced.get()
+    raced._write({"uid": "u1", "recipe": {**RECIPE, "title": "Newer"}})
+    upgrade_in_background(snapshot)
+    await asyncio.sleep(0.01)
+
+    upgraded = (await legacy.get()).to_dict()
+    assert "recipe" not in upgraded
+    assert upgraded["schema_version"] == SCHEMA_VERSION
+    assert decode_recipe(upgraded) == RECIPE
+    assert (await legacy.get(TITLE_PROJECTION)).to_dict() == {"schema_version": 2, "summary": {"title": "Carbonara"}}
+    # A write after the read wins over the upgrade
+    assert (await raced.get()).to_dict()["recipe"]["title"] == "Newer"
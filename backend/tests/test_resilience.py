@@ -0,0 +1,166 @@
+import asyncio
+import datetime
+
+import pytest
+from httpx import AsyncClient
+
+from benchmarks.fakes import FakeFirestore
+from services import resilience
+from services.cache import recipe_cache
+from services.health import health_monitor
+from services.resilience import CLOSED, HALF_OPEN, OPEN, Dependency, DependencyUnavailable, retrying
+from services.warmup import warmup
+
+
+class Unavailable(Exception):
+    """A transient error as raised by the Google client libraries."""
+
+    code = 503
+
+
+@pytest.fixture
+def dependencies(monkeypatch) -> dict[str, Dependency]:
+    """Fresh breakers and bulkheads for every dependency, with a short reset time and bulkhead wait."""
+    fresh = {name: Dependency(name, timeout=0.2, max_concurrency=2) for name in resilience.dependencies}
+    for dependency in fresh.values():
+        dependency.breaker.failure_threshold = 3
+        dependency.breaker.reset_timeout = 0.05
+    monkeypatch.setattr(resilience, "dependencies", fresh)
+    monkeypatch.setattr(resilience, "BULKHEAD_WAIT_SECONDS", 0.02)
+    monkeypatch.setattr(resilience, "RETRY_BASE_DELAY_SECONDS", 0.001)
+    return fresh
+
+
+@pytest.fixture
+def store(dependencies, store: FakeFirestore) -> FakeFirestore:
+    """The shared fake store, behind fresh breakers and bulkheads."""
+    return store
+
+
+def open_breaker(dependency: Dependency) -> None:
+    for _ in range(dependency.breaker.failure_threshold):
+        dependency.breaker.record(False)
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_after_failures_and_closes_after_trial(dependencies):
+    firestore = dependencies["firestore"]
+
+    async def fail():
+        async with resilience.guarded("firestore.get"):
+            raise Unavailable()
+
+    for _ in range(3):
+        with pytest.raises(Unavailable):
+            await fail()
+    assert firestore.breaker.state == OPEN
+    with pytest.raises(DependencyUnavailable) as error:
+        await fail()
+    assert error.value.reason == "circuit open"
+
+    # Answers that are not transient (a missing document, bad input) do not count against the dependency
+    await asyncio.sleep(0.05)
+    assert firestore.breaker.state == HALF_OPEN
+    with pytest.raises(ValueError):
+        async with resilience.guarded("firestore.get"):
+            raise ValueError("bad request")
+    assert firestore.breaker.state == CLOSED
+
+    # A failed trial opens the breaker again at once
+    open_breaker(firestore)
+    await asyncio.sleep(0.05)
+    with pytest.raises(Unavailable):
+        await fail()
+    assert firestore.breaker.state == OPEN
+
+
+@pytest.mark.asyncio
+async def test_retries_transient_errors_but_not_an_open_breaker(dependencies):
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise Unavailable()
+        return "ok"
+
+    assert await retrying("auth.get_users", flaky) == "ok"
+    assert len(calls) == 3
+
+    calls.clear()
+
+    async def invalid():
+        calls.append(1)
+        raise ValueError("not found")
+
+    with pytest.raises(ValueError):
+        await retrying("auth.get_users", invalid)
+    assert len(calls) == 1
+
+    open_breaker(dependencies["auth"])
+    calls.clear()
+    with pytest.raises(DependencyUnavailable):
+        await retrying("auth.get_users", flaky)
+    assert calls == []
+
+
+@pytest.mark.asyncio
+async def test_bulkhead_and_timeout(dependencies):
+    release = asyncio.Event()
+
+    async def hold():
+        async with resilience.guarded("gemini.generate"):
+            await release.wait()
+
+    holders = [asyncio.create_task(hold()) for _ in range(2)]
+    await asyncio.sleep(0)
+    with pytest.raises(DependencyUnavailable) as error:
+        async with resilience.guarded("gemini.generate"):
+            pass
+    assert error.value.reason == "bulkhead full"
+    release.set()
+    await asyncio.gather(*holders)
+
+    # A call over the dependency's timeout is cancelled and counts as a failure
+    with pytest.raises(TimeoutError):
+        async with resilience.guarded("gemini.generate"):
+            await asyncio.sleep(1)
+    assert dependencies["gemini"].breaker.failures == 1
+
+
+@pytest.mark.asyncio
+async def test_open_breakers_fail_fast_or_degrade_responses(client: AsyncClient, store: FakeFirestore, dependencies):
+    doc_ref = store.collection("recipes").document()
+    recipe = {"title": "Soup", "description": "", "ingredients": [], "instructions": []}
+    doc_ref._write({"uid": "alice", "prompt": "make soup", "recipe": recipe, "timestamp": "t"})
+
+    # Without Firebase Auth the recipe is still served, without its author's name
+    open_breaker(dependencies["auth"])
+    response = await client.get(f"/api/recipe/{doc_ref.id}")
+    assert response.status_code == 200
+    assert response.json()["displayName"] == ""
+
+    # Without Firestore there is nothing to serve: fail fast with a 503 instead of waiting for timeouts
+    recipe_cache.clear()
+    open_breaker(dependencies["firestore"])
+    response = await client.get(f"/api/recipe/{doc_ref.id}")
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+@pytest.mark.asyncio
+async def test_readiness_reflects_breakers(client: AsyncClient, dependencies, monkeypatch):
+    monkeypatch.setattr(type(warmup), "ready", True)
+    monkeypatch.setattr(health_monitor, "results", {name: {"status": "ok"} for name in health_monitor.checks})
+    monkeypatch.setattr(health_monitor, "checked_at", datetime.datetime.now(datetime.timezone.utc))
+
+    open_breaker(dependencies["gemini"])
+    response = await client.get("/api/health/ready")
+    assert response.status_code == 200
+    assert response.json()["status"] == "degraded"
+    assert response.json()["breakers"]["gemini"] == OPEN
+
+    open_breaker(dependencies["firestore"])
+    response = await client.get("/api/health/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "unavailable"
@@ -0,0 +1,105 @@
+import pytest
+
+from services.scaling import (
+    apply_quick_edit,
+    convert_text,
+    format_fraction,
+    parse_modification,
+    parse_number,
+    scale_ingredient,
+    scale_text,
+)
+
+
+@pytest.mark.parametrize(
+    ("text", "value"),
+    [("2", 2), ("1.5", 1.5), ("1/2", 0.5), ("1 1/2", 1.5), ("1½", 1.5), ("1 ½", 1.5), ("¾", 0.75)],
+)
+def test_parse_number(text, value):
+    assert parse_number(text) == pytest.approx(value)
+
+
+def test_format_fraction_rounds_to_kitchen_fractions():
+    assert format_fraction(1.5) == "1 1/2"
+    assert format_fraction(0.33) == "1/3"
+    assert format_fraction(2.96) == "3"
+    assert format_fraction(0.01) == "1/8"
+    assert format_fraction(0.75, unicode=True) == "¾"
+
+
+@pytest.mark.parametrize(
+    ("item", "doubled", "halved"),
+    [
+        ("400g spaghetti", "800g spaghetti", "200g spaghetti"),
+        ("1 cup (150g) flour", "2 cups (300g) flour", "1/2 cup (75g) flour"),
+        ("1 (14 oz) can tomatoes", "2 (14 oz) can tomatoes", "1/2 (14 oz) can tomatoes"),
+        ("2-3 cloves garlic", "4-6 cloves garlic", "1-1 1/2 cloves garlic"),
+        ("½ tsp salt", "1 tsp salt", "¼ tsp salt"),
+        ("2 tbsp butter, plus 1 tbsp for serving", "4 tbsp butter, plus 2 tbsp for serving",
+         "1 tbsp butter, plus 1/2 tbsp for serving"),
+        ("1.5 kg potatoes", "3 kg potatoes", "0.75 kg potatoes"),
+        ("2-inch piece ginger", "2-inch piece ginger", "2-inch piece ginger"),
+        ("350°F oven", "350°F oven", "350°F oven"),
+        ("180 degrees C oil, 2 cups", "180 degrees C oil, 4 cups", "180 degrees C oil, 1 cup"),
+        ("Salt to taste", "Salt to taste", "Salt to taste"),
+    ],
+)
+def test_scale_ingredient(item, doubled, halved):
+    assert scale_ingredient(item, 2) == doubled
+    assert scale_ingredient(item, 0.5) == halved
+
+
+def test_scale_text_leaves_times_and_temperatures():
+    step = "Bake at 350°F for 25 minutes, then add 1 cup of stock."
+    assert scale_text(step, 2) == "Bake at 350°F for 25 minutes, then add 2 cups of stock."
+
+
+def test_convert_text():
+    assert convert_text("1 cup (150g) flour", "metric") == "150g flour"
+    assert convert_text("1 cup (150g) flour", "imperial") == "1 cup flour"
+    assert convert_text("1 lb chicken thighs", "metric") == "455 g chicken thighs"
+    assert convert_text("2 tbsp olive oil", "metric") == "2 tbsp olive oil"
+    assert convert_text("400g spaghetti", "imperial") == "14 oz spaghetti"
+    assert convert_text("Bake at 350°F in a 9x13-inch pan.", "metric") == "Bake at 175°C in a 23x33-cm pan."
+
+
+@pytest.mark.parametrize(
+    ("modification", "edit"),
+    [
+        ("Make it for 8", {"servings": 8}),
+        ("make it for 8 people and convert to metric, please", {"servings": 8, "system": "metric"}),
+        ("for two", {"servings": 2}),
+        ("Double the recipe", {"factor": 2}),
+        ("cut it in half", {"factor": 0.5}),
+        ("scale by 1.5", {"factor": 1.5}),
+        ("use metric units", {"system": "metric"}),
+        ("make it vegan", None),
+        ("make it for 8 and add chili", None),
+        ("double it and halve it", None),
+    ],
+)
+def test_parse_modification(modification, edit):
+    assert parse_modification(modification) == edit
+
+
+def test_apply_quick_edit():
+    recipe = {
+        "title": "Soup",
+        "servings": "4 servings",
+        "ingredients": [{"group_name": "Main", "items": ["1 lb carrots", "2 cups stock"]}],
+        "instructions": ["Simmer 1 cup of the stock for 10 minutes."],
+        "notes": [],
+    }
+
+    updated = apply_quick_edit(recipe, {"servings": 8, "system": "metric"})
+
+    assert updated["servings"] == "8 servings"
+    assert updated["ingredients"][0]["items"] == ["905 g carrots", "945 ml stock"]
+    assert updated["instructions"] == ["Simmer 475 ml of the stock for 10 minutes."]
+    assert updated["notes"][-1].startswith("Scaled from 4 servings to 8 servings.")
+    assert updated["title"] == "Soup"
+    # A temperature leading an ingredient item is converted, not scaled
+    oven = {**recipe, "ingredients": [{"group_name": "Equipment", "items": ["350°F oven"]}]}
+    assert apply_quick_edit(oven, {"servings": 8, "system": "metric"})["ingredients"][0]["items"] == ["175°C oven"]
+    # Without known servings a target count cannot be applied locally
+    assert apply_quick_edit({**recipe, "servings": ""}, {"servings": 8}) is None
@@ -0,0 +1,49 @@
+from benchmarks.fakes import FakeFirestore
+from services.search import index_recipe, recipe_terms, search_recipes, tokenize, unindex_recipe
+
+
+def make_recipe(title: str, items: list[str], notes: list[str] | None = None) -> dict:
+    return {"title": title, "ingredients": [{"group_name": "Main", "items": items}], "notes": notes or []}
+
+
+def test_tokenize_drops_quantities_units_and_accents():
+    assert tokenize("1 cup (150g) Crème Fraîche, chilled") == ["creme", "fraiche", "chilled"]
+    assert recipe_terms(make_recipe("Pad Thai", ["2 tbsp fish sauce"], ["Serve with lime"])) == {
+        "pad",
+        "thai",
+        "fish",
+        "sauce",
+        "serve",
+        "lime",
+    }
+
+
+async def add_recipe(store: FakeFirestore, uid: str, recipe: dict, timestamp: str) -> str:
+    doc_ref = store.collection("recipes").document()
+    batch = store.batch()
+    batch.set(doc_ref, {"uid": uid, "recipe": recipe, "timestamp": timestamp, "archived": False})
+    index_recipe(batch, uid, doc_ref.id, recipe, timestamp)
+    await batch.commit()
+    return doc_ref.id
+
+
+async def test_search_prefix_matches_and_tracks_updates(store: FakeFirestore):
+    carbonara = await add_recipe(store, "u1", make_recipe("Carbonara", ["200g guanciale", "4 egg yolks"]), "2")
+    frittata = await add_recipe(store, "u1", make_recipe("Egg Frittata", ["6 eggs", "spinach"]), "1")
+    await add_recipe(store, "u2", make_recipe("Egg Curry", ["4 eggs"]), "3")
+
+    # The first search builds the index from existing recipes; later writes update it incrementally
+    assert [r["id"] for r in await search_recipes("u1", "egg")] == [frittata, carbonara]
+    assert [r["id"] for r in await search_recipes("u1", "guanc EGG")] == [carbonara]
+
+    updated = make_recipe("Carbonara", ["200g pancetta", "4 egg yolks"])
+    batch = store.batch()
+    index_recipe(batch, "u1", carbonara, updated, "4", previous=make_recipe("Carbonara", ["200g guanciale"]))
+    await batch.commit()
+    assert await search_recipes("u1", "guanciale") == []
+    assert [r["title"] for r in await search_recipes("u1", "pance")] == ["Carbonara"]
+
+    batch = store.batch()
+    unindex_recipe(batch, "u1", frittata, make_recipe("Egg Frittata", ["6 eggs", "spinach"]))
+    await batch.commit()
+    assert [r["id"] for r in await search_recipes("u1", "egg")] == [carbonara]
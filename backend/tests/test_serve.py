@@ -0,0 +1,75 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+import serve
+from serve import Worker, available_cpus, worker_count
+
+GIB = 1024**3
+
+
+def test_worker_count_follows_cpus_and_memory(monkeypatch):
+    monkeypatch.setattr(serve, "WEB_CONCURRENCY", 0)
+    monkeypatch.setattr(serve, "SERVER_WORKER_MEMORY_MB", 512)
+    assert worker_count(4, 8 * GIB) == 4
+    assert worker_count(1.5, 8 * GIB) == 2
+    # Memory for only three workers
+    assert worker_count(8, 3 * 512 * 1024**2) == 3
+    # Always at least one
+    assert worker_count(0.5, 128 * 1024**2) == 1
+
+    monkeypatch.setattr(serve, "WEB_CONCURRENCY", 6)
+    assert worker_count(2, GIB) == 6
+
+
+def test_available_cpus_reads_cgroup_quota(monkeypatch, tmp_path):
+    cpu_max = tmp_path / "cpu.max"
+    monkeypatch.setattr(serve, "CGROUP_CPU_MAX", str(cpu_max))
+    monkeypatch.setattr(serve.os, "sched_getaffinity", lambda pid: set(range(8)))
+
+    cpu_max.write_text("200000 100000\n")
+    assert available_cpus() == 2
+    cpu_max.write_text("max 100000\n")
+    assert available_cpus() == 8
+
+
+@pytest.mark.asyncio
+async def test_worker_closes_connections_and_exits_after_max_requests():
+    listener = SimpleNamespace(closed=False)
+    listener.close = lambda: setattr(listener, "closed", True)
+    connections = {"open"}
+    worker = Worker.__new__(Worker)
+    worker.served, worker.max_requests, worker._drain_task = 0, 2, None
+    worker.log = logging.getLogger(__name__)
+    worker.server = SimpleNamespace(servers=[listener], server_state=SimpleNamespace(connections=connections),
+                                    should_exit=False)
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    recycling_app = worker._recycling(app)
+
+    async def request() -> list:
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        await recycling_app({"type": "http"}, None, send)
+        return sent[0]["headers"]
+
+    assert (b"connection", b"close") not in await request()
+    # The request reaching the limit and any after it close their connection; new connections go to other workers
+    assert (b"connection", b"close") in await request()
+    assert (b"connection", b"close") in await request()
+    await asyncio.sleep(0)
+    assert listener.closed
+    assert not worker.server.should_exit
+
+    # The worker exits once its open connections are closed
+    connections.clear()
+    await asyncio.wait_for(worker._drain_task, 1)
+    assert worker.server.should_exit
@@ -0,0 +1,131 @@
+import io
+
+import pytest
+from httpx import AsyncClient
+from PIL import Image
+
+from benchmarks.fakes import FakeFirestore
+from routes import images as image_routes
+from services import images, storage
+
+
+class FakeBlob:
+    def __init__(self, name: str):
+        self.name = name
+        self.cache_control = None
+        self.public = False
+
+    def upload_from_string(self, data: bytes, content_type: str) -> None:
+        self.data = data
+        self.content_type = content_type
+
+    def make_public(self) -> None:
+        self.public = True
+
+    @property
+    def public_url(self) -> str:
+        return f"https://storage.test/{self.name}"
+
+
+class FakeBucket:
+    """Blobs by object name, as uploaded."""
+
+    def __init__(self):
+        self.blobs: dict[str, FakeBlob] = {}
+
+    def blob(self, name: str) -> FakeBlob:
+        return self.blobs.setdefault(name, FakeBlob(name))
+
+
+@pytest.fixture
+def bucket(monkeypatch) -> FakeBucket:
+    bucket = FakeBucket()
+    monkeypatch.setattr(storage, "_storage_bucket", bucket)
+    monkeypatch.setattr(storage, "_storage_initialized", True)
+    return bucket
+
+
+@pytest.fixture(autouse=True)
+def encode_pool():
+    yield
+    storage.shutdown_encode_pool()
+
+
+def png(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGBA", (width, height), (200, 80, 40, 128)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.mark.asyncio
+async def test_variants_are_resized_without_upscaling_and_encoded_in_every_format():
+    variants = await storage.generate_image_variants(png(1000, 500))
+
+    assert set(variants) == set(storage.IMAGE_VARIANT_WIDTHS)
+    expected_sizes = {"thumb": (320, 160), "medium": (768, 384), "full": (1000, 500)}
+    for name, formats in variants.items():
+        assert set(formats) == {"avif", "webp", "jpeg"}
+        for fmt, (data, mime_type) in formats.items():
+            pil_format, expected_mime, _, _ = storage.IMAGE_VARIANT_FORMATS[fmt]
+            assert mime_type == expected_mime
+            decoded = Image.open(io.BytesIO(data))
+            assert decoded.format == pil_format
+            assert decoded.size == expected_sizes[name]
+
+
+@pytest.mark.asyncio
+async def test_variants_are_uploaded_under_recipe_prefix(bucket: FakeBucket):
+    variants = {
+        "thumb": {"webp": (b"t", "image/webp"), "jpeg": (b"tj", "image/jpeg")},
+        "full": {"avif": (b"f", "image/avif")},
+    }
+
+    urls = await storage.upload_image_variants("abc123", variants)
+
+    assert set(bucket.blobs) == {
+        "recipe-images/abc123/thumb.webp",
+        "recipe-images/abc123/thumb.jpg",
+        "recipe-images/abc123/full.avif",
+    }
+    assert urls == {
+        "thumb": {
+            "webp": "https://storage.test/recipe-images/abc123/thumb.webp",
+            "jpeg": "https://storage.test/recipe-images/abc123/thumb.jpg",
+        },
+        "full": {"avif": "https://storage.test/recipe-images/abc123/full.avif"},
+    }
+    blob = bucket.blobs["recipe-images/abc123/thumb.jpg"]
+    assert (blob.data, blob.content_type, blob.public) == (b"tj", "image/jpeg", True)
+    assert blob.cache_control == "public, max-age=86400"
+
+
+@pytest.mark.asyncio
+async def test_generated_image_variants_are_returned_and_stored(
+    client: AsyncClient, store: FakeFirestore, bucket: FakeBucket, monkeypatch
+):
+    async def generate_gemini_image(prompt: str) -> bytes:
+        return png(2000, 1000)
+
+    monkeypatch.setattr(images, "MOCK_MODE", False)
+    monkeypatch.setattr(image_routes, "MOCK_MODE", False)
+    monkeypatch.setattr(image_routes, "ENABLE_IMAGE_GENERATION", True)
+    monkeypatch.setattr(images, "generate_gemini_image", generate_gemini_image)
+    doc_ref = store.collection("recipes").document()
+    recipe = {"title": "Tomato Soup", "description": "Warm and smooth", "ingredients": [], "instructions": []}
+    doc_ref._write({"uid": "alice", "prompt": "make soup", "recipe": recipe, "timestamp": "t"})
+    headers = {"Authorization": "Bearer user-alice"}
+
+    response = await client.post(
+        "/api/generate-image", json={"recipe_id": doc_ref.id, "recipe": recipe}, headers=headers
+    )
+    assert response.status_code == 200
+    generated = response.json()
+    assert len(bucket.blobs) == len(storage.IMAGE_VARIANT_WIDTHS) * len(storage.IMAGE_VARIANT_FORMATS)
+    assert (
+        generated["image_variants"]["medium"]["webp"] == f"https://storage.test/recipe-images/{doc_ref.id}/medium.webp"
+    )
+    assert generated["image_url"] == generated["image_variants"]["full"]["jpeg"]
+
+    response = await client.get(f"/api/recipe/{doc_ref.id}", headers=headers)
+    assert response.json()["image_variants"] == generated["image_variants"]
+    assert response.json()["image_url"] == generated["image_url"]
@@ -0,0 +1,55 @@
+import pytest
+
+from services import llm
+from services.token_budget import MIN_BUDGET_SAMPLES, TokenBudget, generation_profile
+
+
+def test_budget_learns_a_high_quantile_per_profile():
+    budget = TokenBudget(quantile=0.9, headroom=0.1, minimum=300, maximum=2000)
+    simple = generation_profile("simple", "standard", "quick", "single")
+    fancy = generation_profile("fancy", "standard", "slow", "party")
+
+    # Nothing seen yet: the maximum
+    assert budget.max_tokens(simple) == 2000
+
+    for tokens in range(500, 500 + 10 * MIN_BUDGET_SAMPLES, 10):
+        budget.record(simple, 2000, tokens, truncated=False)
+    # 90th percentile of 500..690 is 680, plus 10% headroom
+    assert budget.max_tokens(simple) == 748
+    # A combination not seen yet falls back to its complexity, then to the operation
+    assert budget.max_tokens(generation_profile("simple", "low carb", "any", "standard")) == 748
+    assert budget.max_tokens(fancy) == 748
+
+    for _ in range(MIN_BUDGET_SAMPLES):
+        budget.record(fancy, 2000, 1900, truncated=False)
+        budget.record(("update",), 2000, 100, truncated=False)
+    # Bounded by the maximum and the minimum
+    assert budget.max_tokens(fancy) == 2000
+    assert budget.max_tokens(("update",)) == 300
+
+
+def test_report_shows_savings_and_truncation_rate():
+    budget = TokenBudget(maximum=2000)
+    profile = generation_profile("simple", "standard", "any", "standard")
+    budget.record(profile, 800, 700, truncated=False)
+    budget.record(profile, 800, 900, truncated=True)
+
+    [row] = budget.report()
+    assert row["profile"] == "generate/simple/standard/any/standard"
+    assert row["calls"] == 2
+    assert row["truncation_rate"] == pytest.approx(0.5)
+    assert row["saved_tokens"] == 2400
+
+
+def test_compact_schema_trims_descriptions():
+    full = llm.get_recipe_response_format()["json_schema"]["schema"]
+    compact = llm.get_recipe_response_format(compact=True)["json_schema"]["schema"]
+
+    assert compact["properties"]["instructions"]["description"] == "Step-by-step cooking instructions."
+    assert compact["properties"]["ingredients"]["description"] == (
+        "Ingredients organized by group (e.g., Main, Sauce, Garnish)."
+    )
+    assert len(str(compact)) < len(str(full))
+    # Only descriptions change: the compact schema accepts the same recipes
+    assert compact["required"] == full["required"]
+    assert "Serious Eats" in full["properties"]["description"]["description"]
@@ -0,0 +1,37 @@
+import pytest
+from httpx import AsyncClient
+
+from services.tracing import Tracer, parse_traceparent
+
+
+def test_parse_traceparent():
+    trace_id, parent_id, sampled = parse_traceparent("00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01")
+    assert trace_id == "4bf92f3577b34da6a3ce929d0e0e4736"
+    assert parent_id == "00f067aa0ba902b7"
+    assert sampled
+    assert parse_traceparent("garbage") is None
+
+
+def test_child_spans_share_trace_and_sampling_decision():
+    tracer = Tracer(exporter="file", sample_ratio=1.0)
+    with tracer.start_span("root") as root:
+        with tracer.start_span("child") as child:
+            pass
+    assert child.trace_id == root.trace_id
+    assert child.parent_span_id == root.span_id
+
+    unsampled = Tracer(exporter="file", sample_ratio=0.0)
+    with unsampled.start_span("root") as root:
+        with unsampled.start_span("child") as child:
+            pass
+    assert not root.sampled and not child.sampled
+    assert unsampled._drain() == []
+
+
+@pytest.mark.asyncio
+async def test_request_id_is_propagated(client: AsyncClient):
+    response = await client.get("/api/health/live", headers={"X-Request-ID": "abc123"})
+    assert response.headers["x-request-id"] == "abc123"
+
+    response = await client.get("/api/health/live")
+    assert len(response.headers["x-request-id"]) == 32
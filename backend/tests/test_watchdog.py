@@ -0,0 +1,32 @@
+import asyncio
+import time
+
+import pytest
+
+from services.metrics import EVENT_LOOP_BLOCKS, EVENT_LOOP_LAG
+from services.watchdog import LoopWatchdog
+
+
+def block_the_loop():
+    time.sleep(0.3)
+
+
+@pytest.mark.asyncio
+async def test_watchdog_reports_blocking_stack_and_route():
+    watchdog = LoopWatchdog(interval_ms=10, threshold_ms=50)
+    watchdog.start()
+    try:
+        await asyncio.sleep(0.05)
+        watchdog.track(asyncio.current_task(), {"method": "GET", "path": "/api/recipe/abc"})
+        block_the_loop()
+        await asyncio.sleep(0.05)
+    finally:
+        await watchdog.stop()
+
+    assert len(watchdog.reports) == 1
+    report = watchdog.reports[0]
+    assert report["route"] == "GET /api/recipe/abc"
+    assert "block_the_loop" in report["stack"]
+    assert report["blocked_ms"] >= 50
+    assert EVENT_LOOP_BLOCKS.collect()[("GET /api/recipe/abc",)] >= 1
+    assert EVENT_LOOP_LAG.collect()[()][-1] > 0
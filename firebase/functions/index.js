@@ -46,7 +46,7 @@ exports.pingBackendHealthCheck = onSchedule("every 10 minutes",
       }
 
       try {
-        const response = await axios.get(`${BACKEND_URL}/api/health`);
+        const response = await axios.get(`${BACKEND_URL}/api/health/live`);
         console.log("Backend health check ping successful:", response.data);
       } catch (error) {
         console.error("Backend health check ping failed:", error);